@@ -0,0 +1,88 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    cache درون‌پردازه‌ای با زمان انقضا و بارگذاری تک‌پروازی (single-flight).
+
+    اگر چند درخواست هم‌زمان مقدار منقضی‌شده یک کلید را بخواهند، فقط یکی loader
+    را اجرا می‌کند و بقیه منتظر همان نتیجه می‌مانند؛ پس هر بار انقضا فقط یک
+    کوئری سنگین اجرا می‌شود.
+
+    هنگام هر درج مقادیر منقضی حذف می‌شوند؛ با max_entries تعداد کلیدها محدود است و
+    قدیمی‌ترین مقدار (زودترین انقضا) کنار گذاشته می‌شود. قفل هر کلید شمارنده
+    استفاده‌کنندگان دارد و فقط وقتی حذف می‌شود که هیچ درخواستی آن را نگرفته یا منتظرش نباشد.
+    """
+
+    def __init__(
+            self,
+            ttl_seconds: float,
+            clock: Callable[[], float] = time.monotonic,
+            max_entries: Optional[int] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.max_entries = max_entries
+        self._values: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # کلید -> [قفل، تعداد درخواست‌هایی که قفل را گرفته‌اند یا منتظر آن هستند]
+        self._key_locks: Dict[Hashable, list] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def _fresh(self, key: Hashable) -> Optional[Tuple[float, Any]]:
+        entry = self._values.get(key)
+        if entry is not None and entry[0] > self.clock():
+            return entry
+        return None
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """مقدار کلید از cache یا (در صورت نبود/انقضا) از loader."""
+        entry = self._fresh(key)
+        if entry is not None:
+            return entry[1]
+
+        with self._lock:
+            slot = self._key_locks.setdefault(key, [Lock(), 0])
+            slot[1] += 1
+
+        try:
+            with slot[0]:
+                # ممکن است درخواست دیگری در این فاصله مقدار را بارگذاری کرده باشد
+                entry = self._fresh(key)
+                if entry is not None:
+                    return entry[1]
+
+                value = loader()
+                ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+                if ttl > 0:
+                    self._store(key, self.clock() + ttl, value)
+                return value
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if not slot[1]:
+                    del self._key_locks[key]
+
+    def _store(self, key: Hashable, expires_at: float, value: Any) -> None:
+        with self._lock:
+            self._values.pop(key, None)
+            self._values[key] = (expires_at, value)
+
+            now = self.clock()
+            for expired_key in [k for k, (expires, _) in self._values.items() if expires <= now]:
+                del self._values[expired_key]
+            while self.max_entries is not None and len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """حذف یک کلید یا (بدون key) کل cache."""
+        with self._lock:
+            if key is None:
+                self._values.clear()
+            else:
+                self._values.pop(key, None)
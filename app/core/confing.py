@@ -17,6 +17,16 @@ def _parse_csv(value: str, default: Tuple[str, ...]) -> Tuple[str, ...]:
     return tuple(items) if items else default
 
 
+def _parse_rates(value: str) -> Tuple[Tuple[str, float], ...]:
+    """تبدیل مقدار «LOGIN=0.1,REGISTER=1» به جفت‌های (نام، نرخ)."""
+    rates = []
+    for item in _parse_csv(value, ()):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates.append((name.strip(), min(1.0, max(0.0, float(rate)))))
+    return tuple(rates)
+
+
 @dataclass(frozen=True)
 class Settings:
     database_url: str
@@ -30,7 +40,33 @@ class Settings:
     admin_login_password: str
     cookie_secure: bool
     log_level: str
-
+    audit_queue_size: int
+    audit_batch_size: int
+    audit_flush_interval_seconds: float
+    audit_backpressure: str
+    audit_block_timeout_seconds: float
+    audit_sample_rates: Tuple[Tuple[str, float], ...]
+    audit_retention_days: int
+    audit_archive_dir: str
+    change_log_retention_days: int
+    audit_stream_buffer_size: int
+    audit_stream_max_clients: int
+    audit_stream_keepalive_seconds: float
+    export_dir: str
+    export_workers: int
+    export_job_ttl_seconds: int
+    outbox_file_path: str
+    outbox_webhook_url: str
+    outbox_webhook_timeout_seconds: float
+    outbox_batch_size: int
+    outbox_poll_interval_seconds: float
+    outbox_max_attempts: int
+    outbox_retry_base_seconds: float
+    outbox_retry_max_seconds: float
+    outbox_long_poll_timeout_seconds: float
+    dashboard_cache_ttl_seconds: float
+    analytics_cache_ttl_seconds: float
+    permission_cache_ttl_seconds: float
 
 
 @lru_cache(maxsize=1)
@@ -47,6 +83,33 @@ def get_settings() -> Settings:
         admin_login_password=os.getenv("ADMIN_LOGIN_PASSWORD", ""),
         cookie_secure=_parse_bool(os.getenv("COOKIE_SECURE"), False),
         log_level=os.getenv("LOG_LEVEL", "INFO"),
+        audit_queue_size=int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+        audit_batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "500")),
+        audit_flush_interval_seconds=float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", "0.5")),
+        audit_backpressure=os.getenv("AUDIT_BACKPRESSURE", "drop").strip().lower(),
+        audit_block_timeout_seconds=float(os.getenv("AUDIT_BLOCK_TIMEOUT_SECONDS", "0.1")),
+        audit_sample_rates=_parse_rates(os.getenv("AUDIT_SAMPLE_RATES")),
+        audit_retention_days=int(os.getenv("AUDIT_RETENTION_DAYS", "0")),
+        audit_archive_dir=os.getenv("AUDIT_ARCHIVE_DIR", "./audit_archive"),
+        change_log_retention_days=int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30")),
+        audit_stream_buffer_size=int(os.getenv("AUDIT_STREAM_BUFFER_SIZE", "100")),
+        audit_stream_max_clients=int(os.getenv("AUDIT_STREAM_MAX_CLIENTS", "100")),
+        audit_stream_keepalive_seconds=float(os.getenv("AUDIT_STREAM_KEEPALIVE_SECONDS", "15")),
+        export_dir=os.getenv("EXPORT_DIR", "./exports"),
+        export_workers=int(os.getenv("EXPORT_WORKERS", "2")),
+        export_job_ttl_seconds=int(os.getenv("EXPORT_JOB_TTL_SECONDS", "3600")),
+        outbox_file_path=os.getenv("OUTBOX_FILE_PATH", ""),
+        outbox_webhook_url=os.getenv("OUTBOX_WEBHOOK_URL", ""),
+        outbox_webhook_timeout_seconds=float(os.getenv("OUTBOX_WEBHOOK_TIMEOUT_SECONDS", "5")),
+        outbox_batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "100")),
+        outbox_poll_interval_seconds=float(os.getenv("OUTBOX_POLL_INTERVAL_SECONDS", "5")),
+        outbox_max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", "10")),
+        outbox_retry_base_seconds=float(os.getenv("OUTBOX_RETRY_BASE_SECONDS", "1")),
+        outbox_retry_max_seconds=float(os.getenv("OUTBOX_RETRY_MAX_SECONDS", "300")),
+        outbox_long_poll_timeout_seconds=float(os.getenv("OUTBOX_LONG_POLL_TIMEOUT_SECONDS", "25")),
+        dashboard_cache_ttl_seconds=float(os.getenv("DASHBOARD_CACHE_TTL_SECONDS", "30")),
+        analytics_cache_ttl_seconds=float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "300")),
+        permission_cache_ttl_seconds=float(os.getenv("PERMISSION_CACHE_TTL_SECONDS", "300")),
     )
 
 
@@ -42,6 +42,12 @@ def ensure_student_profiles_schema():
         pending_columns.append(("student_number", "VARCHAR(20) NOT NULL DEFAULT ''"))
     if "has_authenticated" not in existing_columns:
         pending_columns.append(("has_authenticated", "BOOLEAN NOT NULL DEFAULT 0"))
+    if "entry_year" not in existing_columns:
+        pending_columns.append(("entry_year", "INTEGER"))
+    if "faculty_code" not in existing_columns:
+        pending_columns.append(("faculty_code", "VARCHAR(2)"))
+    if "search_name" not in existing_columns:
+        pending_columns.append(("search_name", "VARCHAR(101)"))
 
     existing_indexes = {index["name"] for index in inspector.get_indexes("student_profiles")}
 
@@ -57,12 +63,205 @@ def ensure_student_profiles_schema():
             connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ix_student_profiles_phone_number ON student_profiles (phone_number)"))
 
 
+# ایندکس‌های جدول audit_logs برای فیلتر کاربر/عملیات و بازه زمانی با مرتب‌سازی created_at
+AUDIT_LOG_INDEXES = {
+    "ix_audit_logs_created_at": "(created_at)",
+    "ix_audit_logs_action_created_at": "(action, created_at)",
+    "ix_audit_logs_user_id_created_at": "(user_id, created_at)",
+}
+
+
+def ensure_audit_logs_schema(bind=None):
+    """افزودن ایندکس‌های ترکیبی audit_logs به دیتابیس‌های قدیمی."""
+    bind = bind or engine
+    inspector = inspect(bind)
+    if "audit_logs" not in inspector.get_table_names():
+        return
+
+    existing_indexes = {index["name"] for index in inspector.get_indexes("audit_logs")}
+    pending_indexes = {
+        name: columns for name, columns in AUDIT_LOG_INDEXES.items() if name not in existing_indexes
+    }
+    if not pending_indexes:
+        return
+
+    with bind.begin() as connection:
+        for index_name, columns in pending_indexes.items():
+            connection.execute(
+                text(f"CREATE INDEX IF NOT EXISTS {index_name} ON audit_logs {columns}")
+            )
+
+
+def ensure_outbox_events_schema(bind=None):
+    """افزودن ستون‌های تلاش دوباره و dead-letter به جدول outbox_events قدیمی."""
+    bind = bind or engine
+    inspector = inspect(bind)
+    if "outbox_events" not in inspector.get_table_names():
+        return
+
+    existing_columns = {column["name"] for column in inspector.get_columns("outbox_events")}
+    pending_columns = [
+        name for name in ("next_attempt_at", "failed_at") if name not in existing_columns
+    ]
+    if not pending_columns:
+        return
+
+    with bind.begin() as connection:
+        for column_name in pending_columns:
+            connection.execute(text(f"ALTER TABLE outbox_events ADD COLUMN {column_name} DATETIME"))
+
+
+# ایندکس‌های users و student_profiles: updated_at برای کوئری‌های «تغییرات بعد از زمان X»
+# و created_at برای صفحه‌بندی keyset فهرست کاربران
+USER_INDEXES = {
+    "ix_users_updated_at": ("users", "(updated_at)"),
+    "ix_users_created_at": ("users", "(created_at)"),
+    # صفحه‌بندی فهرست کاربران (USER_SORT_KEYS در user_service)
+    "ix_users_created_at_sort": ("users", "(strftime('%Y-%m-%d %H:%M:%f', created_at))"),
+    "ix_student_profiles_updated_at": ("student_profiles", "(updated_at)"),
+    "ix_student_profiles_created_at_authenticated": ("student_profiles", "(created_at, has_authenticated)"),
+    "ix_student_profiles_cohort": ("student_profiles", "(entry_year, faculty_code, gender, has_authenticated)"),
+}
+
+
+def ensure_user_indexes(bind=None):
+    """افزودن ایندکس‌های USER_INDEXES به دیتابیس‌های قدیمی."""
+    bind = bind or engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+
+    pending_indexes = {}
+    for index_name, (table_name, columns) in USER_INDEXES.items():
+        if table_name not in existing_tables:
+            continue
+        if index_name not in {index["name"] for index in inspector.get_indexes(table_name)}:
+            pending_indexes[index_name] = (table_name, columns)
+    if not pending_indexes:
+        return
+
+    with bind.begin() as connection:
+        for index_name, (table_name, columns) in pending_indexes.items():
+            connection.execute(
+                text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} {columns}")
+            )
+
+
+def backfill_student_cohorts(bind=None, batch_size: int = 1000) -> int:
+    """
+    پر کردن entry_year و faculty_code پروفایل‌های قدیمی از روی شماره دانشجویی.
+
+    ردیف‌ها به ترتیب id در دسته‌های batch_size خوانده و هر دسته در تراکنش جداگانه
+    به‌روزرسانی می‌شود تا قفل نوشتن طولانی نشود. تعداد ردیف‌های به‌روزشده برگردانده می‌شود.
+    """
+    from app.models.student_profile import parse_student_number_cohort
+
+    bind = bind or engine
+    if "student_profiles" not in inspect(bind).get_table_names():
+        return 0
+
+    updated = 0
+    last_id = 0
+    while True:
+        with bind.begin() as connection:
+            rows = connection.execute(
+                text(
+                    "SELECT id, student_number FROM student_profiles "
+                    "WHERE entry_year IS NULL AND id > :last_id ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).fetchall()
+            if not rows:
+                return updated
+
+            last_id = rows[-1][0]
+            values = []
+            for profile_id, student_number in rows:
+                entry_year, faculty_code = parse_student_number_cohort(student_number)
+                if entry_year is not None:
+                    values.append({"id": profile_id, "entry_year": entry_year, "faculty_code": faculty_code})
+            if values:
+                connection.execute(
+                    text(
+                        "UPDATE student_profiles SET entry_year = :entry_year, faculty_code = :faculty_code "
+                        "WHERE id = :id"
+                    ),
+                    values,
+                )
+                updated += len(values)
+
+
+def backfill_student_search_names(bind=None, batch_size: int = 1000) -> int:
+    """
+    پر کردن search_name پروفایل‌های قدیمی (نام کامل نرمال‌شده برای ایندکس جستجو).
+
+    مانند backfill_student_cohorts دسته‌ای به ترتیب id انجام می‌شود؛ trigger
+    به‌روزرسانی ایندکس FTS را هم همگام می‌کند.
+    """
+    from app.core.validators import normalize_persian_text
+
+    bind = bind or engine
+    if "student_profiles" not in inspect(bind).get_table_names():
+        return 0
+
+    updated = 0
+    last_id = 0
+    while True:
+        with bind.begin() as connection:
+            rows = connection.execute(
+                text(
+                    "SELECT id, first_name, last_name FROM student_profiles "
+                    "WHERE search_name IS NULL AND id > :last_id ORDER BY id LIMIT :batch_size"
+                ),
+                {"last_id": last_id, "batch_size": batch_size},
+            ).fetchall()
+            if not rows:
+                return updated
+
+            last_id = rows[-1][0]
+            connection.execute(
+                text("UPDATE student_profiles SET search_name = :search_name WHERE id = :id"),
+                [
+                    {"id": profile_id, "search_name": normalize_persian_text(f"{first_name or ''} {last_name or ''}")}
+                    for profile_id, first_name, last_name in rows
+                ],
+            )
+            updated += len(rows)
 
 
 def create_database():
     """ایجاد همه جداول در دیتابیس"""
-    Base.metadata.create_all(bind=engine)
+    # مدل‌های اصلی؛ اسکریپت‌هایی که app.main را import نمی‌کنند هم همه جداول و روابط را داشته باشند
+    import app.models.role  # noqa: F401
+    import app.models.user  # noqa: F401
+    import app.models.student_profile  # noqa: F401
+    import app.models.audit_log  # noqa: F401
+    import app.models.counter  # noqa: F401  (ثبت جدول و triggerهای شمارنده)
+    import app.models.audit_archive  # noqa: F401  (فهرست فایل‌های آرشیو لاگ)
+    import app.models.audit_rollup  # noqa: F401  (جدول و trigger آمار زمانی لاگ‌ها)
+    import app.models.audit_search  # noqa: F401  (ایندکس FTS5 جستجوی متنی لاگ‌ها)
+    import app.models.change_log  # noqa: F401  (دنباله تغییرات برای همگام‌سازی افزایشی)
+    import app.models.outbox_event  # noqa: F401  (رویدادهای outbox برای سیستم‌های بیرونی)
+    import app.models.student_search  # noqa: F401  (ایندکس FTS5 جستجوی نام دانشجویان)
+    import app.models.duplicate_candidate  # noqa: F401  (جفت‌های احتمالاً تکراری برای بررسی)
+    import app.models.permission  # noqa: F401  (دسترسی‌ها و جدول واسط نقش‌ها)
+    from app.services.audit_rollup_service import ensure_rollups_initialized
+    from app.services.counter_service import ensure_counters_initialized
+
+    # ستون‌های جدید پروفایل قبل از create_all تا triggerهای جستجو (search_name) ساخته شوند
     ensure_student_profiles_schema()
+    Base.metadata.create_all(bind=engine)
+    ensure_audit_logs_schema()
+    ensure_outbox_events_schema()
+    ensure_user_indexes()
+    backfill_student_cohorts()
+    backfill_student_search_names()
+
+    db = SessionLocal()
+    try:
+        ensure_counters_initialized(db)
+        ensure_rollups_initialized(db)
+    finally:
+        db.close()
     logging.getLogger(__name__).info("✅ دیتابیس در %s ایجاد شد", DATABASE_URL)
 
 
@@ -0,0 +1,89 @@
+import os
+import re
+from typing import Iterator, Optional, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    تبدیل هدر Range (فقط یک بازه) به (start, end) شامل هر دو سر.
+
+    برای بازه نامعتبر یا خارج از فایل None برمی‌گرداند.
+    """
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match or size == 0:
+        return None
+
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+    if not start_text:
+        # bytes=-N یعنی N بایت آخر
+        length = int(end_text)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def ranged_file_response(request: Request, path: str, media_type: str, filename: str) -> Response:
+    """
+    ارسال فایل با پشتیبانی از درخواست Range (ادامه دانلود نیمه‌تمام).
+
+    بدون هدر Range کل فایل با FileResponse ارسال می‌شود؛ با یک بازه معتبر پاسخ 206
+    و با بازه نامعتبر پاسخ 416 برگردانده می‌شود.
+    """
+    size = os.path.getsize(path)
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    range_header = request.headers.get("range")
+
+    if not range_header:
+        return FileResponse(
+            path,
+            media_type=media_type,
+            filename=filename,
+            headers={"Accept-Ranges": "bytes"},
+        )
+
+    byte_range = parse_range(range_header, size)
+    if byte_range is None:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    start, end = byte_range
+    length = end - start + 1
+    return StreamingResponse(
+        _iter_file(path, start, length),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={
+            **disposition,
+            "Accept-Ranges": "bytes",
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(length),
+        },
+    )
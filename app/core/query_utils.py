@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from sqlalchemy import and_
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    """
+    کوچک‌ترین رشته‌ای که از همه رشته‌های شروع‌شده با prefix بزرگ‌تر است.
+
+    مثال: «4011» -> «4012». اگر چنین رشته‌ای وجود نداشته باشد None برمی‌گرداند.
+    """
+    for index in range(len(prefix) - 1, -1, -1):
+        code = ord(prefix[index])
+        if code < 0x10FFFF:
+            return prefix[:index] + chr(code + 1)
+    return None
+
+
+def prefix_filter(column, prefix: str):
+    """
+    شرط «شروع شدن با prefix» به صورت بازه (>= و <) به جای LIKE.
+
+    مقایسه بازه‌ای از ایندکس ستون استفاده می‌کند و به کاراکترهای % و _ حساس نیست.
+    """
+    upper = prefix_upper_bound(prefix)
+    if upper is None:
+        return column >= prefix
+    return and_(column >= prefix, column < upper)
+
+
+# نتایج رتبه‌بندی‌شده جستجو فقط تا این تعداد صفحه‌بندی می‌شوند (صفحه‌بندی offset روی رتبه)
+SEARCH_MAX_RESULTS = 1000
+
+
+def search_page_window(cursor_offset: Optional[int], limit: int) -> Tuple[int, int]:
+    """
+    (offset، تعداد ردیف قابل خواندن) برای یک صفحه از نتایج رتبه‌بندی‌شده.
+
+    امتیاز bm25 به آمار کل ایندکس بستگی دارد و با هر درج تغییر می‌کند، پس
+    مقایسه امتیاز صفحه قبل در cursor ردیف‌ها را جا می‌انداخت یا تکرار می‌کرد؛
+    صفحه‌بندی بر اساس جایگاه در رتبه‌بندی (offset) در حداکثر SEARCH_MAX_RESULTS
+    نتیجه انجام می‌شود. اگر داده بین دو صفحه تغییر کند، نتایج تقریبی است.
+    خروجی دوم یکی بیشتر از limit است تا وجود صفحه بعد تشخیص داده شود.
+    """
+    offset = cursor_offset or 0
+    return offset, max(0, min(limit + 1, SEARCH_MAX_RESULTS - offset))
+
+
+def build_search_match(q: Optional[str]) -> Optional[str]:
+    """
+    تبدیل متن جستجو به عبارت MATCH امن برای FTS5.
+
+    هر کلمه داخل کوتیشن قرار می‌گیرد (بدون تفسیر عملگرها) و کلمه آخر به صورت
+    پیشوندی جستجو می‌شود؛ همه کلمات باید در متن وجود داشته باشند.
+    """
+    tokens = [token.replace('"', '""') for token in (q or "").split()]
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"' for token in tokens) + "*"
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    تبدیل زمان فیلتر به UTC بدون tzinfo، همان قالبی که لاگ‌ها و آرشیو ذخیره می‌کنند.
+
+    مقدار بدون tzinfo همان UTC فرض می‌شود؛ مثال: 2024-01-01T03:30+03:30 -> 2024-01-01 00:00.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
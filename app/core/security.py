@@ -5,10 +5,11 @@ import bcrypt
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from app.core.deps import DBDep
 from app.models.user import User
 from app.core.confing import settings
+from app.services.permission_service import ADMIN_PERMISSION, role_has_permission
 
 # تنظیمات
 SECRET_KEY = settings.secret_key  # در production تغییر دهید
@@ -96,7 +97,13 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
 
-    user = db.query(User).filter(User.student_number == student_number).first()
+    # نقش برای بررسی دسترسی در اکثر endpointها لازم است؛ همراه کاربر خوانده می‌شود
+    user = (
+        db.query(User)
+        .options(joinedload(User.role))
+        .filter(User.student_number == student_number)
+        .first()
+    )
 
     if user is None:
         raise credentials_exception
@@ -104,15 +111,31 @@ def get_current_user(
     return user
 
 
+def require_permission(permission: str):
+    """
+    Dependency factory برای بررسی یک دسترسی، مثلاً Depends(require_permission("manage_users")).
+
+    bitset نقش‌ها در cache است؛ پس بررسی فقط یک AND بیتی است و کوئری اضافه ندارد.
+    """
+    def dependency(
+            current_user: User = Depends(get_current_user),
+            db: Session = DBDep(),
+    ) -> User:
+        if not role_has_permission(db, current_user.role_id, permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="شما دسترسی لازم را ندارید"
+            )
+        return current_user
+
+    return dependency
+
+
 def get_current_admin(
         current_user: User = Depends(get_current_user),
+        db: Session = DBDep(),
 ):
     """
-    Dependency برای اطمینان از admin بودن کاربر
+    Dependency برای اطمینان از admin بودن کاربر (داشتن دسترسی manage_users)
     """
-    if  not current_user.role or current_user.role.name != "admin":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="شما دسترسی لازم را ندارید"
-        )
-    return current_user
+    return require_permission(ADMIN_PERMISSION)(current_user, db)
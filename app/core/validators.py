@@ -47,6 +47,36 @@ def normalize_digits(value: Any) -> Optional[str]:
         normalized = re.sub(r"[\s\u200c\u200f\-_()]+", "", normalized)
         return normalized
 
+# یکسان‌سازی حروف عربی با فارسی و حذف کشیده
+_PERSIAN_LETTER_TRANSLATION = str.maketrans({
+    "ي": "ی",
+    "ى": "ی",
+    "ك": "ک",
+    "ۀ": "ه",
+    "ة": "ه",
+    "ـ": None,
+})
+# اعراب (فتحه، کسره، تنوین، تشدید، ...) و الف مقصوره بالانویس
+_ARABIC_DIACRITICS = re.compile(r"[\u064b-\u065f\u0670]")
+
+
+def normalize_persian_text(value: Any) -> Optional[str]:
+    """
+    نرمال‌سازی متن فارسی برای جستجو.
+
+    - تبدیل ي/ك عربی به ی/ک فارسی و حذف کشیده و اعراب
+    - حذف نیم‌فاصله (ZWNJ) تا «نیک‌نام» و «نیکنام» یکسان شوند
+    - تبدیل ارقام فارسی/عربی به انگلیسی، حروف کوچک و یکی کردن فاصله‌ها
+    """
+    text_value = _coerce_to_text(value)
+    if text_value is None:
+        return None
+
+    normalized = unicodedata.normalize("NFKC", text_value)
+    normalized = normalized.translate(_DIGIT_TRANSLATION).translate(_PERSIAN_LETTER_TRANSLATION)
+    normalized = _ARABIC_DIACRITICS.sub("", normalized).replace("\u200c", "")
+    return " ".join(normalized.lower().split())
+
 def _normalize_fixed_digits(
     value: Any,
     *,
@@ -9,13 +9,16 @@ from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 import logging
 from sqlalchemy.exc import SQLAlchemyError
-from app.routers import admin_audit
+from app.routers import admin_api, admin_audit
 from app.routers import student, admin, test, user, admin_ui, admin_dashboard, ui_dashboard, admin_auth
 from app.core.database import create_database
 from app.routers.auth import router as auth_router
 from app.routers.ui_auth import router as ui_auth_router
 from app.core.confing import settings
 from app.core.json_utils import make_json_safe
+from app.services.audit_sink import audit_sink
+from app.services.export_jobs import export_jobs
+from app.services.outbox_relay import outbox_relay
 
 
 # تنظیمات لاگ‌گیری
@@ -43,15 +46,25 @@ async def lifespan(app: FastAPI):
     # ایجاد نقش‌های پیش‌فرض
     await create_default_roles()
 
+    # شروع نویسنده دسته‌ای لاگ‌های ممیزی
+    await audit_sink.start()
+
+    # ارسال رویدادهای outbox به sinkهای تنظیم‌شده
+    await outbox_relay.start()
+
     yield
 
     # Shutdown
     logger.info("👋 Shutting down Basij Management System...")
+    await outbox_relay.stop()
+    await audit_sink.stop()
+    export_jobs.shutdown()
 
 async def create_default_roles():
     """ایجاد نقش‌های پیش‌فرض سیستم."""
     from app.core.database import SessionLocal
     from app.models.role import Role
+    from app.services.permission_service import ensure_permissions_initialized
 
     db = SessionLocal()
     try:
@@ -77,8 +90,7 @@ async def create_default_roles():
                 logger.info(f"ℹ️ Role already exists: {role_name}")
 
         db.commit()
-
-
+        ensure_permissions_initialized(db)
 
     except SQLAlchemyError:
         db.rollback()
@@ -330,7 +342,8 @@ async def health_check():
         "status": "healthy",
         "timestamp": time.time(),
         "service": "basij-management-system",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "audit_sink": audit_sink.stats(),
     }
 
 
@@ -348,6 +361,7 @@ app.include_router(admin_auth.router)
 app.include_router(admin_dashboard.router)
 app.include_router(ui_dashboard.router)
 app.include_router(admin_audit.router)
+app.include_router(admin_api.router)
 
 
 from fastapi.openapi.docs import (
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.audit_log import _utc_now
+
+
+class AuditArchive(Base):
+    """
+    فهرست فایل‌های آرشیو لاگ‌های ممیزی.
+
+    هر ردیف یک فایل فشرده NDJSON (gzip) است که لاگ‌های یک ماه را به ترتیب
+    جدیدترین اول نگه می‌دارد. فایل‌ها فقط نوشته می‌شوند و تغییر نمی‌کنند؛ اگر
+    بعداً لاگ دیگری از همان ماه آرشیو شود، فایل جدیدی (part بعدی) ساخته می‌شود.
+    """
+    __tablename__ = "audit_archives"
+
+    id = Column(Integer, primary_key=True, index=True)
+    period = Column(String(7), nullable=False, index=True, comment="ماه آرشیو به شکل YYYY-MM")
+    path = Column(String(500), nullable=False, unique=True, comment="مسیر فایل gzip آرشیو")
+    row_count = Column(Integer, nullable=False, default=0)
+    first_created_at = Column(DateTime, nullable=False, comment="قدیمی‌ترین لاگ فایل")
+    last_created_at = Column(DateTime, nullable=False, comment="جدیدترین لاگ فایل")
+    created_at = Column(DateTime, default=_utc_now, nullable=False)
+
+    counts = relationship("AuditArchiveCount", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<AuditArchive(period='{self.period}', rows={self.row_count}, path='{self.path}')>"
+
+
+class AuditArchiveCount(Base):
+    """
+    تعداد لاگ‌های هر فایل آرشیو به تفکیک (action، user_id).
+
+    شمارش آرشیو با فیلتر action یا کاربر از همین جدول خوانده می‌شود و فقط
+    فایل‌هایی که بخشی از آن‌ها در بازه زمانی است باز می‌شوند.
+    """
+    __tablename__ = "audit_archive_counts"
+    __table_args__ = (
+        Index("ix_audit_archive_counts_archive_action_user", "archive_id", "action", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    archive_id = Column(Integer, ForeignKey("audit_archives.id", ondelete="CASCADE"), nullable=False)
+    action = Column(String(50), nullable=False)
+    user_id = Column(Integer, nullable=True)
+    count = Column(Integer, nullable=False)
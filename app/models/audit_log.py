@@ -1,11 +1,22 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from app.core.database import Base
 
 
+def _utc_now() -> datetime:
+    """زمان جاری UTC؛ برای هر ردیف جداگانه محاسبه می‌شود."""
+    return datetime.now(timezone.utc)
+
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        # ایندکس‌ها برای فیلتر و مرتب‌سازی بر اساس created_at (جدیدترین اول)
+        Index("ix_audit_logs_created_at", "created_at"),
+        Index("ix_audit_logs_action_created_at", "action", "created_at"),
+        Index("ix_audit_logs_user_id_created_at", "user_id", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -17,7 +28,7 @@ class AuditLog(Base):
 
     description = Column(String(255), nullable=True, comment="توضیحات مربوط به عملیات")
     ip_address = Column(String(45), nullable=True, comment="آدرس IP کاربر که عملیات را انجام داده")
-    created_at = Column(DateTime, default=datetime.now(timezone.utc), comment="زمان ایجاد لاگ")
+    created_at = Column(DateTime, default=_utc_now, nullable=False, comment="زمان ایجاد لاگ")
 
     # ارتباط با مدل User
     user = relationship("User", back_populates="audit_logs")  # اگر در مدل User از back_populates استفاده شده باشد
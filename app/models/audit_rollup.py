@@ -0,0 +1,77 @@
+from sqlalchemy import Column, Integer, String, event, inspect, text
+from app.core.database import Base
+
+
+class AuditRollup(Base):
+    """
+    تعداد لاگ‌های ممیزی به تفکیک بازه زمانی (ساعت/روز) و یک بُعد (action، entity یا user).
+
+    ردیف‌ها با trigger هنگام درج هر لاگ افزایش پیدا می‌کنند تا نمودارهای داشبورد
+    بدون اسکن audit_logs ساخته شوند. آرشیو کردن لاگ‌ها این تعدادها را تغییر نمی‌دهد.
+
+    bucket:
+        hour: 'YYYY-MM-DD HH:00'
+        day:  'YYYY-MM-DD'
+    """
+    __tablename__ = "audit_rollups"
+
+    # ترتیب کلید اصلی برای جستجوی بازه‌ای روی bucket در یک granularity/dimension
+    granularity = Column(String(4), primary_key=True)
+    dimension = Column(String(10), primary_key=True)
+    bucket = Column(String(16), primary_key=True)
+    key = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<AuditRollup({self.granularity} {self.bucket} {self.dimension}={self.key}: {self.count})>"
+
+
+# granularity -> عبارت SQLite ساخت bucket از created_at
+ROLLUP_BUCKETS = {
+    "hour": "strftime('%Y-%m-%d %H:00', {column})",
+    "day": "strftime('%Y-%m-%d', {column})",
+}
+
+# dimension -> ستون audit_logs
+ROLLUP_DIMENSIONS = {
+    "action": "action",
+    "entity": "entity",
+    "user": "user_id",
+}
+
+
+def _rollup_upserts() -> str:
+    statements = []
+    for granularity, bucket_sql in ROLLUP_BUCKETS.items():
+        for dimension, column in ROLLUP_DIMENSIONS.items():
+            statements.append(
+                "INSERT INTO audit_rollups (granularity, dimension, bucket, key, count) "
+                f"VALUES ('{granularity}', '{dimension}', {bucket_sql.format(column='NEW.created_at')}, "
+                f"IFNULL(NEW.{column}, ''), 1) "
+                "ON CONFLICT(granularity, dimension, bucket, key) DO UPDATE SET count = audit_rollups.count + 1;"
+            )
+    return "\n".join(statements)
+
+
+ROLLUP_TRIGGER = ("trg_rollups_audit_logs_insert", f"""
+    AFTER INSERT ON audit_logs BEGIN
+        {_rollup_upserts()}
+    END""")
+
+
+def install_rollup_triggers(connection) -> None:
+    """ایجاد trigger به‌روزرسانی rollupها (فقط SQLite)."""
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if not {"audit_logs", "audit_rollups"} <= existing_tables:
+        return
+
+    trigger_name, body = ROLLUP_TRIGGER
+    connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {body}"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_rollup_triggers(target, connection, **kw):
+    install_rollup_triggers(connection)
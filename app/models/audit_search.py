@@ -0,0 +1,74 @@
+import logging
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+# ایندکس FTS5 با محتوای خارجی؛ متن فقط در audit_logs نگهداری می‌شود و
+# audit_logs_fts فقط ایندکس معکوس (rowid = audit_logs.id) را دارد.
+AUDIT_SEARCH_TABLE = "audit_logs_fts"
+
+AUDIT_SEARCH_DDL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {AUDIT_SEARCH_TABLE} USING fts5(
+        description, action, entity,
+        content='audit_logs', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )"""
+
+_INDEX_NEW = (
+    f"INSERT INTO {AUDIT_SEARCH_TABLE} (rowid, description, action, entity) "
+    "VALUES (NEW.id, NEW.description, NEW.action, NEW.entity);"
+)
+_INDEX_OLD = (
+    f"INSERT INTO {AUDIT_SEARCH_TABLE} ({AUDIT_SEARCH_TABLE}, rowid, description, action, entity) "
+    "VALUES ('delete', OLD.id, OLD.description, OLD.action, OLD.entity);"
+)
+
+AUDIT_SEARCH_TRIGGERS = [
+    ("trg_audit_logs_fts_insert", f"""
+        AFTER INSERT ON audit_logs BEGIN
+            {_INDEX_NEW}
+        END"""),
+    ("trg_audit_logs_fts_delete", f"""
+        AFTER DELETE ON audit_logs BEGIN
+            {_INDEX_OLD}
+        END"""),
+    ("trg_audit_logs_fts_update", f"""
+        AFTER UPDATE OF description, action, entity ON audit_logs BEGIN
+            {_INDEX_OLD}
+            {_INDEX_NEW}
+        END"""),
+]
+
+
+def install_audit_search(connection) -> None:
+    """
+    ایجاد جدول FTS5 و triggerهای همگام‌سازی آن با audit_logs (فقط SQLite).
+
+    اگر جدول FTS تازه ساخته شود، ایندکس از روی لاگ‌های موجود بازسازی می‌شود.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if "audit_logs" not in existing_tables:
+        return
+
+    try:
+        connection.execute(text(AUDIT_SEARCH_DDL))
+    except OperationalError:
+        logger.warning("SQLite FTS5 is not available; audit log search is disabled")
+        return
+
+    for trigger_name, body in AUDIT_SEARCH_TRIGGERS:
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {body}"))
+
+    if AUDIT_SEARCH_TABLE not in existing_tables:
+        connection.execute(text(f"INSERT INTO {AUDIT_SEARCH_TABLE} ({AUDIT_SEARCH_TABLE}) VALUES ('rebuild')"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_audit_search(target, connection, **kw):
+    install_audit_search(connection)
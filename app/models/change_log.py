@@ -0,0 +1,94 @@
+from sqlalchemy import Column, DateTime, Integer, String, event, inspect, text
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class ChangeLog(Base):
+    """
+    دنباله تغییرات کاربران و پروفایل‌ها برای همگام‌سازی افزایشی سیستم‌های بیرونی.
+
+    هر درج/ویرایش/حذف با trigger یک ردیف با seq صعودی ثبت می‌کند؛ برخلاف updated_at
+    دو تغییر هم‌زمان seq یکسان ندارند و حذف‌ها هم اثر می‌گذارند.
+    ردیف‌های قدیمی با compact_change_log (CHANGE_LOG_RETENTION_DAYS) به آخرین تغییر
+    هر ردیف خلاصه می‌شوند.
+
+    entity: user | student_profile
+    operation: insert | update | delete
+    """
+    __tablename__ = "change_log"
+    # AUTOINCREMENT: seq حذف‌شده دوباره استفاده نمی‌شود
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    seq = Column(Integer, primary_key=True)
+    entity = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    operation = Column(String(6), nullable=False)
+    changed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self):
+        return f"<ChangeLog(seq={self.seq}, {self.operation} {self.entity}:{self.entity_id})>"
+
+
+# جدول -> نام entity در change_log
+CHANGE_LOG_TABLES = {
+    "users": "user",
+    "student_profiles": "student_profile",
+}
+
+
+def _change_log_triggers(table_name: str, entity: str):
+    def record(operation: str, row: str) -> str:
+        return (
+            "INSERT INTO change_log (entity, entity_id, operation) "
+            f"VALUES ('{entity}', {row}.id, '{operation}');"
+        )
+
+    return [
+        (f"trg_change_log_{table_name}_insert", f"""
+            AFTER INSERT ON {table_name} BEGIN
+                {record("insert", "NEW")}
+            END"""),
+        (f"trg_change_log_{table_name}_update", f"""
+            AFTER UPDATE ON {table_name} BEGIN
+                {record("update", "NEW")}
+            END"""),
+        (f"trg_change_log_{table_name}_delete", f"""
+            AFTER DELETE ON {table_name} BEGIN
+                {record("delete", "OLD")}
+            END"""),
+    ]
+
+
+def install_change_log_triggers(connection) -> None:
+    """
+    ایجاد triggerهای change_log (فقط SQLite).
+
+    اگر triggerهای یک جدول تازه ساخته شوند، ردیف‌های موجود آن جدول یک بار به عنوان
+    insert ثبت می‌شوند تا مصرف‌کننده‌ای که از ابتدا همگام می‌شود چیزی را از دست ندهد.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if "change_log" not in existing_tables:
+        return
+
+    existing_triggers = {
+        row[0] for row in connection.execute(text("SELECT name FROM sqlite_master WHERE type = 'trigger'"))
+    }
+    for table_name, entity in CHANGE_LOG_TABLES.items():
+        if table_name not in existing_tables:
+            continue
+        triggers = _change_log_triggers(table_name, entity)
+        if triggers[0][0] not in existing_triggers:
+            connection.execute(text(
+                "INSERT INTO change_log (entity, entity_id, operation) "
+                f"SELECT '{entity}', id, 'insert' FROM {table_name} ORDER BY id"
+            ))
+        for trigger_name, body in triggers:
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {body}"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_change_log_triggers(target, connection, **kw):
+    install_change_log_triggers(connection)
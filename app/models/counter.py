@@ -0,0 +1,122 @@
+from sqlalchemy import Column, Integer, String, event, inspect, text
+from app.core.database import Base
+
+
+class Counter(Base):
+    """
+    شمارنده‌های نگهداری‌شده (مثل تعداد کل لاگ‌ها یا کاربران هر نقش).
+
+    مقادیر توسط triggerهای SQLite به صورت افزایشی به‌روز می‌شوند تا داشبورد
+    به‌جای COUNT(*) روی کل جدول، فقط یک ردیف بخواند.
+
+    نام‌ها:
+        audit_logs.total, audit_logs.action:<action>
+        users.total, users.role:<role_id>
+        roles.total
+        student_profiles.total, student_profiles.gender:<gender>
+    """
+    __tablename__ = "counters"
+
+    name = Column(String(100), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<Counter(name='{self.name}', value={self.value})>"
+
+
+def _bump(name_sql: str, delta: int) -> str:
+    return (
+        f"INSERT INTO counters (name, value) VALUES ({name_sql}, {delta}) "
+        "ON CONFLICT(name) DO UPDATE SET value = counters.value + excluded.value;"
+    )
+
+
+def _keyed(prefix: str, column_sql: str) -> str:
+    return f"'{prefix}' || IFNULL({column_sql}, '')"
+
+
+# جدول -> لیست (نام trigger, بدنه DDL)
+COUNTER_TRIGGERS = {
+    "audit_logs": [
+        ("trg_counters_audit_logs_insert", f"""
+            AFTER INSERT ON audit_logs BEGIN
+                {_bump("'audit_logs.total'", 1)}
+                {_bump(_keyed("audit_logs.action:", "NEW.action"), 1)}
+            END"""),
+        ("trg_counters_audit_logs_delete", f"""
+            AFTER DELETE ON audit_logs BEGIN
+                {_bump("'audit_logs.total'", -1)}
+                {_bump(_keyed("audit_logs.action:", "OLD.action"), -1)}
+            END"""),
+        ("trg_counters_audit_logs_update", f"""
+            AFTER UPDATE OF action ON audit_logs WHEN OLD.action IS NOT NEW.action BEGIN
+                {_bump(_keyed("audit_logs.action:", "OLD.action"), -1)}
+                {_bump(_keyed("audit_logs.action:", "NEW.action"), 1)}
+            END"""),
+    ],
+    "users": [
+        ("trg_counters_users_insert", f"""
+            AFTER INSERT ON users BEGIN
+                {_bump("'users.total'", 1)}
+                {_bump(_keyed("users.role:", "NEW.role_id"), 1)}
+            END"""),
+        ("trg_counters_users_delete", f"""
+            AFTER DELETE ON users BEGIN
+                {_bump("'users.total'", -1)}
+                {_bump(_keyed("users.role:", "OLD.role_id"), -1)}
+            END"""),
+        ("trg_counters_users_update", f"""
+            AFTER UPDATE OF role_id ON users WHEN OLD.role_id IS NOT NEW.role_id BEGIN
+                {_bump(_keyed("users.role:", "OLD.role_id"), -1)}
+                {_bump(_keyed("users.role:", "NEW.role_id"), 1)}
+            END"""),
+    ],
+    "roles": [
+        ("trg_counters_roles_insert", f"""
+            AFTER INSERT ON roles BEGIN
+                {_bump("'roles.total'", 1)}
+            END"""),
+        ("trg_counters_roles_delete", f"""
+            AFTER DELETE ON roles BEGIN
+                {_bump("'roles.total'", -1)}
+            END"""),
+    ],
+    "student_profiles": [
+        ("trg_counters_student_profiles_insert", f"""
+            AFTER INSERT ON student_profiles BEGIN
+                {_bump("'student_profiles.total'", 1)}
+                {_bump(_keyed("student_profiles.gender:", "NEW.gender"), 1)}
+            END"""),
+        ("trg_counters_student_profiles_delete", f"""
+            AFTER DELETE ON student_profiles BEGIN
+                {_bump("'student_profiles.total'", -1)}
+                {_bump(_keyed("student_profiles.gender:", "OLD.gender"), -1)}
+            END"""),
+        ("trg_counters_student_profiles_update", f"""
+            AFTER UPDATE OF gender ON student_profiles WHEN OLD.gender IS NOT NEW.gender BEGIN
+                {_bump(_keyed("student_profiles.gender:", "OLD.gender"), -1)}
+                {_bump(_keyed("student_profiles.gender:", "NEW.gender"), 1)}
+            END"""),
+    ],
+}
+
+
+def install_counter_triggers(connection) -> None:
+    """ایجاد triggerهای شمارنده برای جداولی که در دیتابیس وجود دارند."""
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if "counters" not in existing_tables:
+        return
+
+    for table_name, triggers in COUNTER_TRIGGERS.items():
+        if table_name not in existing_tables:
+            continue
+        for trigger_name, body in triggers:
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {body}"))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_counter_triggers(target, connection, **kw):
+    install_counter_triggers(connection)
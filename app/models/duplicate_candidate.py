@@ -0,0 +1,37 @@
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, Integer, String, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+from app.models.audit_log import _utc_now
+
+
+class DuplicateCandidate(Base):
+    """
+    جفت پروفایل‌هایی که احتمالاً متعلق به یک نفرند (خروجی job تشخیص تکرار).
+
+    هر جفت با profile_id_a < profile_id_b فقط یک بار ذخیره می‌شود؛ وضعیت بررسی
+    (pending/confirmed/dismissed) در اجراهای بعدی job حفظ می‌شود.
+    """
+    __tablename__ = "duplicate_candidates"
+    __table_args__ = (
+        UniqueConstraint("profile_id_a", "profile_id_b", name="uq_duplicate_candidates_pair"),
+        # صفحه بررسی: جفت‌های در انتظار به ترتیب امتیاز
+        Index("ix_duplicate_candidates_status_score", "status", "score"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    profile_id_a = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
+    profile_id_b = Column(Integer, ForeignKey("student_profiles.id"), nullable=False)
+    score = Column(Float, nullable=False)
+    reasons = Column(String(100), nullable=False, comment="مثلاً name,phone")
+    status = Column(String(20), nullable=False, default="pending")
+    created_at = Column(DateTime, default=_utc_now, nullable=False)
+    reviewed_at = Column(DateTime, nullable=True)
+
+    profile_a = relationship("StudentProfile", foreign_keys=[profile_id_a])
+    profile_b = relationship("StudentProfile", foreign_keys=[profile_id_b])
+
+    def __repr__(self):
+        return (
+            f"<DuplicateCandidate(id={self.id}, pair=({self.profile_id_a}, {self.profile_id_b}), "
+            f"score={self.score}, status='{self.status}')>"
+        )
@@ -0,0 +1,48 @@
+import json
+
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from app.core.database import Base
+from app.models.audit_log import _utc_now
+
+
+class OutboxEvent(Base):
+    """
+    رویدادهای دامنه (ثبت‌نام، ویرایش پروفایل) برای ارسال به سیستم‌های بیرونی.
+
+    ردیف در همان تراکنشی نوشته می‌شود که تغییر اصلی را commit می‌کند؛ پس یا هر
+    دو ثبت می‌شوند یا هیچ‌کدام. relay ردیف‌های delivered_at=NULL را به ترتیب id
+    ارسال می‌کند و با فاصله‌های افزایشی دوباره تلاش می‌کند (حداقل یک بار)؛ رویدادی
+    که بعد از OUTBOX_MAX_ATTEMPTS تلاش پذیرفته نشود failed_at می‌گیرد و کنار گذاشته می‌شود.
+    """
+    __tablename__ = "outbox_events"
+    __table_args__ = (
+        # پیدا کردن رویدادهای ارسال‌نشده به ترتیب id
+        Index("ix_outbox_events_delivered_at_id", "delivered_at", "id"),
+        # AUTOINCREMENT: id برای مصرف‌کنندگان long-poll نقش cursor دارد و نباید تکرار شود
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    event_type = Column(String(50), nullable=False, comment="مثلاً user.registered")
+    aggregate = Column(String(30), nullable=False, comment="نوع موجودیت")
+    aggregate_id = Column(Integer, nullable=False, comment="شناسه موجودیت")
+    payload = Column(Text, nullable=False, comment="داده رویداد به صورت JSON")
+    created_at = Column(DateTime, default=_utc_now, nullable=False)
+    delivered_at = Column(DateTime, nullable=True, comment="زمان ارسال موفق به همه sinkها")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True, comment="زودترین زمان تلاش دوباره پس از خطا")
+    failed_at = Column(DateTime, nullable=True, comment="کنار گذاشته شده پس از آخرین تلاش ناموفق")
+
+    def __repr__(self):
+        return f"<OutboxEvent(id={self.id}, type='{self.event_type}', delivered={self.delivered_at is not None})>"
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "type": self.event_type,
+            "aggregate": self.aggregate,
+            "aggregate_id": self.aggregate_id,
+            "payload": json.loads(self.payload),
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
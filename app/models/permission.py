@@ -0,0 +1,28 @@
+from sqlalchemy import Column, ForeignKey, Integer, String, Table, Text
+from app.core.database import Base
+
+# جدول واسط نقش‌ها و دسترسی‌ها
+role_permissions = Table(
+    "role_permissions",
+    Base.metadata,
+    Column("role_id", Integer, ForeignKey("roles.id", ondelete="CASCADE"), primary_key=True),
+    Column("permission_id", Integer, ForeignKey("permissions.id", ondelete="CASCADE"), primary_key=True),
+)
+
+
+class Permission(Base):
+    """
+    یک دسترسی سیستم (مثلاً manage_users).
+
+    هر دسترسی یک بیت یکتا دارد؛ مجموعه دسترسی‌های هر نقش به صورت یک عدد
+    (bitset) در cache نگه داشته می‌شود و بررسی دسترسی فقط یک AND بیتی است.
+    """
+    __tablename__ = "permissions"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(50), unique=True, nullable=False)
+    bit = Column(Integer, unique=True, nullable=False, comment="شماره بیت در bitset نقش")
+    description = Column(Text, nullable=True)
+
+    def __repr__(self):
+        return f"<Permission(id={self.id}, name='{self.name}', bit={self.bit})>"
@@ -2,6 +2,7 @@
 from sqlalchemy import Column, Integer, String, Text
 from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.models.permission import role_permissions
 
 
 class Role(Base):
@@ -13,6 +14,7 @@ class Role(Base):
         name: نام نقش (مانند: user, admin)
         description: توضیحات نقش (اختیاری)
         users: لیست کاربرانی که این نقش را دارند
+        permissions: دسترسی‌های این نقش
     """
     __tablename__ = "roles"
 
@@ -22,6 +24,7 @@ class Role(Base):
 
     # رابطه با کاربران
     users = relationship("User", back_populates="role", cascade="all, delete-orphan")
+    permissions = relationship("Permission", secondary=role_permissions)
 
     def __repr__(self):
         return f"<Role(id={self.id}, name='{self.name}')>"
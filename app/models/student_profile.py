@@ -1,16 +1,36 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Text, DateTime, Boolean, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.core.database import Base
+from app.core.validators import normalize_digits, normalize_persian_text
 from fastapi import HTTPException
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional, Tuple
 
 if TYPE_CHECKING:
      from app.models.user import User
 
+# ساختار شماره دانشجویی: ۳ رقم سال ورود (۴۰۱ = ۱۴۰۱) و سپس ۲ رقم کد دانشکده
+STUDENT_NUMBER_YEAR_DIGITS = 3
+STUDENT_NUMBER_FACULTY_DIGITS = 2
+
+
+def parse_student_number_cohort(student_number) -> Tuple[Optional[int], Optional[str]]:
+    """سال ورود (شمسی) و کد دانشکده از ارقام ابتدایی شماره دانشجویی؛ برای شماره نامعتبر (None, None)."""
+    digits = normalize_digits(student_number) or ""
+    prefix = digits[:STUDENT_NUMBER_YEAR_DIGITS + STUDENT_NUMBER_FACULTY_DIGITS]
+    if len(prefix) < STUDENT_NUMBER_YEAR_DIGITS + STUDENT_NUMBER_FACULTY_DIGITS or not prefix.isdigit():
+        return None, None
+    return 1000 + int(prefix[:STUDENT_NUMBER_YEAR_DIGITS]), prefix[STUDENT_NUMBER_YEAR_DIGITS:]
+
 
 class StudentProfile(Base):
     __tablename__ = "student_profiles"
+    __table_args__ = (
+        # آمار ثبت‌نام روزانه و قیف احراز هویت فقط از همین ایندکس خوانده می‌شود
+        Index("ix_student_profiles_created_at_authenticated", "created_at", "has_authenticated"),
+        # گزارش‌های ورودی (cohort) فقط از همین ایندکس خوانده می‌شوند
+        Index("ix_student_profiles_cohort", "entry_year", "faculty_code", "gender", "has_authenticated"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), unique=True, nullable=False)
@@ -26,13 +46,31 @@ class StudentProfile(Base):
     additional_info = Column(Text, nullable=True)  # اطلاعات اضافی
     has_authenticated = Column(Boolean, default=False, nullable=False)
 
+    # مشتق از شماره دانشجویی (با @validates پر می‌شود)
+    entry_year = Column(Integer, nullable=True)
+    faculty_code = Column(String(STUDENT_NUMBER_FACULTY_DIGITS), nullable=True)
+
+    # نام کامل نرمال‌شده برای ایندکس جستجو (با @validates پر می‌شود)
+    search_name = Column(String(101), nullable=True)
+
     # timestamp‌ها
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
 
     # رابطه
     user = relationship("User", back_populates="profile")
 
+    @validates("student_number")
+    def _derive_cohort(self, key, value):
+        self.entry_year, self.faculty_code = parse_student_number_cohort(value)
+        return value
+
+    @validates("first_name", "last_name")
+    def _derive_search_name(self, key, value):
+        names = {"first_name": self.first_name, "last_name": self.last_name, key: value}
+        self.search_name = normalize_persian_text(f"{names['first_name'] or ''} {names['last_name'] or ''}")
+        return value
+
     def __repr__(self):
         return f"<StudentProfile(id={self.id}, user_id={self.user_id}, national_code='{self.national_code}')>"
 
@@ -50,6 +88,8 @@ class StudentProfile(Base):
             "address": self.address,
             "additional_info": self.additional_info,
             "has_authenticated": self.has_authenticated,
+            "entry_year": self.entry_year,
+            "faculty_code": self.faculty_code,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
         }
@@ -0,0 +1,103 @@
+import logging
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.exc import OperationalError
+from app.core.database import Base
+
+logger = logging.getLogger(__name__)
+
+# ایندکس FTS5 نام دانشجویان؛ متن نرمال‌شده (ستون search_name پروفایل) در خود جدول
+# نگهداری می‌شود و rowid برابر student_profiles.id است.
+STUDENT_SEARCH_TABLE = "student_profiles_fts"
+
+# نسخه قبلی triggerها این تابع پایتونی را صدا می‌زد و نوشتن با sqlite3 خام خطا می‌داد
+LEGACY_NORMALIZE_FUNCTION = "normalize_fa"
+
+STUDENT_SEARCH_DDL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {STUDENT_SEARCH_TABLE} USING fts5(
+        name,
+        tokenize='unicode61 remove_diacritics 2'
+    )"""
+
+# triggerها فقط SQL ساده‌اند؛ search_name را hook مدل پر می‌کند و برای ردیف‌هایی که
+# بیرون از ORM نوشته شده‌اند (sqlite3 CLI، اسکریپت‌ها) نام خام ایندکس می‌شود
+_RAW_NAME_SQL = "{row}.first_name || ' ' || {row}.last_name"
+_NAME_SQL = f"COALESCE({{row}}.search_name, {_RAW_NAME_SQL})"
+# نامی که بدون search_name تازه تغییر کرده باشد، search_name قدیمی دیگر معتبر نیست
+_UPDATED_NAME_SQL = f"""CASE
+    WHEN NEW.search_name IS NOT OLD.search_name
+        OR (NEW.first_name IS OLD.first_name AND NEW.last_name IS OLD.last_name)
+    THEN {_NAME_SQL.format(row='NEW')}
+    ELSE {_RAW_NAME_SQL.format(row='NEW')}
+END"""
+_INDEX_NEW = (
+    f"INSERT INTO {STUDENT_SEARCH_TABLE} (rowid, name) VALUES (NEW.id, {_NAME_SQL.format(row='NEW')});"
+)
+_REINDEX_NEW = (
+    f"INSERT INTO {STUDENT_SEARCH_TABLE} (rowid, name) VALUES (NEW.id, {_UPDATED_NAME_SQL});"
+)
+_REMOVE_OLD = f"DELETE FROM {STUDENT_SEARCH_TABLE} WHERE rowid = OLD.id;"
+
+STUDENT_SEARCH_TRIGGERS = [
+    ("trg_student_profiles_fts_insert", f"""
+        AFTER INSERT ON student_profiles BEGIN
+            {_INDEX_NEW}
+        END"""),
+    ("trg_student_profiles_fts_delete", f"""
+        AFTER DELETE ON student_profiles BEGIN
+            {_REMOVE_OLD}
+        END"""),
+    ("trg_student_profiles_fts_update", f"""
+        AFTER UPDATE OF first_name, last_name, search_name ON student_profiles BEGIN
+            {_REMOVE_OLD}
+            {_REINDEX_NEW}
+        END"""),
+]
+
+
+def install_student_search(connection) -> None:
+    """
+    ایجاد جدول FTS5 نام دانشجویان و triggerهای همگام‌سازی آن (فقط SQLite).
+
+    اگر جدول FTS تازه ساخته شود، ایندکس از روی پروفایل‌های موجود پر می‌شود.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+
+    existing_tables = set(inspect(connection).get_table_names())
+    if "student_profiles" not in existing_tables:
+        return
+
+    columns = {column["name"] for column in inspect(connection).get_columns("student_profiles")}
+    if "search_name" not in columns:
+        # ensure_student_profiles_schema ستون را اضافه می‌کند؛ تا آن موقع ایندکس ساخته نمی‌شود
+        return
+
+    try:
+        connection.execute(text(STUDENT_SEARCH_DDL))
+    except OperationalError:
+        logger.warning("SQLite FTS5 is not available; student search is disabled")
+        return
+
+    legacy_triggers = [
+        row[0] for row in connection.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND sql LIKE :pattern"),
+            {"pattern": f"%{LEGACY_NORMALIZE_FUNCTION}(%"},
+        )
+    ]
+    for trigger_name in legacy_triggers:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger_name}"))
+
+    for trigger_name, body in STUDENT_SEARCH_TRIGGERS:
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {trigger_name} {body}"))
+
+    if STUDENT_SEARCH_TABLE not in existing_tables:
+        connection.execute(text(
+            f"INSERT INTO {STUDENT_SEARCH_TABLE} (rowid, name) "
+            f"SELECT id, {_NAME_SQL.format(row='student_profiles')} FROM student_profiles"
+        ))
+
+
+@event.listens_for(Base.metadata, "after_create")
+def _create_student_search(target, connection, **kw):
+    install_student_search(connection)
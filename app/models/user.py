@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Index
+from sqlalchemy.orm import object_session, relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 from fastapi import HTTPException
@@ -20,8 +20,8 @@ class User(Base):
     hashed_password = Column(String(255), nullable=False)
     role_id = Column(Integer, ForeignKey("roles.id"), nullable=False, default=1)  # default=user
     is_active = Column(Boolean, default=True, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
     role = relationship("Role", back_populates="users")
     profile = relationship("StudentProfile", back_populates="user", uselist=False, cascade="all, delete-orphan")
     audit_logs = relationship("AuditLog", back_populates="user")
@@ -47,10 +47,13 @@ class User(Base):
 
         if include_profile and self.profile:
             data["profile"] = {
+                "first_name": self.profile.first_name,
+                "last_name": self.profile.last_name,
                 "national_code": self.profile.national_code,
                 "phone_number": self.profile.phone_number,
                 "gender": self.profile.gender,
-                "address": self.profile.address
+                "address": self.profile.address,
+                "has_authenticated": self.profile.has_authenticated,
             }
 
         return data
@@ -66,13 +69,10 @@ class User(Base):
         return self.role and self.role.name == "moderator"
 
     def can(self, permission: str) -> bool:
-        permissions_map = {
-            "admin": ["create", "read", "update", "delete", "manage_users"],
-            "moderator": ["create", "read", "update"],
-            "user": ["read"]
-        }
+        """بررسی دسترسی از روی bitset نقش در cache (بدون بارگذاری role)."""
+        from app.services.permission_service import role_has_permission
 
-        return permission in permissions_map.get(self.role.name, [])
+        return role_has_permission(object_session(self), self.role_id, permission)
 
     @classmethod
     def create_simple_user(cls, student_number: str, password: str, db_session, role_name="user"):
@@ -119,3 +119,7 @@ class User(Base):
                 status_code=400,
                 detail="کد ملی یا شماره دانشجویی تکراری است"
             )
+
+
+# ایندکس عبارتی برای صفحه‌بندی فهرست کاربران بر اساس زمان ثبت (USER_SORT_KEYS در user_service)
+Index("ix_users_created_at_sort", func.strftime("%Y-%m-%d %H:%M:%f", User.created_at))
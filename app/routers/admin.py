@@ -1,9 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException
+import os
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 from app.core.deps import get_db
 from app.core.security import get_current_admin
-from app.schemas.student import StudentProfileOut, AdminStudentUpdate
-from app.services import user_service
+from app.models.user import User
+from app.schemas.student import GenderEnum, StudentProfileOut, AdminStudentUpdate
+from app.schemas.user import BulkRoleUpdate, BulkUserSelection
+from app.services import permission_service, user_service
+from app.core.confing import settings
+from app.services.change_feed_service import get_student_changes
+from app.services.outbox_service import get_failed_outbox_events, poll_outbox_events
+from app.services.export_service import spool_xlsx, stream_export_response
+from app.services.student_service import (
+    iter_student_export_rows,
+    parse_student_export_fields,
+    student_export_header,
+)
 from app.services.user_service import _check_uniqueness  # import صحیح تابع
 
 router = APIRouter(
@@ -16,15 +31,73 @@ router = APIRouter(
 def list_students(db: Session = Depends(get_db)):
     return user_service.get_all_students(db)
 
+# باید قبل از /students/{student_id} تعریف شود تا «export» شناسه تلقی نشود
+@router.get("/students/export")
+def export_students(
+        request: Request,
+        db: Session = Depends(get_db),
+        format: str = Query("csv", regex="^(csv|xlsx|ndjson)$"),
+        columns: str | None = Query(None, description="ستون‌های خروجی با کاما، مثلاً student_number,gender"),
+        gender: GenderEnum | None = Query(None),
+        has_authenticated: bool | None = Query(None),
+        student_number_prefix: str | None = Query(None, max_length=20),
+        created_from: datetime | None = Query(None),
+        created_to: datetime | None = Query(None),
+        compress: bool = Query(False, description="خروجی فشرده gzip برای csv و ndjson"),
+):
+    """خروجی جریانی فهرست دانشجویان به صورت CSV، NDJSON یا Excel."""
+    fields = parse_student_export_fields(columns)
+    rows = iter_student_export_rows(
+        db,
+        fields=fields,
+        gender=gender.value if gender else None,
+        has_authenticated=has_authenticated,
+        student_number_prefix=student_number_prefix,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
+    if format != "xlsx":
+        return stream_export_response(
+            request, format, fields, student_export_header(fields), rows, "students", gzip_file=compress,
+        )
+
+    try:
+        import openpyxl  # noqa: F401
+    except ModuleNotFoundError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Excel export نیازمند نصب openpyxl است. دستور: pip install -r app/requirements.txt",
+        ) from exc
+
+    path = spool_xlsx(student_export_header(fields), rows, sheet_title="Students")
+    return FileResponse(
+        path,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        filename="students.xlsx",
+        background=BackgroundTask(os.remove, path),
+    )
+
+@router.get("/students/changes")
+def list_student_changes(
+        since: str | None = Query(None, description="next_cursor پاسخ قبلی؛ بدون آن از ابتدا"),
+        limit: int = Query(500, ge=1, le=5000),
+        db: Session = Depends(get_db),
+):
+    """تغییرات کاربران و پروفایل‌ها بعد از cursor برای همگام‌سازی افزایشی."""
+    return get_student_changes(db, since=since, limit=limit)
+
 @router.get("/students/{student_id}", response_model=StudentProfileOut)
 def get_student(student_id: int, db: Session = Depends(get_db)):
     return user_service.get_student_by_id(db, student_id)
 
 @router.put("/students/{student_id}", response_model=StudentProfileOut)
 def update_student(
+        request: Request,
         student_id: int,
         data: AdminStudentUpdate,
         db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
 ):
     # چک کردن تکراری بودن شماره دانشجویی و کد ملی
     _check_uniqueness(
@@ -34,5 +107,105 @@ def update_student(
         exclude_user_id=student_id
     )
 
-    return user_service.admin_update_student(db, student_id, data)
+    return user_service.admin_update_student(
+        db, student_id, data, request=request, actor=current_admin
+    )
+
+
+# ---------------- عملیات گروهی (یک UPDATE و یک لاگ خلاصه) ----------------
+
+@router.post("/users/bulk/activate")
+def bulk_activate_users(
+        request: Request,
+        selection: BulkUserSelection,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    return user_service.bulk_set_users_active(db, selection, True, request=request, actor=current_admin)
+
+
+@router.post("/users/bulk/deactivate")
+def bulk_deactivate_users(
+        request: Request,
+        selection: BulkUserSelection,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    return user_service.bulk_set_users_active(db, selection, False, request=request, actor=current_admin)
+
+
+@router.post("/users/bulk/role")
+def bulk_change_user_role(
+        request: Request,
+        data: BulkRoleUpdate,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    return user_service.bulk_change_role(db, data, data.role, request=request, actor=current_admin)
+
+
+@router.post("/users/bulk/reset-authentication")
+def bulk_reset_authentication(
+        request: Request,
+        selection: BulkUserSelection,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    return user_service.bulk_reset_authentication(db, selection, request=request, actor=current_admin)
+
+
+# ---------------- دسترسی‌های نقش‌ها ----------------
+
+@router.get("/roles/{role_id}/permissions")
+def list_role_permissions(role_id: int, db: Session = Depends(get_db)):
+    return {"role_id": role_id, "permissions": permission_service.get_role_permissions(db, role_id)}
+
+
+@router.put("/roles/{role_id}/permissions/{permission_name}")
+def grant_role_permission(
+        role_id: int,
+        permission_name: str,
+        request: Request,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    permissions = permission_service.grant_permission(
+        db, role_id, permission_name, request=request, actor=current_admin,
+    )
+    return {"role_id": role_id, "permissions": permissions}
+
+
+@router.delete("/roles/{role_id}/permissions/{permission_name}")
+def revoke_role_permission(
+        role_id: int,
+        permission_name: str,
+        request: Request,
+        db: Session = Depends(get_db),
+        current_admin: User = Depends(get_current_admin),
+):
+    permissions = permission_service.revoke_permission(
+        db, role_id, permission_name, request=request, actor=current_admin,
+    )
+    return {"role_id": role_id, "permissions": permissions}
+
+
+@router.get("/outbox/events")
+async def poll_events(
+        after: int = Query(0, ge=0, description="next_after پاسخ قبلی"),
+        limit: int = Query(100, ge=1, le=1000),
+        timeout: float | None = Query(None, ge=0, le=60, description="حداکثر ثانیه انتظار برای رویداد جدید"),
+        db: Session = Depends(get_db),
+):
+    """long-poll رویدادهای outbox (ثبت‌نام و ویرایش پروفایل) بعد از شناسه after."""
+    if timeout is None:
+        timeout = settings.outbox_long_poll_timeout_seconds
+    return await poll_outbox_events(db, after_id=after, limit=limit, timeout=timeout)
+
 
+@router.get("/outbox/failed")
+def list_failed_outbox_events(limit: int = Query(100, ge=1, le=1000), db: Session = Depends(get_db)):
+    """رویدادهایی که relay پس از OUTBOX_MAX_ATTEMPTS تلاش ناموفق کنار گذاشته است."""
+    return [
+        {**item.to_dict(), "attempts": item.attempts, "last_error": item.last_error, "failed_at": item.failed_at}
+        for item in get_failed_outbox_events(db, limit=limit)
+    ]
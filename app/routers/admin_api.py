@@ -0,0 +1,92 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.deps import get_db
+from app.schemas.student import GenderEnum
+from app.services.admin_auth_service import is_admin_authenticated
+from app.services.analytics_service import get_cached_cohort_breakdown, get_cached_registration_analytics
+from app.services.student_service import search_students
+from app.services.user_service import USER_SORT_KEYS, get_users_page
+
+
+def require_admin_session(request: Request) -> None:
+    """API داشبورد با همان cookie ورود مدیر؛ بدون آن 401 (نه redirect)."""
+    if not is_admin_authenticated(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ورود مدیر لازم است")
+
+
+router = APIRouter(
+    prefix="/admin/api",
+    tags=["Admin API"],
+    dependencies=[Depends(require_admin_session)],
+)
+
+
+@router.get("/users")
+def list_users(
+        db: Session = Depends(get_db),
+        limit: int = Query(50, ge=1, le=200),
+        cursor: str | None = Query(None, description="next_cursor پاسخ قبلی"),
+        sort: str = Query("created_at", description=" یا ".join(USER_SORT_KEYS)),
+        order: str = Query("desc", regex="^(asc|desc)$"),
+        role: str | None = Query(None, max_length=50),
+        gender: GenderEnum | None = Query(None),
+        is_active: bool | None = Query(None),
+        has_authenticated: bool | None = Query(None),
+):
+    """فهرست کاربران با صفحه‌بندی keyset برای بارگذاری تدریجی جدول داشبورد."""
+    page = get_users_page(
+        db,
+        limit=limit,
+        cursor=cursor,
+        sort=sort,
+        order=order,
+        role=role,
+        gender=gender.value if gender else None,
+        is_active=is_active,
+        has_authenticated=has_authenticated,
+    )
+    return {
+        "items": [user.to_dict(include_profile=True, include_role=True) for user in page.pop("users")],
+        **page,
+    }
+
+
+@router.get("/students/search")
+def search_students_endpoint(
+        q: str = Query(..., min_length=1, max_length=100, description="نام، شماره دانشجویی، کد ملی یا تلفن"),
+        limit: int = Query(20, ge=1, le=100),
+        cursor: str | None = Query(None, description="next_cursor پاسخ قبلی"),
+        db: Session = Depends(get_db),
+):
+    """جستجوی دانشجویان (نام با FTS5 و شناسه‌های عددی با پیشوند) به ترتیب ارتباط."""
+    page = search_students(db, q, limit=limit, cursor=cursor)
+    return {
+        "items": [profile.to_dict() for profile in page.pop("students")],
+        **page,
+    }
+
+
+@router.get("/analytics/registrations")
+def registration_analytics(
+        date_from: date | None = Query(None, description="شروع بازه (پیش‌فرض ۳۰ روز اخیر)"),
+        date_to: date | None = Query(None, description="پایان بازه (شامل همان روز)"),
+        interval: str = Query("day", regex="^(day|week)$"),
+        db: Session = Depends(get_db),
+):
+    """ثبت‌نام‌های روزانه/هفتگی و قیف ثبت‌نام تا اولین ورود دانشجویان در یک بازه."""
+    return get_cached_registration_analytics(db, date_from=date_from, date_to=date_to, interval=interval)
+
+
+@router.get("/analytics/cohorts")
+def cohort_analytics(db: Session = Depends(get_db)):
+    """ثبت‌نام، نسبت احراز هویت و تفکیک جنسیت به تفکیک سال ورود (از شماره دانشجویی)."""
+    return get_cached_cohort_breakdown(db)
+
+
+@router.get("/analytics/cohorts/{entry_year}")
+def cohort_faculty_analytics(entry_year: int, db: Session = Depends(get_db)):
+    """همان آمار برای دانشکده‌های یک سال ورود."""
+    return get_cached_cohort_breakdown(db, entry_year=entry_year)
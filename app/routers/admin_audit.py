@@ -1,13 +1,16 @@
-import csv
-from io import StringIO
+import os
+from typing import Dict
 from fastapi import APIRouter, Depends, Query, Request, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
-from io import BytesIO
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from app.core.deps import get_db
+from app.core.file_response import ranged_file_response
 from app.routers.admin_access import ensure_admin_interface_auth, ensure_admin_interface_auth
-from app.models.audit_log import AuditLog
+from app.services.audit_service import export_header, iter_audit_log_rows, parse_export_fields
+from app.services.export_jobs import EXPORT_FORMATS, export_jobs
+from app.services.export_service import spool_xlsx, stream_export_response
 
 
 router = APIRouter(
@@ -15,132 +18,181 @@ router = APIRouter(
     tags=["Admin - Audit Logs"],
 )
 
-@router.get("/export/csv")
-def export_audit_logs_csv(
-    request: Request,
-    db: Session = Depends(get_db),
+def audit_export_filters(
     user_id: int | None = Query(None),
     action: str | None = Query(None),
     date_from: datetime | None = Query(None),
     date_to: datetime | None = Query(None),
+    q: str | None = Query(None, max_length=200),
+) -> Dict:
+    """فیلترهای مشترک همه خروجی‌ها."""
+    return {"user_id": user_id, "action": action, "date_from": date_from, "date_to": date_to, "q": q}
+
+
+COLUMNS_QUERY = Query(None, description="ستون‌های خروجی با کاما، مثلاً id,action,created_at")
+
+
+def _stream_export(
+    request: Request,
+    db: Session,
+    export_format: str,
+    filters: Dict,
+    columns: str | None,
+    gzip_file: bool = False,
+) -> StreamingResponse:
+    """خروجی جریانی CSV یا NDJSON لاگ‌ها با فقط ستون‌های درخواستی."""
+    fields = parse_export_fields(columns)
+    # ردیف‌ها به صورت دسته‌ای خوانده و همان لحظه به قالب خروجی تبدیل می‌شوند
+    rows = iter_audit_log_rows(db, fields=fields, **filters)
+    return stream_export_response(
+        request, export_format, fields, export_header(fields), rows, "audit_logs", gzip_file=gzip_file,
+    )
+
+
+@router.get("/export/csv")
+def export_audit_logs_csv(
+    request: Request,
+    db: Session = Depends(get_db),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
+    compress: bool = Query(False, description="خروجی فشرده gzip (معادل /export/csv.gz)"),
 ):
     unauthorized = ensure_admin_interface_auth(request)
     if unauthorized:
         return unauthorized
 
-    # فیلتر کردن لاگ‌ها بر اساس پارامترها
-    query = db.query(AuditLog)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = query.order_by(AuditLog.created_at.desc()).all()
-
-    # تولید فایل CSV
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # اضافه کردن سرآیندهای جدید به CSV
-    writer.writerow([
-        "ID", "User ID", "Action", "Entity", "Entity ID", "Description", "IP Address", "Created At",
-    ])
-
-    # نوشتن لاگ‌ها در CSV
-    for log in logs:
-        writer.writerow([
-            log.id,
-            log.user_id,
-            log.action,
-            log.entity,
-            log.entity_id,
-            log.description,
-            log.ip_address,
-            log.created_at,
-        ])
-
-    output.seek(0)
-
-    return StreamingResponse(
-        output,
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=audit_logs.csv"}
-    )
+    return _stream_export(request, db, "csv", filters, columns, gzip_file=compress)
 
 
-@router.get("/export/excel")
-def export_audit_logs_excel(
+@router.get("/export/csv.gz")
+def export_audit_logs_csv_gz(
     request: Request,
     db: Session = Depends(get_db),
-    user_id: int | None = Query(None),
-    action: str | None = Query(None),
-    date_from: datetime | None = Query(None),
-    date_to: datetime | None = Query(None),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
 ):
     unauthorized = ensure_admin_interface_auth(request)
     if unauthorized:
         return unauthorized
 
-    # فیلتر کردن لاگ‌ها
-    query = db.query(AuditLog)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = query.order_by(AuditLog.created_at.desc()).all()
-    try:
-        from openpyxl import Workbook
-    except ModuleNotFoundError as exc:
-        raise HTTPException(status_code=503, detail="کتابخانه openpyxl در محیط نصب نیست.") from exc
+    return _stream_export(request, db, "csv", filters, columns, gzip_file=True)
+
+
+@router.get("/export/ndjson")
+def export_audit_logs_ndjson(
+    request: Request,
+    db: Session = Depends(get_db),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
+):
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
 
+    return _stream_export(request, db, "ndjson", filters, columns)
+
+
+@router.get("/export/ndjson.gz")
+def export_audit_logs_ndjson_gz(
+    request: Request,
+    db: Session = Depends(get_db),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
+):
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
+
+    return _stream_export(request, db, "ndjson", filters, columns, gzip_file=True)
+
+
+@router.get("/export/excel")
+def export_audit_logs_excel(
+    request: Request,
+    db: Session = Depends(get_db),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
+):
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
 
-    # تولید فایل Excel
     try:
-        from openpyxl import Workbook
+        import openpyxl  # noqa: F401
     except ModuleNotFoundError as exc:
         raise HTTPException(
             status_code=503,
             detail="Excel export نیازمند نصب openpyxl است. دستور: pip install -r app/requirements.txt",
         ) from exc
 
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Audit Logs"
-
-    # اضافه کردن سرآیندها در Excel
-    ws.append([
-        "ID", "User ID", "Action", "Entity", "Entity ID", "Description", "IP Address", "Created At",
-    ])
-
-    # نوشتن لاگ‌ها در Excel
-    for log in logs:
-        ws.append([
-            log.id,
-            log.user_id,
-            log.action,
-            log.entity,
-            log.entity_id,
-            log.description,
-            log.ip_address,
-            log.created_at.strftime("%Y-%m-%d %H:%M"),
-        ])
-
-    stream = BytesIO()
-    wb.save(stream)
-    stream.seek(0)
-
-    return StreamingResponse(
-        stream,
+    # ردیف‌ها دسته‌ای خوانده و در حالت write-only روی فایل موقت نوشته می‌شوند
+    fields = parse_export_fields(columns)
+    rows = iter_audit_log_rows(db, fields=fields, **filters)
+    path = spool_xlsx(export_header(fields), rows, sheet_title="Audit Logs")
+
+    return FileResponse(
+        path,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={"Content-Disposition": "attachment; filename=audit_logs.xlsx"}
+        filename="audit_logs.xlsx",
+        background=BackgroundTask(os.remove, path),
     )
 
+
+# ---------------- خروجی پس‌زمینه ----------------
+
+def _get_export_job(job_id: str):
+    job = export_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="درخواست خروجی یافت نشد")
+    return job
+
+
+@router.post("/export/jobs", status_code=202)
+def create_export_job(
+    request: Request,
+    db: Session = Depends(get_db),
+    format: str = Query("csv", description="csv، csv.gz، ndjson، ndjson.gz یا xlsx"),
+    filters: Dict = Depends(audit_export_filters),
+    columns: str | None = COLUMNS_QUERY,
+):
+    """
+    ایجاد خروجی در پس‌زمینه.
+
+    اگر برای همین فیلترها فایلی وجود داشته باشد و از آن زمان لاگ جدیدی ثبت
+    نشده باشد، job بلافاصله با cached=true آماده است.
+    """
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
+
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"قالب خروجی نامعتبر است: {format}")
+
+    job = export_jobs.submit(db, format, filters, parse_export_fields(columns))
+    return job.to_dict()
+
+
+@router.get("/export/jobs/{job_id}")
+def get_export_job(job_id: str, request: Request):
+    """وضعیت و پیشرفت (تعداد ردیف‌های نوشته‌شده) یک خروجی."""
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
+
+    return _get_export_job(job_id).to_dict()
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job(job_id: str, request: Request):
+    """دانلود فایل خروجی با پشتیبانی از Range برای ادامه دانلود."""
+    unauthorized = ensure_admin_interface_auth(request)
+    if unauthorized:
+        return unauthorized
+
+    job = _get_export_job(job_id)
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="خروجی هنوز آماده نیست")
+    if not os.path.exists(job.path):
+        raise HTTPException(status_code=410, detail="فایل خروجی دیگر موجود نیست؛ دوباره درخواست دهید")
+
+    return ranged_file_response(request, job.path, job.media_type, job.filename)
@@ -5,6 +5,7 @@ from fastapi import APIRouter, HTTPException, Request, status
 from pydantic import BaseModel, ValidationError
 
 from app.core.confing import settings
+from app.services.audit_service import AuditAction, create_audit_log
 
 
 router = APIRouter(prefix="/admin", tags=["Admin Authentication"])
@@ -57,9 +58,11 @@ async def admin_login(request: Request):
         ) from exc
 
     if not secrets.compare_digest(data.password, settings.admin_login_password):
+        create_audit_log(None, AuditAction.ADMIN_LOGIN_FAILED, request=request, entity="admin")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="رمز عبور ادمین اشتباه است",
         )
 
+    create_audit_log(None, AuditAction.ADMIN_LOGIN, request=request, entity="admin")
     return {"detail": "ورود ادمین موفق بود"}
\ No newline at end of file
@@ -9,6 +9,7 @@ from app.services.admin_auth_service import (
     create_admin_token,
     is_admin_authenticated,
 )
+from app.services.audit_service import AuditAction, create_audit_log
 
 router = APIRouter(prefix="/ui-auth/admin", tags=["Admin UI Authentication"])
 templates = Jinja2Templates(directory="app/templates")
@@ -37,6 +38,12 @@ async def admin_login_submit(
     redirect_url: Optional[str] = Form("/admin/dashboard"),
 ):
     authenticated, error_message = authenticate_admin_password(request, password)
+    create_audit_log(
+        None,
+        AuditAction.ADMIN_LOGIN if authenticated else AuditAction.ADMIN_LOGIN_FAILED,
+        request=request,
+        entity="admin",
+    )
     if not authenticated:
         return templates.TemplateResponse(
             "admin/login.html",
@@ -62,7 +69,8 @@ async def admin_login_submit(
 
 
 @router.get("/logout")
-async def admin_logout():
+async def admin_logout(request: Request):
+    create_audit_log(None, AuditAction.ADMIN_LOGOUT, request=request, entity="admin")
     response = RedirectResponse(url="/ui-auth/admin/login", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie("admin_access_token")
     return response
\ No newline at end of file
@@ -1,7 +1,9 @@
+import asyncio
+import json
 from datetime import datetime, timezone, timedelta
-from typing import Optional
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, Query, status
-from fastapi.responses import HTMLResponse, RedirectResponse
+from typing import Dict, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, Request, Query, status
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session, joinedload
@@ -12,8 +14,23 @@ from app.core.deps import get_db
 from app.core.security import verify_password
 from app.models.user import User
 from app.routers.admin_access import ensure_admin_interface_auth
-from app.services.audit_service import get_audit_logs, get_simple_audit_stats
+from app.services.audit_service import (
+    AuditAction,
+    create_audit_log,
+    get_audit_logs,
+    get_simple_audit_stats,
+)
 from app.services.admin_auth_service import is_admin_authenticated
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_rollup_service import get_audit_timeseries
+from app.services.dashboard_service import get_cached_dashboard_summary
+from app.services.duplicate_service import (
+    DUPLICATE_REVIEW_STATUSES,
+    duplicate_scan_job,
+    get_duplicate_candidates,
+    review_duplicate_candidate,
+)
+from app.services.user_service import get_users_page
 
 router = APIRouter(prefix="/admin", tags=["Admin Dashboard"])
 templates = Jinja2Templates(directory="app/templates")
@@ -123,6 +140,7 @@ def admin_login_submit(
 
     if not verify_password(password, ADMIN_HASHED_PASSWORD):
         _register_failed_attempt(client_id)
+        create_audit_log(None, AuditAction.ADMIN_LOGIN_FAILED, request=request, entity="admin")
         blocked_after_failure, blocked_until = _is_blocked(client_id)
         error_message = "رمز عبور مدیر نادرست است."
         if blocked_after_failure:
@@ -140,6 +158,7 @@ def admin_login_submit(
         )
 
     _reset_attempts(client_id)
+    create_audit_log(None, AuditAction.ADMIN_LOGIN, request=request, entity="admin")
     token = _build_admin_token()
 
     response = RedirectResponse(url="/admin/dashboard", status_code=status.HTTP_303_SEE_OTHER)
@@ -155,7 +174,8 @@ def admin_login_submit(
 
 
 @router.get("/logout")
-def admin_logout():
+def admin_logout(request: Request):
+    create_audit_log(None, AuditAction.ADMIN_LOGOUT, request=request, entity="admin")
     response = RedirectResponse(url="/admin/login", status_code=status.HTTP_303_SEE_OTHER)
     response.delete_cookie(ADMIN_COOKIE_NAME)
     return response
@@ -173,33 +193,21 @@ def admin_dashboard(
             status_code=303,
         )
 
-    """داشبورد ادمین - فقط آخرین لاگ‌ها"""
-
-    users = (
-        db.query(User)
-        .options(joinedload(User.profile), joinedload(User.role))
-        .order_by(User.created_at.desc())
-        .all()
-    )
-
-    recent_logs = get_audit_logs(db, limit=10)
+    recent_logs = get_audit_logs(db, limit=10, include_total=False)
     stats = get_simple_audit_stats(db)
+    summary = get_cached_dashboard_summary(db)
 
-    # اضافه کردن شماره دانشجویی و کد ملی به لاگ‌ها
-    users = (
-        db.query(User)
-        .options(joinedload(User.profile), joinedload(User.role))
-        .order_by(User.created_at.desc())
-        .limit(50)
-        .all()
-    )
+    # صفحه اول جدول کاربران؛ صفحات بعد با /admin/api/users بارگذاری می‌شوند
+    users_page = get_users_page(db, limit=50)
     return templates.TemplateResponse(
         "admin/dashboard.html",
         {
             "request": request,
-            "users": users,
+            "users": users_page["users"],
+            "users_cursor": users_page["next_cursor"],
             "recent_logs": recent_logs.get("logs", []),
             "stats": stats,
+            "summary": summary,
         },
     )
 
@@ -232,17 +240,152 @@ def admin_user_details(
 
 
 
+@router.get("/duplicates", response_class=HTMLResponse)
+def duplicates_page(
+    request: Request,
+    db: Session = Depends(get_db),
+    status_filter: str = Query("pending", alias="status", regex="^(pending|confirmed|dismissed)$"),
+):
+    """صفحه بررسی جفت پروفایل‌های احتمالاً تکراری."""
+    if not is_admin_authenticated(request):
+        return RedirectResponse(url="/admin/login", status_code=status.HTTP_303_SEE_OTHER)
+
+    return templates.TemplateResponse(
+        "admin/duplicates.html",
+        {
+            "request": request,
+            "candidates": get_duplicate_candidates(db, status_filter=status_filter),
+            "status_filter": status_filter,
+            "job": duplicate_scan_job,
+        },
+    )
+
+
+@router.post("/duplicates/scan")
+def start_duplicate_scan(request: Request, background_tasks: BackgroundTasks):
+    """اجرای job تشخیص تکرار در پس‌زمینه (اگر در حال اجرا نباشد)."""
+    if not is_admin_authenticated(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ورود مدیر لازم است")
+    if not duplicate_scan_job.is_running:
+        background_tasks.add_task(duplicate_scan_job.run)
+    return RedirectResponse(url="/admin/duplicates", status_code=status.HTTP_303_SEE_OTHER)
+
+
+@router.post("/duplicates/{candidate_id}/review")
+def review_duplicate(
+    candidate_id: int,
+    request: Request,
+    decision: str = Form(..., description=" یا ".join(DUPLICATE_REVIEW_STATUSES)),
+    db: Session = Depends(get_db),
+):
+    if not is_admin_authenticated(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ورود مدیر لازم است")
+    review_duplicate_candidate(db, candidate_id, decision)
+    return RedirectResponse(url="/admin/duplicates", status_code=status.HTTP_303_SEE_OTHER)
+
+
+@router.get("/audit-logs/stats")
+def audit_logs_stats(
+        request: Request,
+        db: Session = Depends(get_db),
+        date_from: Optional[datetime] = Query(None, description="تاریخ شروع (پیش‌فرض: ۳۰ روز قبل)"),
+        date_to: Optional[datetime] = Query(None, description="تاریخ پایان (پیش‌فرض: اکنون)"),
+        granularity: str = Query("day", description="hour یا day"),
+        group_by: Optional[str] = Query(None, description="action، entity یا user"),
+        top: int = Query(10, ge=1, le=50, description="حداکثر تعداد سری‌ها در حالت group_by"),
+):
+    """سری زمانی تعداد لاگ‌ها برای نمودارهای داشبورد (از جدول rollup)."""
+    if not is_admin_authenticated(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ورود مدیر لازم است")
+
+    date_to = date_to or datetime.now(timezone.utc).replace(tzinfo=None)
+    date_from = date_from or date_to - timedelta(days=30)
+    return get_audit_timeseries(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        granularity=granularity,
+        group_by=group_by,
+        top=top,
+    )
+
+
+def _sse_message(event: Dict, missed: int) -> str:
+    data = dict(event)
+    created_at = data.get("created_at")
+    if isinstance(created_at, datetime):
+        data["created_at"] = created_at.isoformat()
+    if missed:
+        data["missed"] = missed
+    return f"event: audit\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.get("/audit-logs/stream")
+async def audit_logs_stream(
+        request: Request,
+        action: Optional[str] = Query(None, description="فیلتر عملیات (چند مقدار با کاما)"),
+        user_id: Optional[int] = Query(None, description="فیلتر بر اساس کاربر"),
+        entity: Optional[str] = Query(None, description="فیلتر بر اساس موجودیت"),
+):
+    """
+    جریان زنده لاگ‌های جدید (Server-Sent Events).
+
+    هر اتصال یک بافر محدود دارد؛ اگر کلاینت عقب بماند رویدادهای قدیمی‌تر حذف
+    می‌شوند و تعداد آن‌ها در فیلد missed رویداد بعدی اعلام می‌شود.
+    """
+    if not is_admin_authenticated(request):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="ورود مدیر لازم است")
+
+    actions = [item.strip() for item in action.split(",") if item.strip()] if action else None
+    subscription = audit_broadcaster.subscribe(
+        buffer_size=settings.audit_stream_buffer_size,
+        actions=actions,
+        user_id=user_id,
+        entity=entity,
+    )
+    if subscription is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="تعداد اتصال‌های زنده به حداکثر رسیده است",
+        )
+
+    async def event_stream():
+        reported_missed = 0
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.get(),
+                        timeout=settings.audit_stream_keepalive_seconds,
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse_message(event, subscription.missed - reported_missed)
+                reported_missed = subscription.missed
+        finally:
+            audit_broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/audit-logs", response_class=HTMLResponse)
 def audit_logs_page(
         request: Request,
         db: Session = Depends(get_db),
-        skip: int = Query(0, ge=0, description="تعداد رکوردهای رد شده"),
+        cursor: Optional[str] = Query(None, description="cursor صفحه بعد"),
         limit: int = Query(50, ge=1, le=200, description="تعداد رکوردهای قابل نمایش"),
+        with_total: bool = Query(False, description="محاسبه تعداد کل نتایج (شامل آرشیو)"),
         date_from: Optional[datetime] = Query(None, description="تاریخ شروع"),
         date_to: Optional[datetime] = Query(None, description="تاریخ پایان"),
         action: Optional[str] = Query(None, description="فیلتر بر اساس عمل"),
         user_id: Optional[int] = Query(None, description="فیلتر بر اساس کاربر"),
-
+        q: Optional[str] = Query(None, max_length=200, description="جستجوی متنی در توضیحات، عملیات و موجودیت"),
 ):
 
     if not is_admin_authenticated(request):
@@ -253,30 +396,34 @@ def audit_logs_page(
 
     result = get_audit_logs(
         db=db,
-        skip=skip,
         limit=limit,
+        cursor=cursor,
+        include_total=with_total,
         date_from=date_from,
         date_to=date_to,
         action=action,
-        user_id=user_id
+        user_id=user_id,
+        q=q,
+        with_users=True,
     )
 
+    next_cursor = result.get("next_cursor")
     return templates.TemplateResponse(
         "admin/audit_logs.html",
         {
             "request": request,
             "logs": result.get("logs", []),
-            "total": result.get("total", 0),
-            "skip": skip,
+            "total": result.get("total"),
             "limit": limit,
             "has_more": result.get("has_more", False),
+            "next_url": str(request.url.include_query_params(cursor=next_cursor)) if next_cursor else None,
+            "first_url": str(request.url.remove_query_params("cursor")) if cursor else None,
             "filters": {
                 "user_id": user_id or "",
                 "action": action or "",
                 "date_from": date_from.isoformat() if date_from else "",
                 "date_to": date_to.isoformat() if date_to else "",
+                "q": q or "",
             },
         },
     )
-
-
@@ -6,8 +6,8 @@ from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
 from app.core.security import get_current_admin
-from app.models.audit_log import AuditLog
 from app.models.user import User  # فرض می‌کنیم مدل User اینجا است
+from app.services.audit_service import get_audit_logs
 
 # ایجاد router
 router = APIRouter()
@@ -23,29 +23,27 @@ def audit_logs_page(
     action: Optional[str] = Query(None, description="Filter by action"),
     date_from: Optional[datetime] = Query(None, description="Filter from date"),
     date_to: Optional[datetime] = Query(None, description="Filter to date"),
+    q: Optional[str] = Query(None, max_length=200, description="Full-text search"),
+    # صفحه‌بندی keyset
+    cursor: Optional[str] = Query(None, description="Cursor of the next page"),
+    limit: int = Query(100, ge=1, le=500, description="Page size"),
+    with_total: bool = Query(False, description="Compute total number of matches"),
 ):
-    query = db.query(AuditLog)
-
-    if user_id is not None:
-        query = query.filter(AuditLog.user_id == user_id)
-
-    if action:
-        query = query.filter(AuditLog.action == action)
-
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-
-    logs = (
-        query
-        .order_by(AuditLog.created_at.desc())
-        .limit(500)
-        .all()
+    result = get_audit_logs(
+        db,
+        limit=limit,
+        cursor=cursor,
+        include_total=with_total,
+        date_from=date_from,
+        date_to=date_to,
+        action=action,
+        user_id=user_id,
+        q=q,
+        with_users=True,
     )
+    logs = result["logs"]
 
-    # اضافه کردن اطلاعات شماره دانشجویی و کد ملی
+    # اضافه کردن اطلاعات شماره دانشجویی و کد ملی (کاربر و پروفایل از قبل بارگذاری شده‌اند)
     for log in logs:
         if log.user:
             log.student_number = log.user.student_number  # شماره دانشجویی
@@ -60,11 +58,20 @@ def audit_logs_page(
         {
             "request": request,
             "logs": logs,
+            "total": result["total"],
+            "limit": limit,
+            "has_more": result["has_more"],
+            "next_url": (
+                str(request.url.include_query_params(cursor=result["next_cursor"]))
+                if result["next_cursor"] else None
+            ),
+            "first_url": str(request.url.remove_query_params("cursor")) if cursor else None,
             "filters": {
                 "user_id": user_id or "",
                 "action": action or "",
                 "date_from": date_from_str,
                 "date_to": date_to_str,
+                "q": q or "",
             },
         },
     )
@@ -1,5 +1,5 @@
 # app/routers/auth.py
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, Depends, Request, status, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.core.deps import DBDep, CurrentUser, get_db
@@ -36,11 +36,12 @@ router = APIRouter(
     }
 )
 async def register(
+        request: Request,
         data: RegisterRequest,  # اطلاعات ثبت نام شامل شماره دانشجویی و کد ملی
         db: Session = DBDep()  # دسترسی به دیتابیس
 ):
     # ثبت‌نام کاربر با استفاده از اطلاعات شماره دانشجویی و کد ملی
-    user = register_user(db=db, data=data)
+    user = register_user(db=db, data=data, request=request)
     return {
         "message": "ثبت‌نام با موفقیت انجام شد",
         "user_id": user.id,
@@ -55,6 +56,7 @@ async def register(
     summary="ورود و دریافت توکن"
 )
 async def login(
+        request: Request,
         form_data: OAuth2PasswordRequestForm = Depends(), # داده‌های ورود شامل شماره دانشجویی و کد ملی
         db: Session = DBDep()  # دسترسی به دیتابیس
 ):
@@ -71,8 +73,9 @@ async def login(
     user = authenticate_user(
         db,
         national_code=national_code,
-        password=student_number
+        password=student_number,
         # رمز عبور برابر با شماره دانشجویی است
+        request=request,
     )
 
     if not user:
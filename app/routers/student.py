@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.orm import Session
 
 from app.core.deps import get_db
@@ -24,6 +24,7 @@ def read_my_profile(
 
 @router.put("/me", response_model=StudentProfileOut)
 def update_my_profile(
+    request: Request,
     data: StudentProfileUpdate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -32,4 +33,4 @@ def update_my_profile(
     به‌روزرسانی پروفایل دانشجویی کاربر جاری.
     اطلاعات پروفایل از شماره دانشجویی و کد ملی گرفته می‌شود.
     """
-    return student_service.update_my_profile(db, current_user, data)
+    return student_service.update_my_profile(db, current_user, data, request=request)
@@ -1,13 +1,15 @@
 # app/routers/test.py - اصلاح شده
+from collections import defaultdict
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from app.core.deps import DBDep, CurrentUser, AdminDep
 from app.models.user import User
 from app.models.role import Role
-from app.models.student_profile import StudentProfile
 from app.schemas.user import UserOut
 from app.schemas.auth import Token
+from app.services.counter_service import get_counter, get_counters_by_prefix, get_user_totals
 
 router = APIRouter(
     prefix="/test",
@@ -80,10 +82,8 @@ async def test_database(db: Session = DBDep()):  # ✅ اصلاح شده
     تست اتصال به دیتابیس و شمارش رکوردها.
     """
     try:
-        # شمارش رکوردها
-        user_count = db.query(User).count()
-        role_count = db.query(Role).count()
-        profile_count = db.query(StudentProfile).count()
+        # شمارش رکوردها (از جدول شمارنده‌ها)
+        totals = get_user_totals(db)
 
         # تست query ساده
         latest_user = db.query(User).order_by(User.created_at.desc()).first()
@@ -91,10 +91,12 @@ async def test_database(db: Session = DBDep()):  # ✅ اصلاح شده
         return {
             "database": "connected ✅",
             "tables": {
-                "users": user_count,
-                "roles": role_count,
-                "student_profiles": profile_count
+                "users": totals["users"],
+                "roles": totals["roles"],
+                "student_profiles": totals["student_profiles"]
             },
+            "users_by_role": totals["users_by_role"],
+            "profiles_by_gender": totals["profiles_by_gender"],
             "latest_user": {
                 "id": latest_user.id if latest_user else None,
                 "student_number": latest_user.student_number if latest_user else None,
@@ -181,7 +183,15 @@ async def list_users(
             detail="شما دسترسی به لیست کاربران را ندارید"
         )
 
-    users = db.query(User).offset(offset).limit(limit).all()
+    # نقش و پروفایل در همان کوئری (JOIN) خوانده می‌شوند تا برای هر کاربر کوئری جدا اجرا نشود
+    users = (
+        db.query(User)
+        .options(joinedload(User.role), joinedload(User.profile))
+        .order_by(User.id)
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
 
     user_list = []
     for user in users:
@@ -203,7 +213,7 @@ async def list_users(
 
         user_list.append(user_data)
 
-    total_users = db.query(User).count()
+    total_users = get_counter(db, "users.total")
 
     return {
         "total": total_users,
@@ -222,25 +232,37 @@ async def list_roles(db: Session = DBDep()):  # ✅ اصلاح شده
     """
     نمایش لیست نقش‌های موجود در سیستم.
     """
-    roles = db.query(Role).all()
-
-    role_list = []
-    for role in roles:
-        user_count = db.query(User).filter(User.role_id == role.id).count()
-
-        role_list.append({
+    roles = db.query(Role).order_by(Role.id).all()
+
+    # تعداد کاربران هر نقش از جدول شمارنده‌ها و نمونه‌ها (۳ کاربر اول هر نقش)
+    # با یک کوئری window؛ تعداد کوئری‌ها به تعداد نقش‌ها بستگی ندارد
+    user_counts = get_counters_by_prefix(db, "users.role:")
+    ranked = (
+        db.query(
+            User.role_id,
+            User.student_number,
+            func.row_number().over(partition_by=User.role_id, order_by=User.id).label("rank"),
+        )
+        .subquery()
+    )
+    samples = defaultdict(list)
+    for role_id, student_number in (
+        db.query(ranked.c.role_id, ranked.c.student_number)
+        .filter(ranked.c.rank <= 3)
+        .order_by(ranked.c.role_id, ranked.c.rank)
+    ):
+        samples[role_id].append(student_number)
+
+    role_list = [
+        {
             "id": role.id,
             "name": role.name,
             "description": role.description,
-            "user_count": user_count,
-            "users_sample": [
-                user.student_number
-                for user in db.query(User)
-                .filter(User.role_id == role.id)
-                .limit(3)
-                .all()
-            ]
-        })
+            "user_count": user_counts.get(str(role.id), 0),
+            "users_sample": samples[role.id],
+        }
+        for role in roles
+    ]
 
     return {
         "total_roles": len(roles),
@@ -270,7 +292,12 @@ async def get_user_profile(
             detail="شما فقط می‌توانید پروفایل خودتان را ببینید"
         )
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = (
+        db.query(User)
+        .options(joinedload(User.role), joinedload(User.profile))
+        .filter(User.id == user_id)
+        .first()
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
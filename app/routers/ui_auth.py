@@ -18,6 +18,7 @@ from sqlalchemy.orm import Session
 from app.core.deps import DBDep
 from app.schemas.auth import RegisterRequest, GenderEnum
 from app.services.auth_service import register_user, enforce_single_national_id_authentication
+from app.services.audit_service import AuditAction, create_audit_log
 from app.core.security import create_access_token, verify_password, SECRET_KEY, ALGORITHM
 from app.models.user import User
 from jose import JWTError, jwt
@@ -104,7 +105,7 @@ async def submit_register(
             address=address or None
         )
 
-        register_user(db, register_data)
+        register_user(db, register_data, request=request)
 
         return templates.TemplateResponse(
             "auth/login.html",
@@ -229,6 +230,12 @@ async def submit_login(
 
     if not user or not verify_password(normalized_password, user.hashed_password):
         logger.warning("UI login failed due to invalid credentials")
+        create_audit_log(
+            db,
+            AuditAction.LOGIN_FAILED,
+            request=request,
+            description=f"ورود ناموفق با کد ملی {normalized_national_code}",
+        )
         return templates.TemplateResponse(
             "auth/login.html",
             {
@@ -282,6 +289,14 @@ async def submit_login(
     max_age = 30 * 24 * 60 * 60 if remember_me else 24 * 60 * 60
 
     logger.info("UI login success: user_id=%s", user.id)
+    create_audit_log(
+        db,
+        AuditAction.LOGIN,
+        request=request,
+        user=user,
+        entity="user",
+        entity_id=user.id,
+    )
     response = RedirectResponse(
         url=redirect_url,
         status_code=status.HTTP_303_SEE_OTHER
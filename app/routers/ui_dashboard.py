@@ -10,6 +10,8 @@ from app.core.confing import settings
 from app.core.deps import DBDep
 from app.core.validators import validate_phone_number
 from app.models.user import User
+from app.services.audit_service import AuditAction, create_audit_log
+from app.services.outbox_service import OutboxEventType, add_outbox_event
 
 router = APIRouter(prefix="/ui/dashboard", tags=["UI Dashboard"])
 
@@ -144,11 +146,37 @@ async def profile_edit_submit(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         )
 
+    new_address = address.strip() if address else None
+    changes = {
+        field: value
+        for field, value in (("phone_number", normalized_phone), ("address", new_address))
+        if getattr(profile, field) != value
+    }
     profile.phone_number = normalized_phone
-    profile.address = address.strip() if address else None
-
+    profile.address = new_address
+
+    if changes:
+        # همان رویداد update_my_profile، در همان تراکنش ویرایش
+        add_outbox_event(
+            db,
+            OutboxEventType.PROFILE_UPDATED,
+            aggregate="student_profile",
+            aggregate_id=profile.id,
+            payload={"profile_id": profile.id, "user_id": profile.user_id, "changes": changes, "by": "student"},
+        )
     db.commit()
 
+    if changes:
+        create_audit_log(
+            db,
+            AuditAction.UPDATE_PROFILE,
+            request=request,
+            user=user,
+            entity="student_profile",
+            entity_id=profile.id,
+            description="فیلدهای تغییر یافته: " + ", ".join(changes),
+        )
+
     return RedirectResponse(
         url="/ui/dashboard/profile",
         status_code=status.HTTP_303_SEE_OTHER,
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.security import get_current_user, get_current_admin
 from app.core.deps import get_db
@@ -48,7 +48,8 @@ def read_user_by_id(
         )
 
     # جستجو با استفاده از شماره دانشجویی
-    user = db.query(User).filter(User.id == user_id).first()  # فرض بر این است که ID در اینجا موجود است.
+    # پروفایل در همان کوئری خوانده می‌شود (UserOut آن را با StudentProfileOutDB برمی‌گرداند)
+    user = db.query(User).options(joinedload(User.profile)).filter(User.id == user_id).first()
 
     # اگر بخواهیم جستجو را بر اساس شماره دانشجویی یا کد ملی انجام دهیم، می‌توانیم به شکل زیر عمل کنیم:
     # user = db.query(User).filter(User.student_number == "some_student_number").first()
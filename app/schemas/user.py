@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field, validator
-from typing import Optional
+from pydantic import BaseModel, Field, root_validator, validator
+from typing import List, Optional
 from app.core.validators import validate_phone_number, validate_gender
+from app.schemas.student import StudentProfileOutDB
 
 
 class UserOut(BaseModel):
@@ -8,7 +9,7 @@ class UserOut(BaseModel):
     student_number: str
     role_id: int
     is_active: bool
-    profile: Optional[dict] = None
+    profile: Optional[StudentProfileOutDB] = None
 
     class Config:
         orm_mode = True
@@ -35,3 +36,42 @@ class ProfileUpdate(BaseModel):
                 "gender": "brother"
             }
         }
+
+
+# انتخاب کاربران برای عملیات گروهی ادمین: فهرست شناسه‌ها یا فیلتر
+class BulkUserFilter(BaseModel):
+    role: Optional[str] = Field(None, max_length=50)
+    is_active: Optional[bool] = None
+    gender: Optional[str] = None
+    has_authenticated: Optional[bool] = None
+    entry_year: Optional[int] = None
+    faculty_code: Optional[str] = Field(None, max_length=2)
+    student_number_prefix: Optional[str] = Field(None, min_length=1, max_length=20)
+
+    @validator("gender")
+    def validate_gender_field(cls, value: Optional[str]) -> Optional[str]:
+        return validate_gender(value)
+
+
+class BulkUserSelection(BaseModel):
+    ids: Optional[List[int]] = Field(None, min_items=1, max_items=10000)
+    filter: Optional[BulkUserFilter] = None
+
+    @root_validator(skip_on_failure=True)
+    def validate_selection(cls, values):
+        ids, selection_filter = values.get("ids"), values.get("filter")
+        if (ids is None) == (selection_filter is None):
+            raise ValueError("دقیقاً یکی از ids یا filter باید ارسال شود")
+        # فیلتر خالی یعنی همه کاربران؛ عمداً پذیرفته نمی‌شود
+        if selection_filter is not None and not selection_filter.dict(exclude_none=True):
+            raise ValueError("filter باید حداقل یک شرط داشته باشد")
+        return values
+
+    class Config:
+        schema_extra = {
+            "example": {"filter": {"entry_year": 1401, "has_authenticated": False}}
+        }
+
+
+class BulkRoleUpdate(BulkUserSelection):
+    role: str = Field(..., min_length=1, max_length=50)
@@ -0,0 +1,51 @@
+# scripts/archive_audit_logs.py
+import sys
+import os
+from datetime import datetime
+
+# اضافه کردن مسیر پروژه به sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from app.core.confing import settings
+from app.core.database import SessionLocal, create_database
+from app.services.audit_archive_service import apply_retention, archive_audit_logs
+
+
+def main():
+    """
+    انتقال لاگ‌های قدیمی به فایل‌های آرشیو.
+
+    استفاده:
+        python app/scripts/archive_audit_logs.py             # طبق AUDIT_RETENTION_DAYS
+        python app/scripts/archive_audit_logs.py 2024-01-01  # همه ماه‌های کامل قبل از این تاریخ
+    """
+    print("=" * 50)
+    print("🗄️ آرشیو لاگ‌های ممیزی")
+    print("=" * 50)
+
+    create_database()
+
+    db = SessionLocal()
+    try:
+        if len(sys.argv) > 1:
+            archives = archive_audit_logs(db, before=datetime.fromisoformat(sys.argv[1]))
+        elif settings.audit_retention_days > 0:
+            archives = apply_retention(db)
+        else:
+            print("⚠️ AUDIT_RETENTION_DAYS تنظیم نشده است؛ تاریخ را به عنوان آرگومان بدهید.")
+            return
+
+        for archive in archives:
+            print(f"  - {archive.period}: {archive.row_count} لاگ -> {archive.path}")
+    finally:
+        db.close()
+
+    print("=" * 50)
+    print(f"🎯 عملیات کامل شد. {len(archives)} فایل آرشیو ساخته شد.")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
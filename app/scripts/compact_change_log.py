@@ -0,0 +1,44 @@
+# scripts/compact_change_log.py
+import sys
+import os
+from datetime import datetime
+
+# اضافه کردن مسیر پروژه به sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from app.core.database import SessionLocal, create_database
+from app.services.change_feed_service import apply_change_log_retention, compact_change_log
+
+
+def main():
+    """
+    فشرده‌سازی جدول change_log (فقط آخرین تغییر هر ردیف قدیمی می‌ماند).
+
+    استفاده:
+        python app/scripts/compact_change_log.py             # طبق CHANGE_LOG_RETENTION_DAYS
+        python app/scripts/compact_change_log.py 2024-01-01  # تغییرات قبل از این تاریخ
+    """
+    print("=" * 50)
+    print("🧹 فشرده‌سازی دنباله تغییرات")
+    print("=" * 50)
+
+    create_database()
+
+    db = SessionLocal()
+    try:
+        if len(sys.argv) > 1:
+            deleted = compact_change_log(db, before=datetime.fromisoformat(sys.argv[1]))
+        else:
+            deleted = apply_change_log_retention(db)
+    finally:
+        db.close()
+
+    print("=" * 50)
+    print(f"🎯 عملیات کامل شد. {deleted} ردیف حذف شد.")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# scripts/reconcile_counters.py
+import sys
+import os
+
+# اضافه کردن مسیر پروژه به sys.path
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))
+sys.path.insert(0, project_root)
+
+from app.core.database import SessionLocal, create_database
+from app.services.audit_rollup_service import rebuild_audit_rollups
+from app.services.counter_service import reconcile_counters
+
+
+def main():
+    """بازسازی جدول شمارنده‌ها و آمار زمانی لاگ‌ها از روی داده‌های واقعی."""
+    print("=" * 50)
+    print("🔄 بازسازی شمارنده‌ها")
+    print("=" * 50)
+
+    # اطمینان از وجود جداول و triggerها
+    create_database()
+
+    db = SessionLocal()
+    try:
+        counters = reconcile_counters(db)
+        rollup_rows = rebuild_audit_rollups(db)
+    finally:
+        db.close()
+
+    for name, value in sorted(counters.items()):
+        print(f"  - {name}: {value}")
+
+    print("=" * 50)
+    print(f"🎯 عملیات کامل شد. {len(counters)} شمارنده و {rollup_rows} ردیف آمار زمانی بازسازی شد.")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.confing import settings
+from app.models.student_profile import StudentProfile
+
+# حداکثر طول بازه گزارش (روز)
+ANALYTICS_MAX_RANGE_DAYS = 366
+ANALYTICS_INTERVALS = ("day", "week")
+# هر بازه درخواستی یک کلید cache است؛ تعداد کلیدها محدود می‌ماند
+ANALYTICS_CACHE_MAX_ENTRIES = 256
+
+analytics_cache = TTLCache(
+    ttl_seconds=settings.analytics_cache_ttl_seconds,
+    max_entries=ANALYTICS_CACHE_MAX_ENTRIES,
+)
+
+
+def resolve_date_range(date_from: Optional[date], date_to: Optional[date]) -> Tuple[date, date]:
+    """بازه پیش‌فرض ۳۰ روز اخیر؛ بازه وارونه یا طولانی‌تر از حد مجاز خطای 400 می‌دهد."""
+    date_to = date_to or datetime.now(timezone.utc).date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="date_from باید قبل از date_to باشد")
+    if (date_to - date_from).days + 1 > ANALYTICS_MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"بازه گزارش حداکثر {ANALYTICS_MAX_RANGE_DAYS} روز است",
+        )
+    return date_from, date_to
+
+
+def get_registration_analytics(
+        db: Session,
+        date_from: date,
+        date_to: date,
+        interval: str = "day",
+) -> Dict:
+    """
+    تعداد ثبت‌نام‌ها در هر روز/هفته و قیف ثبت‌نام تا احراز هویت در بازه [date_from, date_to].
+
+    شمارش با GROUP BY روی تاریخ created_at پروفایل‌ها و فقط از ایندکس
+    (created_at, has_authenticated) انجام می‌شود؛ روزهای بدون ثبت‌نام با صفر پر می‌شوند.
+    هفته‌ها از دوشنبه شروع می‌شوند و با تاریخ همان دوشنبه مشخص می‌شوند.
+    """
+    if interval not in ANALYTICS_INTERVALS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="interval باید day یا week باشد")
+
+    day = func.date(StudentProfile.created_at)
+    rows = (
+        db.query(
+            day,
+            func.count(),
+            func.sum(case((StudentProfile.has_authenticated, 1), else_=0)),
+        )
+        .filter(
+            # بازه یک روز بازتر فقط برای پیمایش ایندکس؛ فیلتر دقیق روی همان کلید GROUP BY است،
+            # چون created_at ردیف‌های server_default با قالب 'YYYY-MM-DD HH:MM:SS' ذخیره می‌شود
+            StudentProfile.created_at >= datetime.combine(date_from - timedelta(days=1), time.min),
+            StudentProfile.created_at < datetime.combine(date_to + timedelta(days=2), time.min),
+            day.between(date_from.isoformat(), date_to.isoformat()),
+        )
+        .group_by(day)
+        .all()
+    )
+    daily = {date.fromisoformat(str(row_day)): (registered, int(authenticated or 0))
+             for row_day, registered, authenticated in rows}
+
+    buckets: Dict[date, list] = {}
+    current = date_from
+    while current <= date_to:
+        period = current - timedelta(days=current.weekday()) if interval == "week" else current
+        bucket = buckets.setdefault(period, [0, 0])
+        registered, authenticated = daily.get(current, (0, 0))
+        bucket[0] += registered
+        bucket[1] += authenticated
+        current += timedelta(days=1)
+
+    total_registered = sum(registered for registered, _ in daily.values())
+    total_authenticated = sum(authenticated for _, authenticated in daily.values())
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "interval": interval,
+        "series": [
+            {"period": period.isoformat(), "registered": registered, "authenticated": authenticated}
+            for period, (registered, authenticated) in buckets.items()
+        ],
+        "funnel": {
+            "registered": total_registered,
+            "authenticated": total_authenticated,
+            "not_authenticated": total_registered - total_authenticated,
+            "conversion_rate": (
+                round(total_authenticated * 100 / total_registered, 2) if total_registered else 0.0
+            ),
+        },
+    }
+
+
+def get_cached_registration_analytics(
+        db: Session,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        interval: str = "day",
+) -> Dict:
+    """آمار ثبت‌نام از cache؛ هر بازه و interval کلید جداگانه دارد (ANALYTICS_CACHE_TTL_SECONDS)."""
+    date_from, date_to = resolve_date_range(date_from, date_to)
+    return analytics_cache.get_or_load(
+        ("registrations", date_from, date_to, interval),
+        lambda: get_registration_analytics(db, date_from, date_to, interval),
+    )
+
+
+def get_cohort_breakdown(db: Session, entry_year: Optional[int] = None) -> Dict:
+    """
+    آمار ورودی‌ها: تعداد ثبت‌نام، نسبت احراز هویت و تفکیک جنسیت.
+
+    بدون entry_year هر سال ورود یک ردیف دارد و با entry_year هر دانشکده همان سال.
+    GROUP BY به ترتیب ستون‌های ایندکس ix_student_profiles_cohort است، پس کوئری
+    فقط همان ایندکس را پیمایش می‌کند؛ ادغام گروه‌ها در پایتون انجام می‌شود.
+    """
+    columns = (
+        StudentProfile.entry_year,
+        StudentProfile.faculty_code,
+        StudentProfile.gender,
+        StudentProfile.has_authenticated,
+    )
+    query = db.query(*columns, func.count()).group_by(*columns)
+    if entry_year is not None:
+        query = query.filter(StudentProfile.entry_year == entry_year)
+
+    key_name = "entry_year" if entry_year is None else "faculty_code"
+    cohorts: Dict = {}
+    for year, faculty_code, gender, has_authenticated, count in query.all():
+        key = year if entry_year is None else faculty_code
+        cohort = cohorts.setdefault(key, {key_name: key, "registered": 0, "authenticated": 0, "by_gender": {}})
+        cohort["registered"] += count
+        if has_authenticated:
+            cohort["authenticated"] += count
+        cohort["by_gender"][gender] = cohort["by_gender"].get(gender, 0) + count
+
+    # ورودی‌هایی که شماره دانشجویی‌شان قابل تجزیه نبود (None) در انتها
+    ordered = sorted(cohorts.values(), key=lambda item: (item[key_name] is None, item[key_name] or 0))
+    for cohort in ordered:
+        cohort["authenticated_ratio"] = round(cohort["authenticated"] / cohort["registered"], 4)
+    return {"entry_year": entry_year, "group_by": key_name, "cohorts": ordered}
+
+
+def get_cached_cohort_breakdown(db: Session, entry_year: Optional[int] = None) -> Dict:
+    """آمار ورودی‌ها از cache (ANALYTICS_CACHE_TTL_SECONDS)."""
+    return analytics_cache.get_or_load(
+        ("cohorts", entry_year),
+        lambda: get_cohort_breakdown(db, entry_year),
+    )
@@ -0,0 +1,303 @@
+import gzip
+import heapq
+import json
+import logging
+import os
+from collections import Counter as TallyCounter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, inspect
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.confing import settings
+from app.core.query_utils import to_naive_utc
+from app.models.audit_archive import AuditArchive, AuditArchiveCount
+from app.models.audit_log import AuditLog
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_ROW_FIELDS = ("id", "user_id", "action", "entity", "entity_id", "description", "ip_address", "created_at")
+
+
+def _month_start(value: datetime) -> datetime:
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _next_month(value: datetime) -> datetime:
+    return (_month_start(value) + timedelta(days=32)).replace(day=1)
+
+
+def _sort_key(log: AuditLog) -> Tuple[datetime, int]:
+    return log.created_at, log.id
+
+
+def _log_to_json(log: AuditLog) -> str:
+    row = {field: getattr(log, field) for field in _ROW_FIELDS}
+    row["created_at"] = log.created_at.isoformat()
+    return json.dumps(row, ensure_ascii=False)
+
+
+def _read_archive(path: str) -> Iterator[AuditLog]:
+    """خواندن تدریجی یک فایل آرشیو (بدون بارگذاری کل فایل در حافظه)."""
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            row["created_at"] = datetime.fromisoformat(row["created_at"])
+            # شیء transient؛ به session اضافه نمی‌شود
+            yield AuditLog(**row)
+
+
+# ۱. انتقال لاگ‌های قدیمی به آرشیو
+def _archive_month(
+        db: Session,
+        month: datetime,
+        archive_dir: str,
+        batch_size: int,
+) -> Optional[AuditArchive]:
+    period = month.strftime("%Y-%m")
+    in_month = (
+        AuditLog.created_at >= month,
+        AuditLog.created_at < _next_month(month),
+    )
+
+    part = db.query(func.count(AuditArchive.id)).filter(AuditArchive.period == period).scalar() + 1
+    path = os.path.abspath(os.path.join(archive_dir, f"audit-{period}-{part:03d}.ndjson.gz"))
+    temp_path = path + ".tmp"
+
+    row_count = 0
+    first_created_at = last_created_at = None
+    max_id = 0
+    counts: TallyCounter = TallyCounter()
+    query = (
+        db.query(AuditLog)
+        .filter(*in_month)
+        .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+        .yield_per(batch_size)
+    )
+    with gzip.open(temp_path, "wt", encoding="utf-8") as handle:
+        for log in query:
+            handle.write(_log_to_json(log) + "\n")
+            if last_created_at is None:
+                last_created_at = log.created_at
+            first_created_at = log.created_at
+            max_id = max(max_id, log.id)
+            counts[(log.action, log.user_id)] += 1
+            row_count += 1
+
+    if not row_count:
+        os.remove(temp_path)
+        return None
+    os.replace(temp_path, path)
+
+    archive = AuditArchive(
+        period=period,
+        path=path,
+        row_count=row_count,
+        first_created_at=first_created_at,
+        last_created_at=last_created_at,
+        counts=[
+            AuditArchiveCount(action=action, user_id=user_id, count=count)
+            for (action, user_id), count in counts.items()
+        ],
+    )
+    try:
+        db.add(archive)
+        # فقط ردیف‌هایی که در فایل نوشته شده‌اند حذف می‌شوند
+        db.query(AuditLog).filter(*in_month, AuditLog.id <= max_id).delete(synchronize_session=False)
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        os.remove(path)
+        logger.exception("Failed to archive audit logs for %s", period)
+        raise
+
+    logger.info("Archived %s audit logs for %s into %s", row_count, period, path)
+    return archive
+
+
+def archive_audit_logs(
+        db: Session,
+        before: datetime,
+        archive_dir: Optional[str] = None,
+        batch_size: int = 1000,
+) -> List[AuditArchive]:
+    """
+    انتقال لاگ‌های ماه‌های کامل قبل از before به فایل‌های آرشیو.
+
+    هر ماه در یک تراکنش جدا منتقل می‌شود: ابتدا فایل نوشته می‌شود و سپس ردیف
+    فهرست ثبت و ردیف‌های جدول اصلی حذف می‌شوند.
+    """
+    archive_dir = archive_dir or settings.audit_archive_dir
+    os.makedirs(archive_dir, exist_ok=True)
+
+    cutoff = _month_start(before)
+    oldest = db.query(func.min(AuditLog.created_at)).filter(AuditLog.created_at < cutoff).scalar()
+
+    archives = []
+    month = _month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        archive = _archive_month(db, month, archive_dir, batch_size)
+        if archive:
+            archives.append(archive)
+        month = _next_month(month)
+    return archives
+
+
+def apply_retention(
+        db: Session,
+        now: Optional[datetime] = None,
+        archive_dir: Optional[str] = None,
+) -> List[AuditArchive]:
+    """اعمال سیاست نگهداری AUDIT_RETENTION_DAYS (صفر یعنی غیرفعال)."""
+    if settings.audit_retention_days <= 0:
+        return []
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return archive_audit_logs(
+        db,
+        before=now - timedelta(days=settings.audit_retention_days),
+        archive_dir=archive_dir,
+    )
+
+
+# ۲. خواندن آرشیو
+def iter_archived_logs(
+        db: Session,
+        before: Optional[Tuple[datetime, int]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+) -> Iterator[AuditLog]:
+    """
+    لاگ‌های آرشیوشده به ترتیب جدیدترین اول، با همان فیلترهای جدول اصلی.
+
+    فقط فایل‌هایی که با بازه زمانی هم‌پوشانی دارند باز می‌شوند.
+    before کلید (created_at, id) آخرین ردیف دیده‌شده است (مثل cursor صفحه‌بندی).
+    زمان‌های آرشیو UTC بدون tzinfo هستند، پس فیلترهای زمانی هم به همین قالب تبدیل می‌شوند.
+    """
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+    query = db.query(AuditArchive.path)
+    if date_from:
+        query = query.filter(AuditArchive.last_created_at >= date_from)
+    if date_to:
+        query = query.filter(AuditArchive.first_created_at <= date_to)
+    if before:
+        query = query.filter(AuditArchive.first_created_at <= before[0])
+    paths = [path for (path,) in query.order_by(AuditArchive.last_created_at.desc())]
+    if not paths:
+        return
+
+    streams = [_read_archive(path) for path in paths]
+    for log in heapq.merge(*streams, key=_sort_key, reverse=True):
+        if before and _sort_key(log) >= tuple(before):
+            continue
+        if date_to and log.created_at > date_to:
+            continue
+        if date_from and log.created_at < date_from:
+            return
+        if action and log.action != action:
+            continue
+        if user_id is not None and log.user_id != user_id:
+            continue
+        yield log
+
+
+def merge_with_archive(hot_logs: Iterable[AuditLog], archived_logs: Iterable[AuditLog]) -> Iterator[AuditLog]:
+    """ادغام لاگ‌های جدول اصلی و آرشیو با حفظ ترتیب (created_at, id) نزولی."""
+    return heapq.merge(hot_logs, archived_logs, key=_sort_key, reverse=True)
+
+
+def attach_users(db: Session, logs: List[AuditLog], with_profile: bool = False) -> None:
+    """
+    بارگذاری کاربر لاگ‌ها (از جمله لاگ‌های آرشیوی transient) با یک کوئری برای نمایش در template.
+
+    با with_profile پروفایل کاربران هم در همان کوئری (JOIN) خوانده می‌شود.
+    """
+    pending = [
+        log for log in logs
+        if log.id is not None and log.user_id and "user" in inspect(log).unloaded
+    ]
+    if not pending:
+        return
+    query = db.query(User).filter(User.id.in_({log.user_id for log in pending}))
+    if with_profile:
+        query = query.options(joinedload(User.profile))
+    users: Dict[int, User] = {user.id: user for user in query}
+    for log in pending:
+        set_committed_value(log, "user", users.get(log.user_id))
+
+
+# ۳. آمار آرشیو
+def get_archived_total(db: Session) -> int:
+    """تعداد کل لاگ‌های آرشیوشده (از فهرست آرشیو، بدون باز کردن فایل‌ها)."""
+    return int(db.query(func.coalesce(func.sum(AuditArchive.row_count), 0)).scalar())
+
+
+def count_archived_logs(
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+) -> int:
+    """
+    تعداد لاگ‌های آرشیوی منطبق با فیلترها.
+
+    آرشیوهایی که کاملاً داخل بازه زمانی هستند از جدول audit_archive_counts شمرده
+    می‌شوند؛ فقط فایل‌هایی که بازه از وسط آن‌ها می‌گذرد (یا شمارش ندارند) باز می‌شوند.
+    """
+    if not (date_from or date_to or action or user_id is not None):
+        return get_archived_total(db)
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+
+    query = db.query(AuditArchive.id, AuditArchive.path, AuditArchive.first_created_at, AuditArchive.last_created_at)
+    if date_from:
+        query = query.filter(AuditArchive.last_created_at >= date_from)
+    if date_to:
+        query = query.filter(AuditArchive.first_created_at <= date_to)
+    archives = query.all()
+    if not archives:
+        return 0
+
+    indexed = {
+        archive_id for (archive_id,) in db.query(AuditArchiveCount.archive_id)
+        .filter(AuditArchiveCount.archive_id.in_([archive.id for archive in archives]))
+        .distinct()
+    }
+    covered, partial = [], []
+    for archive in archives:
+        inside = (
+            (not date_from or archive.first_created_at >= date_from)
+            and (not date_to or archive.last_created_at <= date_to)
+        )
+        (covered if inside and archive.id in indexed else partial).append(archive)
+
+    total = 0
+    if covered:
+        count_query = db.query(func.coalesce(func.sum(AuditArchiveCount.count), 0)).filter(
+            AuditArchiveCount.archive_id.in_([archive.id for archive in covered])
+        )
+        if action:
+            count_query = count_query.filter(AuditArchiveCount.action == action)
+        if user_id is not None:
+            count_query = count_query.filter(AuditArchiveCount.user_id == user_id)
+        total += int(count_query.scalar())
+
+    for archive in partial:
+        for log in _read_archive(archive.path):
+            if date_from and log.created_at < date_from:
+                break
+            if date_to and log.created_at > date_to:
+                continue
+            if action and log.action != action:
+                continue
+            if user_id is not None and log.user_id != user_id:
+                continue
+            total += 1
+    return total
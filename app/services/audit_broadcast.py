@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from threading import Lock
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.core.confing import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AuditSubscription:
+    """
+    یک مشترک جریان زنده لاگ‌ها با بافر محدود.
+
+    اگر مشترک کُند باشد و بافر پر شود، قدیمی‌ترین رویداد حذف و شمارنده missed
+    افزایش پیدا می‌کند؛ انتشار هیچ‌وقت منتظر مشترک نمی‌ماند.
+    """
+
+    def __init__(
+            self,
+            loop: asyncio.AbstractEventLoop,
+            buffer_size: int,
+            actions: Optional[Set[str]] = None,
+            user_id: Optional[int] = None,
+            entity: Optional[str] = None,
+    ):
+        self.loop = loop
+        self.actions = actions
+        self.user_id = user_id
+        self.entity = entity
+        self.missed = 0
+        self._queue: "asyncio.Queue[Dict]" = asyncio.Queue(maxsize=max(1, buffer_size))
+
+    def matches(self, event: Dict) -> bool:
+        if self.actions and event.get("action") not in self.actions:
+            return False
+        if self.user_id is not None and event.get("user_id") != self.user_id:
+            return False
+        if self.entity and event.get("entity") != self.entity:
+            return False
+        return True
+
+    def _push(self, event: Dict) -> None:
+        # فقط در thread حلقه رویداد مشترک اجرا می‌شود
+        if self._queue.full():
+            self._queue.get_nowait()
+            self.missed += 1
+        self._queue.put_nowait(event)
+
+    async def get(self) -> Dict:
+        return await self._queue.get()
+
+
+class AuditBroadcaster:
+    """
+    پخش درون‌پردازه‌ای رویدادهای ممیزیِ نوشته‌شده برای مشترکین SSE.
+
+    publish از هر threadی (از جمله thread نوشتن audit sink) قابل فراخوانی است و
+    رویدادها با call_soon_threadsafe به حلقه رویداد هر مشترک منتقل می‌شوند.
+    """
+
+    def __init__(self, max_subscribers: int = 100):
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[AuditSubscription] = set()
+        self._lock = Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def subscribe(
+            self,
+            buffer_size: int = 100,
+            actions: Optional[Iterable[str]] = None,
+            user_id: Optional[int] = None,
+            entity: Optional[str] = None,
+    ) -> Optional[AuditSubscription]:
+        """ثبت مشترک جدید (داخل حلقه رویداد)؛ در صورت پر بودن ظرفیت None برمی‌گرداند."""
+        subscription = AuditSubscription(
+            loop=asyncio.get_running_loop(),
+            buffer_size=buffer_size,
+            actions=set(actions) if actions else None,
+            user_id=user_id,
+            entity=entity,
+        )
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: AuditSubscription) -> None:
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def publish(self, events: List[Dict]) -> None:
+        """ارسال رویدادها به مشترکینی که فیلترشان منطبق است."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        if not subscribers:
+            return
+
+        for subscription in subscribers:
+            matching = [event for event in events if subscription.matches(event)]
+            if not matching:
+                continue
+            try:
+                for event in matching:
+                    subscription.loop.call_soon_threadsafe(subscription._push, event)
+            except RuntimeError:
+                # حلقه رویداد مشترک بسته شده است
+                self.unsubscribe(subscription)
+                logger.debug("Dropped audit stream subscriber with closed event loop")
+
+
+audit_broadcaster = AuditBroadcaster(max_subscribers=settings.audit_stream_max_clients)
@@ -0,0 +1,165 @@
+import logging
+from collections import Counter as TallyCounter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.query_utils import to_naive_utc
+from app.models.audit_log import AuditLog
+from app.models.audit_rollup import ROLLUP_BUCKETS, ROLLUP_DIMENSIONS, AuditRollup
+from app.services.audit_archive_service import iter_archived_logs
+
+logger = logging.getLogger(__name__)
+
+# حداکثر بازه برای سری ساعتی (برای محدود ماندن حجم پاسخ)
+MAX_HOURLY_RANGE = timedelta(days=92)
+
+_BUCKET_FORMATS = {
+    "hour": "%Y-%m-%d %H:00",
+    "day": "%Y-%m-%d",
+}
+_BUCKET_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+
+
+def _bucket_label(value: datetime, granularity: str) -> str:
+    return value.strftime(_BUCKET_FORMATS[granularity])
+
+
+def _iter_buckets(date_from: datetime, date_to: datetime, granularity: str) -> List[str]:
+    """همه bucketهای بازه (شامل bucketهای خالی) برای محور زمان نمودار."""
+    if granularity == "hour":
+        current = date_from.replace(minute=0, second=0, microsecond=0)
+    else:
+        current = date_from.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    buckets = []
+    while current <= date_to:
+        buckets.append(_bucket_label(current, granularity))
+        current += _BUCKET_STEPS[granularity]
+    return buckets
+
+
+# ۱. سری زمانی
+def get_audit_timeseries(
+        db: Session,
+        date_from: datetime,
+        date_to: datetime,
+        granularity: str = "day",
+        group_by: Optional[str] = None,
+        top: int = 10,
+) -> Dict:
+    """
+    سری زمانی تعداد لاگ‌ها از جدول rollup (بدون اسکن audit_logs).
+
+    بدون group_by فقط سری «total» برگردانده می‌شود؛ با group_by برای هر مقدار
+    (حداکثر top مقدار پرتکرار) یک سری جدا ساخته می‌شود. طول هر سری برابر buckets است.
+    bucketها به وقت UTC هستند؛ بازه با tzinfo ابتدا به UTC بدون tzinfo تبدیل می‌شود.
+    """
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+    if granularity not in ROLLUP_BUCKETS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="granularity نامعتبر است")
+    if group_by is not None and group_by not in ROLLUP_DIMENSIONS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="group_by نامعتبر است")
+    if date_to < date_from:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="بازه تاریخ نامعتبر است")
+    if granularity == "hour" and date_to - date_from > MAX_HOURLY_RANGE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="بازه سری ساعتی حداکثر ۹۲ روز است",
+        )
+
+    buckets = _iter_buckets(date_from, date_to, granularity)
+    positions = {bucket: index for index, bucket in enumerate(buckets)}
+
+    # هر لاگ دقیقاً یک action دارد، پس جمع بُعد action برابر کل است
+    query = db.query(AuditRollup.bucket, AuditRollup.key, AuditRollup.count).filter(
+        AuditRollup.granularity == granularity,
+        AuditRollup.dimension == (group_by or "action"),
+        AuditRollup.bucket >= buckets[0],
+        AuditRollup.bucket <= buckets[-1],
+    )
+
+    series: Dict[str, List[int]] = {}
+    totals: TallyCounter = TallyCounter()
+    for bucket, key, count in query:
+        name = key if group_by else "total"
+        points = series.setdefault(name, [0] * len(buckets))
+        points[positions[bucket]] += count
+        totals[name] += count
+
+    if group_by:
+        keep = {name for name, _ in totals.most_common(max(1, top))}
+        series = {name: points for name, points in series.items() if name in keep}
+    else:
+        series.setdefault("total", [0] * len(buckets))
+
+    return {
+        "granularity": granularity,
+        "group_by": group_by,
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "buckets": buckets,
+        "series": series,
+        "totals": dict(totals.most_common()),
+    }
+
+
+# ۲. بازسازی
+def rebuild_audit_rollups(db: Session) -> int:
+    """
+    بازسازی کامل rollupها از audit_logs و فایل‌های آرشیو.
+
+    برای اصلاح انحراف احتمالی یا پر کردن جدول در دیتابیس‌های قدیمی استفاده می‌شود.
+    """
+    try:
+        db.execute(text("DELETE FROM audit_rollups"))
+        for granularity, bucket_sql in ROLLUP_BUCKETS.items():
+            for dimension, column in ROLLUP_DIMENSIONS.items():
+                db.execute(text(
+                    "INSERT INTO audit_rollups (granularity, dimension, bucket, key, count) "
+                    f"SELECT '{granularity}', '{dimension}', {bucket_sql.format(column='created_at')}, "
+                    f"IFNULL({column}, ''), COUNT(*) FROM audit_logs GROUP BY 3, 4"
+                ))
+
+        archived = TallyCounter()
+        for log in iter_archived_logs(db):
+            for granularity in ROLLUP_BUCKETS:
+                bucket = _bucket_label(log.created_at, granularity)
+                for dimension, column in ROLLUP_DIMENSIONS.items():
+                    value = getattr(log, column)
+                    archived[(granularity, dimension, bucket, "" if value is None else str(value))] += 1
+
+        if archived:
+            db.execute(
+                text(
+                    "INSERT INTO audit_rollups (granularity, dimension, bucket, key, count) "
+                    "VALUES (:granularity, :dimension, :bucket, :key, :count) "
+                    "ON CONFLICT(granularity, dimension, bucket, key) "
+                    "DO UPDATE SET count = audit_rollups.count + excluded.count"
+                ),
+                [
+                    {"granularity": g, "dimension": d, "bucket": b, "key": k, "count": c}
+                    for (g, d, b, k), c in archived.items()
+                ],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Audit rollup rebuild failed")
+        raise
+
+    rows = db.query(func.count()).select_from(AuditRollup).scalar()
+    logger.info("Audit rollups rebuilt: %s rows", rows)
+    return rows
+
+
+def ensure_rollups_initialized(db: Session) -> None:
+    """اگر جدول rollup خالی باشد ولی لاگ وجود داشته باشد، آن را پر می‌کند."""
+    if db.query(AuditRollup.key).first() is None and db.query(AuditLog.id).first() is not None:
+        rebuild_audit_rollups(db)
@@ -1,112 +1,444 @@
-from fastapi import Request
-from datetime import datetime
+import heapq
+import logging
+import random
+from fastapi import HTTPException, Request, status
+from datetime import datetime, timezone
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Dict, List, Optional
+from sqlalchemy import Float, Integer, func, or_, text
+from itertools import chain, islice
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from app.core.confing import settings
+from app.core.database import SessionLocal
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.query_utils import build_search_match, search_page_window, to_naive_utc
 from app.models.audit_log import AuditLog
+from app.models.audit_search import AUDIT_SEARCH_TABLE
 from app.models.user import User
+from app.services.audit_archive_service import (
+    attach_users,
+    count_archived_logs,
+    get_archived_total,
+    iter_archived_logs,
+    merge_with_archive,
+)
+from app.services.audit_broadcast import audit_broadcaster
+from app.services.audit_sink import audit_sink
+from app.services.counter_service import get_counter, get_counters_by_prefix
+from app.services.export_service import parse_fields
+
+logger = logging.getLogger(__name__)
+
+
+class AuditAction:
+    """نام عملیات‌هایی که به صورت خودکار ثبت می‌شوند."""
+    REGISTER = "REGISTER"
+    LOGIN = "LOGIN"
+    LOGIN_FAILED = "LOGIN_FAILED"
+    ADMIN_LOGIN = "ADMIN_LOGIN"
+    ADMIN_LOGIN_FAILED = "ADMIN_LOGIN_FAILED"
+    ADMIN_LOGOUT = "ADMIN_LOGOUT"
+    UPDATE_PROFILE = "UPDATE_PROFILE"
+    ADMIN_UPDATE = "ADMIN_UPDATE"
+    ADMIN_BULK_UPDATE = "ADMIN_BULK_UPDATE"
+    ADMIN_PERMISSION_GRANT = "ADMIN_PERMISSION_GRANT"
+    ADMIN_PERMISSION_REVOKE = "ADMIN_PERMISSION_REVOKE"
+
+
+# نرخ نمونه‌برداری برای رویدادهای پرتکرار (AUDIT_SAMPLE_RATES، مثلاً LOGIN=0.1)
+AUDIT_SAMPLE_RATES: Dict[str, float] = dict(settings.audit_sample_rates)
+
+
+def _client_ip(request: Optional[Request]) -> Optional[str]:
+    client = getattr(request, "client", None) if request is not None else None
+    return client.host if client else None
 
 
 # ۱. ایجاد لاگ
 def create_audit_log(
-        db: Session,
+        db: Session | None,
         action: str,
-        request: Request,
+        request: Request | None = None,
         user: User | None = None,
         entity: str | None = None,
         entity_id: int | None = None,
         description: str | None = None,
+) -> bool:
+    """
+    ایجاد یک لاگ جدید
+
+    اگر audit sink در حال اجرا باشد، رویداد فقط در صف قرار می‌گیرد و به صورت دسته‌ای
+    نوشته می‌شود؛ در غیر این صورت (اسکریپت‌ها، تست‌ها یا پس از توقف sink) مستقیماً با
+    همان session، یا اگر session داده نشده با یک session کوتاه‌عمر، commit می‌شود.
+    خطای ثبت لاگ هیچ‌وقت به فراخواننده منتقل نمی‌شود.
+
+    Returns:
+        True اگر رویداد ثبت یا در صف قرار گرفت؛ False اگر نمونه‌برداری یا حذف شد.
+    """
+    sample_rate = AUDIT_SAMPLE_RATES.get(action, 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        return False
+
+    event = {
+        "user_id": user.id if user else None,
+        "action": action,
+        "entity": entity,
+        "entity_id": entity_id,
+        "description": description[:255] if description else description,
+        "ip_address": _client_ip(request),
+        "created_at": datetime.now(timezone.utc),
+    }
+
+    if audit_sink.is_running:
+        return audit_sink.submit(event)
+
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
+    try:
+        db.add(AuditLog(**event))
+        db.commit()
+    except SQLAlchemyError:
+        db.rollback()
+        logger.exception("Failed to write audit log: action=%s", action)
+        return False
+    finally:
+        if owns_session:
+            db.close()
+    audit_broadcaster.publish([event])
+    return True
+
+
+# فیلترهای مشترک لیست لاگ‌ها، صفحه ادمین و خروجی‌ها
+def build_audit_logs_query(
+        db: Session,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
 ):
-    """ایجاد یک لاگ جدید"""
-    log = AuditLog(
-        user_id=user.id if user else None,
-        action=action,
-        entity=entity,
-        entity_id=entity_id,
-        description=description,
-        ip_address=request.client.host if request.client else None,
+    """
+    کوئری فیلترشده لاگ‌ها به ترتیب جدیدترین اول.
+
+    ترتیب (created_at, id) با ایندکس‌های ix_audit_logs_* پوشش داده می‌شود.
+    """
+    query = db.query(AuditLog)
+
+    if date_from:
+        query = query.filter(AuditLog.created_at >= date_from)
+    if date_to:
+        query = query.filter(AuditLog.created_at <= date_to)
+    if action:
+        query = query.filter(AuditLog.action == action)
+    if user_id is not None:
+        query = query.filter(AuditLog.user_id == user_id)
+
+    return query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+
+
+def _search_audit_logs(
+        db: Session,
+        query,
+        match: str,
+        limit: int,
+        cursor: Optional[str],
+        include_total: bool,
+) -> Dict:
+    """جستجوی متنی با رتبه‌بندی bm25 و صفحه‌بندی بر اساس جایگاه در رتبه‌بندی (search_page_window)."""
+    matches = (
+        text(
+            f"SELECT rowid AS id, bm25({AUDIT_SEARCH_TABLE}) AS score "
+            f"FROM {AUDIT_SEARCH_TABLE} WHERE {AUDIT_SEARCH_TABLE} MATCH :match"
+        )
+        .bindparams(match=match)
+        .columns(id=Integer, score=Float)
+        .subquery("matches")
     )
-    db.add(log)
-    db.commit()
+    query = query.join(matches, matches.c.id == AuditLog.id).order_by(None)
 
+    total = query.count() if include_total else None
 
-# ۲. آمار ساده
-def get_simple_audit_stats(db: Session) -> Dict:
-    """آمار ساده لاگ‌ها"""
-    total_logs = db.query(AuditLog).count()
+    cursor_offset = None
+    if cursor:
+        # cursorهای جستجو با برچسب "fts" از cursorهای زمانی جدا می‌شوند
+        tag, cursor_offset = decode_cursor(cursor, size=2)
+        if tag != "fts" or not isinstance(cursor_offset, int) or cursor_offset < 0:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor صفحه‌بندی نامعتبر است")
+    offset, window = search_page_window(cursor_offset, limit)
 
-    actions = (
-        db.query(AuditLog.action, func.count(AuditLog.id))
-        .group_by(AuditLog.action)
+    # امتیاز bm25 منفی است؛ مرتب‌سازی صعودی یعنی مرتبط‌ترین اول
+    rows = (
+        query.add_columns(matches.c.score)
+        .order_by(matches.c.score, AuditLog.id.desc())
+        .offset(offset)
+        .limit(window)
         .all()
-    )
+    ) if window else []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = encode_cursor("fts", offset + limit) if has_more else None
 
-    actions_dict: Dict[str, int] = {
-        action: count for action, count in actions
+    return {
+        "logs": [log for log, _ in rows],
+        "total": total,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
     }
 
+
+# ۲. آمار ساده
+def get_simple_audit_stats(db: Session) -> Dict:
+    """آمار ساده لاگ‌ها (از جدول شمارنده‌ها، بدون اسکن audit_logs)"""
     return {
-        "total_logs": total_logs,
-        "actions": actions_dict,
+        "total_logs": get_counter(db, "audit_logs.total"),
+        "archived_logs": get_archived_total(db),
+        "actions": get_counters_by_prefix(db, "audit_logs.action:"),
     }
 
 
-# ۳. لیست لاگ‌ها با تاریخ و ساعت
+# ۳. لیست لاگ‌ها با تاریخ و ساعت (صفحه‌بندی keyset روی (created_at, id))
 def get_audit_logs(
         db: Session,
-        skip: int = 0,
         limit: int = 50,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
         date_from: Optional[datetime] = None,
         date_to: Optional[datetime] = None,
         action: Optional[str] = None,
         user_id: Optional[int] = None,
+        include_archived: bool = True,
+        q: Optional[str] = None,
+        with_users: bool = False,
 ) -> Dict:
     """
     دریافت لیست لاگ‌ها با تاریخ و ساعت
 
+    به‌جای offset از cursor استفاده می‌شود تا هزینه صفحات عمیق ثابت بماند.
+    با include_total=False شمارش کل (COUNT روی همه ردیف‌های فیلترشده) انجام نمی‌شود.
+    وقتی ردیف‌های جدول اصلی تمام شوند، صفحه از فایل‌های آرشیو ادامه پیدا می‌کند.
+    با q نتایج جستجوی متنی (ایندکس FTS5 جدول اصلی، بدون آرشیو) به ترتیب ارتباط برگردانده می‌شوند.
+    با with_users کاربر و پروفایل همه لاگ‌های صفحه با یک کوئری بارگذاری می‌شوند (بدون N+1 در template).
+
     Returns:
         {
-            "logs": List[AuditLog],  # لیست لاگ‌ها
-            "total": int,            # تعداد کل لاگ‌ها
-            "skip": int,             # تعداد رد شده
-            "limit": int,            # تعداد نمایش داده شده
-            "has_more": bool         # آیا لاگ بیشتری وجود دارد؟
+            "logs": List[AuditLog],        # لیست لاگ‌ها
+            "total": Optional[int],        # تعداد کل لاگ‌ها (یا None)
+            "limit": int,                  # تعداد نمایش داده شده
+            "has_more": bool,              # آیا لاگ بیشتری وجود دارد؟
+            "next_cursor": Optional[str],  # cursor صفحه بعد
         }
     """
-    query = db.query(AuditLog)
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+    query = build_audit_logs_query(
+        db,
+        date_from=date_from,
+        date_to=date_to,
+        action=action,
+        user_id=user_id,
+    )
 
-    # فیلترها
-    if date_from:
-        query = query.filter(AuditLog.created_at >= date_from)
-    if date_to:
-        query = query.filter(AuditLog.created_at <= date_to)
-    if action:
-        query = query.filter(AuditLog.action == action)
-    if user_id:
-        query = query.filter(AuditLog.user_id == user_id)
+    match = build_search_match(q)
+    if match:
+        result = _search_audit_logs(db, query, match, limit, cursor, include_total)
+        if with_users:
+            attach_users(db, result["logs"], with_profile=True)
+        return result
 
-    # تعداد کل
-    total = query.count()
+    filters = {"date_from": date_from, "date_to": date_to, "action": action, "user_id": user_id}
 
-    # دریافت لاگ‌ها با مرتب‌سازی بر اساس تاریخ و ساعت (جدیدترین اول)
-    logs = (
-        query
-        .order_by(AuditLog.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+    # تعداد کل (اختیاری)
+    total = None
+    if include_total:
+        total = query.order_by(None).count()
+        if include_archived:
+            total += count_archived_logs(db, **filters)
+
+    cursor_key = None
+    if cursor:
+        cursor_key = decode_cursor(cursor, size=2)
+        cursor_created_at, cursor_id = cursor_key
+        # معادل (created_at, id) < (cursor_created_at, cursor_id) به شکلی که روی ایندکس created_at جستجو شود
+        query = query.filter(
+            AuditLog.created_at <= cursor_created_at,
+            or_(
+                AuditLog.created_at < cursor_created_at,
+                AuditLog.id < cursor_id,
+            ),
+        )
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    logs = query.limit(limit + 1).all()
+
+    # جدول اصلی تمام شده است؛ ادامه صفحه از آرشیو
+    if include_archived and len(logs) <= limit:
+        archived = iter_archived_logs(db, before=cursor_key, **filters)
+        logs = list(islice(merge_with_archive(logs, archived), limit + 1))
+        attach_users(db, logs, with_profile=with_users)
+
+    has_more = len(logs) > limit
+    logs = logs[:limit]
+    if with_users:
+        attach_users(db, logs, with_profile=True)
+
+    next_cursor = None
+    if has_more and logs:
+        next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
 
     return {
         "logs": logs,
         "total": total,
-        "skip": skip,
         "limit": limit,
-        "has_more": (skip + limit) < total,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
     }
 
 
+def iter_audit_logs(
+        db: Session,
+        batch_size: int = 1000,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+        q: Optional[str] = None,
+) -> Iterator[AuditLog]:
+    """
+    پیمایش همه لاگ‌های فیلترشده (جدول اصلی و سپس آرشیو).
+
+    جدول اصلی به صورت دسته‌ای با همان cursor صفحه‌بندی خوانده می‌شود و هر فایل
+    آرشیو فقط یک بار به صورت جریانی باز می‌شود. با q فقط نتایج جستجوی متنی
+    (به ترتیب ارتباط) برگردانده می‌شوند.
+    """
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+    filters = {"date_from": date_from, "date_to": date_to, "action": action, "user_id": user_id}
+    searching = build_search_match(q) is not None
+
+    def hot_logs() -> Iterator[AuditLog]:
+        cursor = None
+        while True:
+            page = get_audit_logs(
+                db,
+                limit=batch_size,
+                cursor=cursor,
+                include_total=False,
+                include_archived=False,
+                q=q,
+                **filters,
+            )
+            yield from page["logs"]
+            cursor = page["next_cursor"]
+            if not cursor:
+                return
+
+    if searching:
+        yield from hot_logs()
+        return
+
+    yield from merge_with_archive(hot_logs(), iter_archived_logs(db, **filters))
+
+
+# فیلدهای خروجی فایل: نام فیلد (همان نام ستون مدل) -> (عنوان CSV/Excel، ستون)
+AUDIT_EXPORT_FIELDS = {
+    "id": ("ID", AuditLog.id),
+    "user_id": ("User ID", AuditLog.user_id),
+    "action": ("Action", AuditLog.action),
+    "entity": ("Entity", AuditLog.entity),
+    "entity_id": ("Entity ID", AuditLog.entity_id),
+    "description": ("Description", AuditLog.description),
+    "ip_address": ("IP Address", AuditLog.ip_address),
+    "created_at": ("Created At", AuditLog.created_at),
+}
+AUDIT_EXPORT_HEADER = tuple(title for title, _ in AUDIT_EXPORT_FIELDS.values())
+
+
+def parse_export_fields(columns: Optional[str]) -> Tuple[str, ...]:
+    """تبدیل پارامتر columns (مثلاً «id,action,created_at») به لیست فیلدهای خروجی لاگ."""
+    return parse_fields(columns, AUDIT_EXPORT_FIELDS)
+
+
+def export_header(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """عنوان ستون‌های CSV/Excel برای فیلدهای انتخاب‌شده."""
+    return tuple(AUDIT_EXPORT_FIELDS[field][0] for field in fields)
+
+
+def iter_audit_log_rows(
+        db: Session,
+        batch_size: int = 1000,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        action: Optional[str] = None,
+        user_id: Optional[int] = None,
+        q: Optional[str] = None,
+        until_id: Optional[int] = None,
+        fields: Optional[Tuple[str, ...]] = None,
+) -> Iterator[Tuple]:
+    """
+    ردیف‌های خروجی (tuple به ترتیب fields) برای فایل‌های بزرگ.
+
+    جدول اصلی با projection فقط همان ستون‌ها و yield_per خوانده می‌شود (بدون ساخت
+    شیء ORM) و در صورت وجود آرشیو با آن ادغام می‌شود؛ مصرف حافظه به اندازه یک دسته است.
+    با until_id لاگ‌هایی که بعد از آن شناسه ثبت شده‌اند کنار گذاشته می‌شوند
+    (خروجی دقیقاً مطابق نسخه‌ای از داده که برایش ساخته شده است).
+    """
+    fields = tuple(fields or AUDIT_EXPORT_FIELDS)
+    columns = [AUDIT_EXPORT_FIELDS[field][1] for field in fields]
+    date_from, date_to = to_naive_utc(date_from), to_naive_utc(date_to)
+    filters = {"date_from": date_from, "date_to": date_to, "action": action, "user_id": user_id}
+
+    def project(log: AuditLog) -> Tuple:
+        return tuple(getattr(log, field) for field in fields)
+
+    # نتایج جستجو به ترتیب ارتباط هستند و از مسیر صفحه‌بندی جستجو خوانده می‌شوند
+    if build_search_match(q):
+        for log in iter_audit_logs(db, batch_size=batch_size, q=q, **filters):
+            if until_id is None or log.id <= until_id:
+                yield project(log)
+        return
+
+    hot_rows = build_audit_logs_query(db, **filters)
+    if until_id is not None:
+        hot_rows = hot_rows.filter(AuditLog.id <= until_id)
+
+    archived = iter_archived_logs(db, **filters)
+    first_archived = next(archived, None)
+    if first_archived is None:
+        for row in hot_rows.with_entities(*columns).yield_per(batch_size):
+            yield tuple(row)
+        return
+
+    # با وجود آرشیو، کلید مرتب‌سازی (created_at, id) هم خوانده می‌شود تا ادغام مرتب بماند
+    keyed_hot = (
+        (row[-2], row[-1], tuple(row[:-2]))
+        for row in hot_rows.with_entities(
+            *columns,
+            AuditLog.created_at.label("sort_created_at"),
+            AuditLog.id.label("sort_id"),
+        ).yield_per(batch_size)
+    )
+    keyed_archived = (
+        (log.created_at, log.id, project(log))
+        for log in chain([first_archived], archived)
+    )
+    for _, _, row in heapq.merge(keyed_hot, keyed_archived, key=lambda item: item[:2], reverse=True):
+        yield row
+
+
+def get_audit_data_version(db: Session) -> Tuple[int, str]:
+    """
+    نسخه فعلی داده لاگ‌ها برای کلید cache خروجی‌ها.
+
+    Returns:
+        (بزرگ‌ترین شناسه لاگ، رشته نسخه)؛ با ثبت یا حذف لاگ نسخه تغییر می‌کند
+        ولی آرشیو کردن (جابه‌جایی بین جدول و فایل) آن را تغییر نمی‌دهد.
+    """
+    max_id = db.query(func.max(AuditLog.id)).scalar() or 0
+    total = get_counter(db, "audit_logs.total") + get_archived_total(db)
+    return max_id, f"{max_id}-{total}"
+
+
 # ۴. تابع کمکی برای فرمت تاریخ در template
 def format_datetime(dt: datetime) -> str:
     """فرمت کردن تاریخ برای نمایش"""
@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import queue
+import random
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.core.confing import settings
+from app.core.database import SessionLocal
+from app.models.audit_log import AuditLog
+from app.services.audit_broadcast import audit_broadcaster
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("block", "drop", "sample")
+
+
+def _on_event_loop() -> bool:
+    """آیا فراخوانی روی thread یک حلقه asyncio در حال اجراست (مثلاً از یک async def)؟"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+class AuditSink:
+    """
+    نوشتن دسته‌ای و غیرهمزمان لاگ‌های ممیزی.
+
+    رویدادها در یک صف محدود در حافظه قرار می‌گیرند و یک task پس‌زمینه
+    (که در main.lifespan شروع می‌شود) آن‌ها را هر flush_interval ثانیه
+    در دسته‌های batch_size تایی با یک commit در دیتابیس می‌نویسد.
+
+    رفتار هنگام پر بودن صف (backpressure):
+        block:  فراخواننده حداکثر block_timeout ثانیه منتظر جای خالی می‌ماند، سپس رویداد حذف می‌شود؛
+                روی thread حلقه asyncio (handlerهای async) انتظار حلقه و خود task تخلیه صف را
+                متوقف می‌کند، پس آنجا رفتار مثل drop است
+        drop:   رویداد بلافاصله حذف می‌شود
+        sample: از نیمه ظرفیت به بعد رویدادها با احتمالی متناسب با ظرفیت خالی پذیرفته می‌شوند
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session] = SessionLocal,
+            queue_size: int = 10000,
+            batch_size: int = 500,
+            flush_interval: float = 0.5,
+            policy: str = "drop",
+            block_timeout: float = 0.1,
+            on_write: Optional[Callable[[List[Dict]], None]] = None,
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown audit backpressure policy: {policy}")
+
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.on_write = on_write
+
+        self._queue: "queue.Queue[Dict]" = queue.Queue(maxsize=max(1, queue_size))
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = Lock()
+        self._stats_lock = Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "sampled_out": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+
+    # ---------------- وضعیت ----------------
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def _increment(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def stats(self) -> Dict:
+        """شمارنده‌های صف برای مانیتورینگ."""
+        with self._stats_lock:
+            data = dict(self._stats)
+        data.update({
+            "queue_depth": self._queue.qsize(),
+            "queue_size": self._queue.maxsize,
+            "policy": self.policy,
+            "running": self.is_running,
+        })
+        return data
+
+    # ---------------- ورودی ----------------
+
+    def submit(self, event: Dict) -> bool:
+        """افزودن یک رویداد به صف؛ در صورت حذف شدن False برمی‌گرداند."""
+        if self.policy == "sample":
+            fill_ratio = self._queue.qsize() / self._queue.maxsize
+            if fill_ratio > 0.5 and random.random() > (1 - fill_ratio) * 2:
+                self._increment("sampled_out")
+                return False
+
+        try:
+            if self.policy == "block" and not _on_event_loop():
+                self._queue.put(event, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(event)
+        except queue.Full:
+            self._increment("dropped")
+            return False
+
+        self._increment("enqueued")
+        return True
+
+    # ---------------- نوشتن ----------------
+
+    def _drain(self) -> List[Dict]:
+        batch = []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Dict]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), batch)
+            db.commit()
+            self._increment("written", len(batch))
+        except Exception:
+            db.rollback()
+            self._increment("failed", len(batch))
+            logger.exception("Failed to write %s audit events", len(batch))
+            return
+        finally:
+            db.close()
+
+        # اطلاع به مشترکین (مثل جریان زنده) فقط برای رویدادهای نوشته‌شده
+        if self.on_write is not None:
+            try:
+                self.on_write(batch)
+            except Exception:
+                logger.exception("Audit sink on_write callback failed")
+
+    def flush(self) -> int:
+        """نوشتن همه رویدادهای موجود در صف به صورت دسته‌ای (همزمان)."""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._drain()
+                if not batch:
+                    break
+                self._write_batch(batch)
+                written += len(batch)
+            self._increment("flushes")
+        return written
+
+    # ---------------- چرخه عمر ----------------
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if not self._queue.empty():
+                await asyncio.to_thread(self.flush)
+
+    async def start(self) -> None:
+        """شروع task پس‌زمینه (فراخوانی در startup)."""
+        if self.is_running:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            "Audit sink started: batch_size=%s interval=%ss policy=%s",
+            self.batch_size,
+            self.flush_interval,
+            self.policy,
+        )
+
+    async def stop(self) -> None:
+        """توقف task و نوشتن رویدادهای باقیمانده (فراخوانی در shutdown)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        remaining = await asyncio.to_thread(self.flush)
+        logger.info("Audit sink stopped: flushed %s pending events", remaining)
+
+
+audit_sink = AuditSink(
+    queue_size=settings.audit_queue_size,
+    batch_size=settings.audit_batch_size,
+    flush_interval=settings.audit_flush_interval_seconds,
+    policy=settings.audit_backpressure,
+    block_timeout=settings.audit_block_timeout_seconds,
+    on_write=audit_broadcaster.publish,
+)
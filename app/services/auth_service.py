@@ -3,7 +3,7 @@ import logging
 
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
 from datetime import timedelta
 from app.models.user import User
 from app.models.role import Role
@@ -17,16 +17,19 @@ from app.core.security import (
     MAX_BCRYPT_PASSWORD_BYTES,
 )
 from app.core.validators import normalize_digits
+from app.services.audit_service import AuditAction, create_audit_log
+from app.services.outbox_service import OutboxEventType, add_outbox_event
 
 logger = logging.getLogger(__name__)
 
-def register_user(db: Session, data: RegisterRequest):
+def register_user(db: Session, data: RegisterRequest, request: Request | None = None):
     """
     ثبت کاربر جدید در سیستم.
 
     Args:
         db: Session دیتابیس
         data: اطلاعات ثبت نام (RegisterRequest)
+        request: درخواست HTTP (برای ثبت IP در لاگ ممیزی)
     """
 
     student_number = normalize_digits(data.student_number)
@@ -114,6 +117,23 @@ def register_user(db: Session, data: RegisterRequest):
 
 
         db.add(profile)
+        db.flush()
+
+        # رویداد outbox در همان تراکنش ثبت‌نام
+        add_outbox_event(
+            db,
+            OutboxEventType.USER_REGISTERED,
+            aggregate="user",
+            aggregate_id=user.id,
+            payload={
+                "user_id": user.id,
+                "profile_id": profile.id,
+                "student_number": student_number,
+                "first_name": profile.first_name,
+                "last_name": profile.last_name,
+                "gender": profile.gender,
+            },
+        )
         db.commit()
         db.refresh(user)
         logger.info(
@@ -146,11 +166,26 @@ def register_user(db: Session, data: RegisterRequest):
             detail="ثبت‌نام با خطا مواجه شد. لطفاً دوباره تلاش کنید."
         ) from exc
 
+    create_audit_log(
+        db,
+        AuditAction.REGISTER,
+        request=request,
+        user=user,
+        entity="user",
+        entity_id=user.id,
+        description=f"ثبت‌نام {data.first_name} {data.last_name} با کد ملی {national_code}",
+    )
+
     return user
 
 
 
-def authenticate_user(db: Session, national_code: str, password: str):
+def authenticate_user(
+        db: Session,
+        national_code: str,
+        password: str,
+        request: Request | None = None,
+):
     """
     احراز هویت کاربر با کد ملی و شماره دانشجویی (به‌عنوان رمز عبور).
 
@@ -200,12 +235,26 @@ def authenticate_user(db: Session, national_code: str, password: str):
                 candidate.id,
                 normalized_national_code,
             )
+            create_audit_log(
+                db,
+                AuditAction.LOGIN,
+                request=request,
+                user=candidate,
+                entity="user",
+                entity_id=candidate.id,
+            )
             return candidate
 
     logger.warning(
         "Login failed: national_code=%s reason=invalid_password_or_not_found",
         normalized_national_code,
     )
+    create_audit_log(
+        db,
+        AuditAction.LOGIN_FAILED,
+        request=request,
+        description=f"ورود ناموفق با کد ملی {normalized_national_code}",
+    )
     return None
 
 
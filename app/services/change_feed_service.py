@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.confing import settings
+from app.core.pagination import decode_cursor, encode_cursor
+from app.models.change_log import ChangeLog
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+
+
+def _load_current(db: Session, entity: str, ids: List[int]) -> Dict[int, Dict]:
+    """وضعیت فعلی ردیف‌های تغییر یافته (ردیف‌های حذف‌شده در نتیجه نیستند)."""
+    if not ids:
+        return {}
+    if entity == "user":
+        users = db.query(User).options(joinedload(User.role)).filter(User.id.in_(ids)).all()
+        return {user.id: user.to_dict(include_role=True) for user in users}
+    profiles = db.query(StudentProfile).filter(StudentProfile.id.in_(ids)).all()
+    return {profile.id: profile.to_dict() for profile in profiles}
+
+
+def get_student_changes(db: Session, since: Optional[str] = None, limit: int = 500) -> Dict:
+    """
+    تغییرات کاربران و پروفایل‌ها بعد از cursor (بر اساس seq جدول change_log).
+
+    چند تغییر یک ردیف در یک صفحه به آخرین آن خلاصه می‌شود و برای هر ردیف وضعیت
+    فعلی آن (یا data=None برای حذف‌شده‌ها) برگردانده می‌شود؛ هزینه هر فراخوانی به
+    تعداد تغییرات بستگی دارد نه به اندازه کل فهرست.
+
+    Returns:
+        {"changes": [...], "next_cursor": str, "has_more": bool}
+        next_cursor همیشه برگردانده می‌شود تا مصرف‌کننده آن را برای دفعه بعد نگه دارد.
+    """
+    after_seq = decode_cursor(since, size=1)[0] if since else 0
+
+    entries = (
+        db.query(ChangeLog)
+        .filter(ChangeLog.seq > after_seq)
+        .order_by(ChangeLog.seq)
+        .limit(limit + 1)
+        .all()
+    )
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest: Dict[tuple, ChangeLog] = {}
+    for entry in entries:
+        latest.pop((entry.entity, entry.entity_id), None)
+        latest[(entry.entity, entry.entity_id)] = entry
+
+    current = {
+        entity: _load_current(db, entity, [entity_id for kind, entity_id in latest if kind == entity])
+        for entity in ("user", "student_profile")
+    }
+
+    changes = []
+    for (entity, entity_id), entry in latest.items():
+        data = current[entity].get(entity_id)
+        changes.append({
+            "seq": entry.seq,
+            "entity": entity,
+            "id": entity_id,
+            "operation": entry.operation if data is not None else "delete",
+            "changed_at": entry.changed_at,
+            "data": data,
+        })
+
+    last_seq = entries[-1].seq if entries else after_seq
+    return {
+        "changes": changes,
+        "next_cursor": encode_cursor(last_seq),
+        "has_more": has_more,
+    }
+
+
+def compact_change_log(db: Session, before: datetime) -> int:
+    """
+    حذف ردیف‌های قدیمی‌تر از before که آخرین تغییر ردیف خود نیستند.
+
+    triggerها برای هر نوشتن یک ردیف اضافه می‌کنند؛ چون خوراک تغییرات هر ردیف را به
+    آخرین seq آن خلاصه می‌کند، حذف seqهای قبلی نتیجه مصرف‌کننده‌ها را عوض نمی‌کند
+    (فقط operation ممکن است به جای insert همان update باشد). آخرین seq هر ردیف، از
+    جمله حذف‌ها، همیشه می‌ماند.
+
+    Returns:
+        تعداد ردیف‌های حذف‌شده
+    """
+    latest_seqs = select(func.max(ChangeLog.seq)).group_by(ChangeLog.entity, ChangeLog.entity_id)
+    # changed_at با server_default به قالب 'YYYY-MM-DD HH:MM:SS' ذخیره می‌شود
+    deleted = (
+        db.query(ChangeLog)
+        .filter(
+            func.datetime(ChangeLog.changed_at) < before.strftime("%Y-%m-%d %H:%M:%S"),
+            ChangeLog.seq.not_in(latest_seqs),
+        )
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted
+
+
+def apply_change_log_retention(db: Session, now: Optional[datetime] = None) -> int:
+    """اعمال CHANGE_LOG_RETENTION_DAYS (صفر یعنی غیرفعال)."""
+    if settings.change_log_retention_days <= 0:
+        return 0
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    return compact_change_log(db, before=now - timedelta(days=settings.change_log_retention_days))
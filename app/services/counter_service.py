@@ -0,0 +1,88 @@
+import logging
+from typing import Dict
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.counter import Counter
+from app.models.role import Role
+
+logger = logging.getLogger(__name__)
+
+
+# کوئری‌های بازسازی شمارنده‌ها از روی داده‌های واقعی
+_RECONCILE_STATEMENTS = (
+    "INSERT INTO counters (name, value) SELECT 'audit_logs.total', COUNT(*) FROM audit_logs",
+    "INSERT INTO counters (name, value) "
+    "SELECT 'audit_logs.action:' || IFNULL(action, ''), COUNT(*) FROM audit_logs GROUP BY action",
+    "INSERT INTO counters (name, value) SELECT 'users.total', COUNT(*) FROM users",
+    "INSERT INTO counters (name, value) "
+    "SELECT 'users.role:' || IFNULL(role_id, ''), COUNT(*) FROM users GROUP BY role_id",
+    "INSERT INTO counters (name, value) SELECT 'roles.total', COUNT(*) FROM roles",
+    "INSERT INTO counters (name, value) SELECT 'student_profiles.total', COUNT(*) FROM student_profiles",
+    "INSERT INTO counters (name, value) "
+    "SELECT 'student_profiles.gender:' || IFNULL(gender, ''), COUNT(*) FROM student_profiles GROUP BY gender",
+)
+
+
+def get_counter(db: Session, name: str) -> int:
+    """خواندن یک شمارنده (با کلید اصلی، بدون اسکن جدول)."""
+    value = db.query(Counter.value).filter(Counter.name == name).scalar()
+    return int(value or 0)
+
+
+def get_counters_by_prefix(db: Session, prefix: str) -> Dict[str, int]:
+    """
+    خواندن همه شمارنده‌های یک گروه، مثلاً audit_logs.action:
+
+    فیلتر بازه‌ای روی کلید اصلی است تا از ایندکس استفاده شود.
+    """
+    rows = (
+        db.query(Counter.name, Counter.value)
+        .filter(Counter.name >= prefix, Counter.name < prefix + "\uffff")
+        .all()
+    )
+    return {name[len(prefix):]: int(value) for name, value in rows if value}
+
+
+def get_user_totals(db: Session) -> Dict:
+    """تعداد کاربران، نقش‌ها و پروفایل‌ها از روی شمارنده‌ها."""
+    role_names = {str(role_id): name for role_id, name in db.query(Role.id, Role.name).all()}
+    users_by_role = get_counters_by_prefix(db, "users.role:")
+
+    return {
+        "users": get_counter(db, "users.total"),
+        "roles": get_counter(db, "roles.total"),
+        "student_profiles": get_counter(db, "student_profiles.total"),
+        "users_by_role": {
+            role_names.get(role_id, role_id): count for role_id, count in users_by_role.items()
+        },
+        "profiles_by_gender": get_counters_by_prefix(db, "student_profiles.gender:"),
+    }
+
+
+def reconcile_counters(db: Session) -> Dict[str, int]:
+    """
+    بازسازی کامل شمارنده‌ها از روی جداول اصلی.
+
+    برای اصلاح انحراف احتمالی (مثلاً تغییر مستقیم دیتابیس بدون trigger) استفاده می‌شود.
+    """
+    try:
+        db.execute(text("DELETE FROM counters"))
+        for statement in _RECONCILE_STATEMENTS:
+            db.execute(text(statement))
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Counter reconciliation failed")
+        raise
+
+    counters = {name: int(value) for name, value in db.query(Counter.name, Counter.value).all()}
+    logger.info("Counters reconciled: %s entries", len(counters))
+    return counters
+
+
+def ensure_counters_initialized(db: Session) -> None:
+    """اگر جدول شمارنده‌ها تازه ساخته شده باشد، آن را از داده‌های موجود پر می‌کند."""
+    if db.query(Counter.name).first() is None:
+        reconcile_counters(db)
@@ -0,0 +1,61 @@
+from typing import Dict
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.confing import settings
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+
+dashboard_cache = TTLCache(ttl_seconds=settings.dashboard_cache_ttl_seconds)
+
+
+def get_dashboard_summary(db: Session) -> Dict:
+    """
+    آمار کاربران داشبورد (نقش، جنسیت، فعال بودن و احراز هویت) با یک کوئری تجمیعی.
+
+    کوئری فقط یک ردیف برای هر ترکیب (نقش، جنسیت، فعال، احراز هویت) برمی‌گرداند و
+    جمع‌ها در پایتون ساخته می‌شوند؛ هیچ ردیف کاربری بارگذاری نمی‌شود.
+    """
+    rows = (
+        db.query(
+            Role.name,
+            StudentProfile.gender,
+            User.is_active,
+            StudentProfile.has_authenticated,
+            func.count(User.id),
+        )
+        .select_from(User)
+        .outerjoin(Role, Role.id == User.role_id)
+        .outerjoin(StudentProfile, StudentProfile.user_id == User.id)
+        .group_by(Role.name, StudentProfile.gender, User.is_active, StudentProfile.has_authenticated)
+        .all()
+    )
+
+    summary = {
+        "total_users": 0,
+        "active_users": 0,
+        "inactive_users": 0,
+        "profiles": 0,
+        "authenticated_profiles": 0,
+        "by_role": {},
+        "by_gender": {},
+    }
+    for role_name, gender, is_active, has_authenticated, count in rows:
+        summary["total_users"] += count
+        summary["active_users" if is_active else "inactive_users"] += count
+        role_key = role_name or "-"
+        summary["by_role"][role_key] = summary["by_role"].get(role_key, 0) + count
+        if gender is not None:
+            summary["profiles"] += count
+            summary["by_gender"][gender] = summary["by_gender"].get(gender, 0) + count
+            if has_authenticated:
+                summary["authenticated_profiles"] += count
+    return summary
+
+
+def get_cached_dashboard_summary(db: Session) -> Dict:
+    """آمار داشبورد از cache (به‌روزرسانی حداکثر هر DASHBOARD_CACHE_TTL_SECONDS ثانیه)."""
+    return dashboard_cache.get_or_load("summary", lambda: get_dashboard_summary(db))
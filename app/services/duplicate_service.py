@@ -0,0 +1,241 @@
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, joinedload
+
+from app.core.database import SessionLocal
+from app.core.validators import normalize_digits, normalize_persian_text
+from app.models.duplicate_candidate import DuplicateCandidate
+from app.models.student_profile import StudentProfile
+
+logger = logging.getLogger(__name__)
+
+# وزن هر نشانه در امتیاز جفت؛ جفت‌هایی با امتیاز کمتر از DUPLICATE_MIN_SCORE ذخیره نمی‌شوند.
+# یعنی کد ملی با یک رقم اختلاف به‌تنهایی کافی است، ولی نام یکسان به‌تنهایی نه.
+DUPLICATE_SIGNAL_WEIGHTS = {"national_code": 0.5, "name": 0.4, "phone": 0.3}
+DUPLICATE_MIN_SCORE = 0.5
+# بلوک‌های بزرگ‌تر (مثلاً نام‌های بسیار رایج) مقایسه نمی‌شوند تا هزینه درجه دوم نشود
+DUPLICATE_MAX_BLOCK_SIZE = 100
+DUPLICATE_REVIEW_STATUSES = ("confirmed", "dismissed")
+
+# (id، نام نرمال‌شده، کد ملی، تلفن)
+_ProfileKey = Tuple[int, str, str, str]
+
+
+def normalize_person_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    """نام کامل برای مقایسه: نرمال‌سازی فارسی و حذف فاصله‌ها («علی رضا» = «علیرضا»)."""
+    return (normalize_persian_text(f"{first_name or ''} {last_name or ''}") or "").replace(" ", "")
+
+
+def _masked_keys(kind: str, value: str) -> Iterable[Tuple]:
+    """کلیدهای بلوک با پوشاندن هر رقم؛ دو مقدار با اختلاف یک رقم دقیقاً یک کلید مشترک دارند."""
+    for position in range(len(value)):
+        yield kind, position, value[:position] + value[position + 1:]
+
+
+def blocking_keys(profile: _ProfileKey) -> Iterable[Tuple]:
+    _, name, national_code, phone = profile
+    if name:
+        yield "name", name
+    if national_code:
+        yield from _masked_keys("national_code", national_code)
+    if phone:
+        yield from _masked_keys("phone", phone)
+
+
+def _differs_by_at_most_one_digit(left: str, right: str) -> bool:
+    return bool(left) and len(left) == len(right) and sum(a != b for a, b in zip(left, right)) <= 1
+
+
+def score_pair(left: _ProfileKey, right: _ProfileKey) -> Tuple[float, List[str]]:
+    """امتیاز شباهت دو پروفایل و نشانه‌های منطبق."""
+    reasons = []
+    if left[1] and left[1] == right[1]:
+        reasons.append("name")
+    if _differs_by_at_most_one_digit(left[2], right[2]):
+        reasons.append("national_code")
+    if _differs_by_at_most_one_digit(left[3], right[3]):
+        reasons.append("phone")
+    return round(sum(DUPLICATE_SIGNAL_WEIGHTS[reason] for reason in reasons), 2), reasons
+
+
+def find_duplicate_pairs(profiles: Iterable[_ProfileKey]) -> Tuple[Dict[Tuple[int, int], Tuple[float, List[str]]], Dict]:
+    """
+    پیدا کردن جفت‌های محتمل با blocking.
+
+    هر پروفایل فقط با پروفایل‌هایی مقایسه می‌شود که حداقل یک کلید بلوک مشترک
+    دارند (نام نرمال‌شده، یا کد ملی/تلفن با یک رقم پوشیده)؛ پس تعداد مقایسه‌ها
+    به جای n² تقریباً با n رشد می‌کند.
+    """
+    profiles = {profile[0]: profile for profile in profiles}
+    blocks: Dict[Tuple, List[int]] = defaultdict(list)
+    for profile in profiles.values():
+        for key in blocking_keys(profile):
+            blocks[key].append(profile[0])
+
+    pairs: Dict[Tuple[int, int], Tuple[float, List[str]]] = {}
+    compared = set()
+    skipped_blocks = 0
+    for key, ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        if len(ids) > DUPLICATE_MAX_BLOCK_SIZE:
+            skipped_blocks += 1
+            logger.warning("Skipping duplicate block %s with %d profiles", key[0], len(ids))
+            continue
+        ids.sort()
+        for index, left_id in enumerate(ids):
+            for right_id in ids[index + 1:]:
+                if (left_id, right_id) in compared:
+                    continue
+                compared.add((left_id, right_id))
+                score, reasons = score_pair(profiles[left_id], profiles[right_id])
+                if score >= DUPLICATE_MIN_SCORE:
+                    pairs[(left_id, right_id)] = (score, reasons)
+
+    stats = {
+        "profiles": len(profiles),
+        "blocks": len(blocks),
+        "skipped_blocks": skipped_blocks,
+        "comparisons": len(compared),
+        "candidates": len(pairs),
+    }
+    return pairs, stats
+
+
+def iter_profile_keys(db: Session, batch_size: int = 1000) -> Iterator[_ProfileKey]:
+    """خواندن دسته‌ای فقط ستون‌های لازم پروفایل‌ها (keyset روی id)."""
+    last_id = 0
+    while True:
+        rows = (
+            db.query(
+                StudentProfile.id,
+                StudentProfile.first_name,
+                StudentProfile.last_name,
+                StudentProfile.national_code,
+                StudentProfile.phone_number,
+            )
+            .filter(StudentProfile.id > last_id)
+            .order_by(StudentProfile.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        for profile_id, first_name, last_name, national_code, phone_number in rows:
+            yield (
+                profile_id,
+                normalize_person_name(first_name, last_name),
+                normalize_digits(national_code) or "",
+                normalize_digits(phone_number) or "",
+            )
+        last_id = rows[-1][0]
+
+
+def scan_duplicates(db: Session, batch_size: int = 1000) -> Dict:
+    """
+    اجرای کامل تشخیص تکرار و همگام‌سازی جدول duplicate_candidates.
+
+    جفت‌های جدید با وضعیت pending اضافه می‌شوند، امتیاز جفت‌های pending به‌روز
+    می‌شود و جفت‌های pending که دیگر منطبق نیستند حذف می‌شوند؛ جفت‌های
+    بررسی‌شده (confirmed/dismissed) دست نمی‌خورند.
+    """
+    pairs, stats = find_duplicate_pairs(iter_profile_keys(db, batch_size=batch_size))
+
+    existing = {
+        (candidate.profile_id_a, candidate.profile_id_b): candidate
+        for candidate in db.query(DuplicateCandidate)
+    }
+    added = removed = 0
+    for (profile_id_a, profile_id_b), (score, reasons) in pairs.items():
+        candidate = existing.get((profile_id_a, profile_id_b))
+        if candidate is None:
+            db.add(DuplicateCandidate(
+                profile_id_a=profile_id_a,
+                profile_id_b=profile_id_b,
+                score=score,
+                reasons=",".join(reasons),
+            ))
+            added += 1
+        elif candidate.status == "pending":
+            candidate.score = score
+            candidate.reasons = ",".join(reasons)
+
+    for pair, candidate in existing.items():
+        if candidate.status == "pending" and pair not in pairs:
+            db.delete(candidate)
+            removed += 1
+
+    db.commit()
+    return {**stats, "added": added, "removed": removed}
+
+
+def get_duplicate_candidates(db: Session, status_filter: str = "pending", limit: int = 200) -> List[DuplicateCandidate]:
+    """جفت‌های یک وضعیت به ترتیب امتیاز (همراه با هر دو پروفایل در همان کوئری)."""
+    return (
+        db.query(DuplicateCandidate)
+        .options(joinedload(DuplicateCandidate.profile_a), joinedload(DuplicateCandidate.profile_b))
+        .filter(DuplicateCandidate.status == status_filter)
+        .order_by(DuplicateCandidate.score.desc(), DuplicateCandidate.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def review_duplicate_candidate(db: Session, candidate_id: int, review_status: str) -> DuplicateCandidate:
+    """ثبت نتیجه بررسی ادمین (confirmed یا dismissed)."""
+    if review_status not in DUPLICATE_REVIEW_STATUSES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="وضعیت بررسی نامعتبر است")
+    candidate = db.query(DuplicateCandidate).filter(DuplicateCandidate.id == candidate_id).first()
+    if not candidate:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="جفت تکراری یافت نشد")
+    candidate.status = review_status
+    candidate.reviewed_at = datetime.now(timezone.utc)
+    db.commit()
+    return candidate
+
+
+class DuplicateScanJob:
+    """اجرای scan_duplicates در پس‌زمینه با session جداگانه؛ هم‌زمان فقط یک اجرا."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal):
+        self.session_factory = session_factory
+        self.status = "idle"
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.finished_at: Optional[float] = None
+        self._lock = Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self.status == "running"
+
+    def run(self) -> Optional[Dict]:
+        """اجرای job؛ اگر اجرای دیگری در جریان باشد None برمی‌گرداند."""
+        if not self._lock.acquire(blocking=False):
+            return None
+        self.status = "running"
+        db = self.session_factory()
+        try:
+            self.result = scan_duplicates(db)
+            self.error = None
+            self.status = "done"
+            return self.result
+        except Exception as exc:
+            db.rollback()
+            self.error = str(exc)
+            self.status = "failed"
+            logger.exception("Duplicate scan failed")
+            return None
+        finally:
+            db.close()
+            self.finished_at = time.time()
+            self._lock.release()
+
+
+duplicate_scan_job = DuplicateScanJob()
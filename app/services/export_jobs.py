@@ -0,0 +1,236 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.confing import settings
+from app.core.database import SessionLocal
+from app.services.audit_service import (
+    AUDIT_EXPORT_FIELDS,
+    export_header,
+    get_audit_data_version,
+    iter_audit_log_rows,
+)
+from app.services.export_service import gzip_chunks, iter_csv_chunks, iter_ndjson_chunks, write_xlsx
+
+logger = logging.getLogger(__name__)
+
+# قالب -> (پسوند فایل، media type)
+EXPORT_FORMATS = {
+    "csv": ("csv", "text/csv"),
+    "csv.gz": ("csv.gz", "application/gzip"),
+    "ndjson": ("ndjson", "application/x-ndjson"),
+    "ndjson.gz": ("ndjson.gz", "application/gzip"),
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def filters_hash(export_format: str, filters: Dict, fields: Sequence[str] = ()) -> str:
+    """شناسه پایدار ترکیب قالب، فیلترها و ستون‌ها (مستقل از ترتیب کلیدها)."""
+    payload = json.dumps(
+        {"format": export_format, "filters": filters, "fields": list(fields)},
+        sort_keys=True,
+        default=str,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ExportJob:
+    """وضعیت یک خروجی در حال ساخت یا آماده."""
+
+    def __init__(
+            self,
+            export_format: str,
+            filters: Dict,
+            key: str,
+            path: str,
+            until_id: int,
+            fields: Tuple[str, ...] = tuple(AUDIT_EXPORT_FIELDS),
+    ):
+        self.id = uuid.uuid4().hex
+        self.format = export_format
+        self.filters = filters
+        self.fields = tuple(fields)
+        self.key = key
+        self.path = path
+        self.until_id = until_id
+        self.status = "pending"
+        self.rows_written = 0
+        self.cached = False
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    @property
+    def filename(self) -> str:
+        return f"audit_logs.{EXPORT_FORMATS[self.format][0]}"
+
+    @property
+    def media_type(self) -> str:
+        return EXPORT_FORMATS[self.format][1]
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "format": self.format,
+            "columns": list(self.fields),
+            "status": self.status,
+            "rows_written": self.rows_written,
+            "cached": self.cached,
+            "error": self.error,
+            "size": os.path.getsize(self.path) if self.status == "done" and os.path.exists(self.path) else None,
+            "download_url": f"/admin/audit-logs/export/jobs/{self.id}/download" if self.status == "done" else None,
+        }
+
+
+class ExportJobManager:
+    """
+    اجرای خروجی‌های حجیم در thread pool و نگهداری فایل‌ها روی دیسک.
+
+    نام فایل از hash فیلترها و نسخه داده (get_audit_data_version) ساخته می‌شود؛
+    اگر از آخرین خروجی با همان فیلترها لاگ جدیدی ثبت نشده باشد، همان فایل
+    بدون اجرای دوباره کوئری برگردانده می‌شود.
+    """
+
+    def __init__(
+            self,
+            session_factory: Callable[[], Session] = SessionLocal,
+            export_dir: str = "./exports",
+            max_workers: int = 2,
+            job_ttl_seconds: int = 3600,
+    ):
+        self.session_factory = session_factory
+        self.export_dir = export_dir
+        self.max_workers = max(1, max_workers)
+        self.job_ttl_seconds = job_ttl_seconds
+        self._jobs: Dict[str, ExportJob] = {}
+        self._lock = Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="export")
+        return self._executor
+
+    def _prune(self) -> None:
+        expire_before = time.time() - self.job_ttl_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < expire_before:
+                del self._jobs[job_id]
+
+    # ---------------- API ----------------
+
+    def submit(
+            self,
+            db: Session,
+            export_format: str,
+            filters: Dict,
+            fields: Optional[Sequence[str]] = None,
+    ) -> ExportJob:
+        """ایجاد job (یا برگرداندن job/فایل موجود برای همان فیلترها، ستون‌ها و نسخه داده)."""
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {export_format}")
+
+        fields = tuple(fields or AUDIT_EXPORT_FIELDS)
+        until_id, version = get_audit_data_version(db)
+        key = filters_hash(export_format, filters, fields)
+        extension = EXPORT_FORMATS[export_format][0]
+        path = os.path.abspath(os.path.join(self.export_dir, f"audit_logs-{key}-{version}.{extension}"))
+
+        with self._lock:
+            self._prune()
+            for job in self._jobs.values():
+                if job.path == path and job.status in ("pending", "running"):
+                    return job
+
+            job = ExportJob(export_format, filters, key, path, until_id, fields)
+            self._jobs[job.id] = job
+            if os.path.exists(path):
+                job.status = "done"
+                job.cached = True
+                job.finished_at = time.time()
+                return job
+
+        self._get_executor().submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    # ---------------- اجرا ----------------
+
+    def _count(self, job: ExportJob, rows: Iterable) -> Iterator:
+        for row in rows:
+            job.rows_written += 1
+            yield row
+
+    def _write(self, job: ExportJob, db: Session, path: str) -> None:
+        rows = self._count(
+            job,
+            iter_audit_log_rows(db, until_id=job.until_id, fields=job.fields, **job.filters),
+        )
+        if job.format == "xlsx":
+            write_xlsx(path, export_header(job.fields), rows, sheet_title="Audit Logs")
+            return
+
+        if job.format.startswith("ndjson"):
+            chunks = iter_ndjson_chunks(job.fields, rows)
+        else:
+            chunks = iter_csv_chunks(export_header(job.fields), rows)
+        if job.format.endswith(".gz"):
+            chunks = gzip_chunks(chunks)
+        with open(path, "wb") as handle:
+            for chunk in chunks:
+                handle.write(chunk)
+
+    def _run(self, job: ExportJob) -> None:
+        job.status = "running"
+        os.makedirs(os.path.dirname(job.path), exist_ok=True)
+        temp_path = f"{job.path}.{job.id}.tmp"
+
+        db = self.session_factory()
+        try:
+            self._write(job, db, temp_path)
+            os.replace(temp_path, job.path)
+            job.status = "done"
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            logger.exception("Export job %s failed", job.id)
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        finally:
+            db.close()
+            job.finished_at = time.time()
+
+        if job.status == "done":
+            self._remove_stale_artifacts(job)
+
+    def _remove_stale_artifacts(self, job: ExportJob) -> None:
+        """حذف فایل‌های نسخه‌های قبلی همان فیلترها."""
+        pattern = os.path.join(os.path.dirname(job.path), f"audit_logs-{job.key}-*")
+        for old_path in glob.glob(pattern):
+            if old_path != job.path and not old_path.endswith(".tmp"):
+                os.remove(old_path)
+
+
+export_jobs = ExportJobManager(
+    export_dir=settings.export_dir,
+    max_workers=settings.export_workers,
+    job_ttl_seconds=settings.export_job_ttl_seconds,
+)
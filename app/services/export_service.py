@@ -0,0 +1,214 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+
+# حداکثر ردیف هر sheet در Excel (۱٬۰۴۸٬۵۷۶) منهای ردیف عنوان
+XLSX_MAX_DATA_ROWS = 1_048_575
+
+
+def _format_cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+def parse_fields(columns: Optional[str], available: Mapping[str, Any]) -> Tuple[str, ...]:
+    """
+    تبدیل پارامتر columns (مثلاً «id,action,created_at») به لیست فیلدهای مجاز.
+
+    بدون مقدار همه فیلدها برگردانده می‌شوند؛ نام ناشناخته خطای 400 می‌دهد.
+    """
+    if not columns:
+        return tuple(available)
+
+    fields = []
+    for name in (item.strip() for item in columns.split(",")):
+        if not name or name in fields:
+            continue
+        if name not in available:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"ستون نامعتبر: {name}. ستون‌های مجاز: {', '.join(available)}",
+            )
+        fields.append(name)
+    return tuple(fields) or tuple(available)
+
+
+def iter_csv_chunks(
+        header: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        rows_per_chunk: int = 1000,
+) -> Iterator[bytes]:
+    """
+    تولید جریانی CSV: هر rows_per_chunk ردیف یک تکه bytes (UTF-8).
+
+    فقط یک تکه در حافظه نگه داشته می‌شود، پس مصرف حافظه به تعداد کل ردیف‌ها بستگی ندارد.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_format_cell(value) for value in row])
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    tail = buffer.getvalue()
+    if tail:
+        yield tail.encode("utf-8")
+
+
+def iter_ndjson_chunks(
+        fields: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        rows_per_chunk: int = 1000,
+) -> Iterator[bytes]:
+    """تولید جریانی NDJSON: هر ردیف یک شیء JSON با کلیدهای fields در یک خط."""
+    lines = []
+    for row in rows:
+        record = {
+            field: value.isoformat() if isinstance(value, datetime) else value
+            for field, value in zip(fields, row)
+        }
+        lines.append(json.dumps(record, ensure_ascii=False))
+        if len(lines) >= rows_per_chunk:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """آیا کلاینت در هدر Accept-Encoding فشرده‌سازی gzip را پذیرفته است؟"""
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.strip().partition(";")
+        if coding.strip().lower() not in ("gzip", "*"):
+            continue
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                return float(quality[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """فشرده‌سازی gzip تکه‌ها در حین ارسال (بدون ساخت کل فایل در حافظه)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_export_response(
+        request: Request,
+        export_format: str,
+        fields: Sequence[str],
+        header: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        basename: str,
+        gzip_file: bool = False,
+) -> StreamingResponse:
+    """
+    پاسخ جریانی CSV یا NDJSON.
+
+    با gzip_file فایل ‎.gz دانلود می‌شود؛ در غیر این صورت اگر کلاینت gzip را در
+    Accept-Encoding پذیرفته باشد پاسخ با Content-Encoding: gzip فشرده می‌شود.
+    """
+    if export_format == "ndjson":
+        chunks = iter_ndjson_chunks(fields, rows)
+        media_type = "application/x-ndjson"
+    else:
+        chunks = iter_csv_chunks(header, rows)
+        media_type = "text/csv"
+    filename = f"{basename}.{export_format}"
+
+    if gzip_file:
+        return StreamingResponse(
+            gzip_chunks(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"}
+        )
+
+    headers = {"Content-Disposition": f"attachment; filename={filename}", "Vary": "Accept-Encoding"}
+    if accepts_gzip(request.headers.get("accept-encoding")):
+        chunks = gzip_chunks(chunks)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
+def write_xlsx(
+        path: str,
+        header: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        sheet_title: str = "Sheet",
+        max_rows_per_sheet: int = XLSX_MAX_DATA_ROWS,
+) -> int:
+    """
+    نوشتن ردیف‌ها در فایل xlsx با حالت write-only کتابخانه openpyxl.
+
+    ردیف‌ها مستقیماً روی دیسک نوشته می‌شوند (بدون نگه داشتن سلول‌ها در حافظه) و
+    پس از max_rows_per_sheet ردیف، sheet جدیدی با همان عنوان‌ها ساخته می‌شود.
+
+    Returns:
+        تعداد ردیف‌های داده نوشته‌شده
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = None
+    sheet_rows = 0
+    sheet_count = 0
+    written = 0
+
+    for row in rows:
+        if sheet is None or sheet_rows >= max_rows_per_sheet:
+            sheet_count += 1
+            suffix = f" ({sheet_count})" if sheet_count > 1 else ""
+            sheet = workbook.create_sheet(title=sheet_title[:31 - len(suffix)] + suffix)
+            sheet.append(list(header))
+            sheet_rows = 0
+        sheet.append([_format_cell(value) for value in row])
+        sheet_rows += 1
+        written += 1
+
+    if sheet is None:
+        workbook.create_sheet(title=sheet_title[:31]).append(list(header))
+
+    workbook.save(path)
+    return written
+
+
+def spool_xlsx(
+        header: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        sheet_title: str = "Sheet",
+        max_rows_per_sheet: int = XLSX_MAX_DATA_ROWS,
+) -> str:
+    """ساخت فایل xlsx موقت و برگرداندن مسیر آن (حذف فایل با فراخواننده است)."""
+    handle, path = tempfile.mkstemp(prefix="export-", suffix=".xlsx")
+    os.close(handle)
+    try:
+        write_xlsx(path, header, rows, sheet_title=sheet_title, max_rows_per_sheet=max_rows_per_sheet)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
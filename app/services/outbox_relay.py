@@ -0,0 +1,227 @@
+import asyncio
+import json
+import logging
+import os
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.core.confing import settings
+from app.core.database import SessionLocal
+from app.models.outbox_event import OutboxEvent
+from app.services.outbox_service import outbox_notifier
+
+logger = logging.getLogger(__name__)
+
+
+def _utc_now_naive() -> datetime:
+    """زمان جاری UTC بدون tzinfo، همان قالبی که SQLite برمی‌گرداند."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class FileOutboxSink:
+    """افزودن رویدادها به یک فایل NDJSON محلی (هر رویداد یک خط)."""
+
+    name = "file"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def deliver(self, events: List[Dict]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            for item in events:
+                handle.write(json.dumps(item, ensure_ascii=False) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+def _post_json(url: str, body: bytes, timeout: float) -> int:
+    request = urllib.request.Request(
+        url,
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+class WebhookOutboxSink:
+    """
+    ارسال هر دسته رویداد با یک درخواست POST (بدنه: {"events": [...]}).
+
+    پاسخ غیر 2xx یا خطای شبکه خطا محسوب می‌شود و دسته دوباره ارسال خواهد شد؛
+    گیرنده باید رویدادها را با id آن‌ها idempotent پردازش کند.
+    """
+
+    name = "webhook"
+
+    def __init__(
+            self,
+            url: str,
+            timeout: float = 5.0,
+            sender: Callable[[str, bytes, float], int] = _post_json,
+    ):
+        self.url = url
+        self.timeout = timeout
+        self.sender = sender
+
+    def deliver(self, events: List[Dict]) -> None:
+        body = json.dumps({"events": events}, ensure_ascii=False).encode("utf-8")
+        status_code = self.sender(self.url, body, self.timeout)
+        if not 200 <= status_code < 300:
+            raise RuntimeError(f"Webhook responded with HTTP {status_code}")
+
+
+class OutboxRelay:
+    """
+    ارسال دسته‌ای رویدادهای outbox به sinkها با تضمین حداقل یک بار.
+
+    هر دسته فقط وقتی delivered_at می‌گیرد که همه sinkها آن را پذیرفته باشند؛ در
+    غیر این صورت attempts و last_error ثبت می‌شود و ارسال تا next_attempt_at (فاصله
+    retry_base * 2^(attempts-1)، حداکثر retry_max ثانیه) به تعویق می‌افتد؛ ترتیب
+    رویدادها حفظ می‌شود. رویدادی که قبلاً خطا داده به تنهایی ارسال می‌شود تا رویداد
+    مشکل‌دار از بقیه جدا شود و اگر بعد از max_attempts تلاش پذیرفته نشود failed_at
+    می‌گیرد و ارسال با رویدادهای بعدی ادامه می‌یابد. task پس‌زمینه بعد از هر commit
+    رویداد جدید یا هر poll_interval ثانیه بیدار می‌شود.
+    """
+
+    def __init__(
+            self,
+            sinks: Sequence,
+            session_factory: Callable[[], Session] = SessionLocal,
+            batch_size: int = 100,
+            poll_interval: float = 5.0,
+            max_attempts: int = 10,
+            retry_base: float = 1.0,
+            retry_max: float = 300.0,
+            clock: Callable[[], datetime] = _utc_now_naive,
+    ):
+        self.sinks = list(sinks)
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.clock = clock
+        self._task: Optional[asyncio.Task] = None
+        self._relay_lock = Lock()
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def retry_delay(self, attempts: int) -> timedelta:
+        """فاصله تا تلاش بعدی پس از attempts تلاش ناموفق (نمایی با سقف retry_max)."""
+        return timedelta(seconds=min(self.retry_max, self.retry_base * 2 ** max(0, attempts - 1)))
+
+    def relay_once(self) -> int:
+        """ارسال یک دسته؛ تعداد رویدادهای ارسال‌شده را برمی‌گرداند (0 در صورت خطا، انتظار یا نبود رویداد)."""
+        with self._relay_lock:
+            db = self.session_factory()
+            try:
+                batch = (
+                    db.query(OutboxEvent)
+                    .filter(OutboxEvent.delivered_at.is_(None), OutboxEvent.failed_at.is_(None))
+                    .order_by(OutboxEvent.id)
+                    .limit(self.batch_size)
+                    .all()
+                )
+                if not batch:
+                    return 0
+
+                now = self.clock()
+                head = batch[0]
+                # تا پایان backoff اولین رویداد چیزی ارسال نمی‌شود (ترتیب حفظ می‌شود)
+                if head.next_attempt_at is not None and head.next_attempt_at > now:
+                    return 0
+                if head.attempts:
+                    batch = [head]
+
+                events = [item.to_dict() for item in batch]
+                try:
+                    for sink in self.sinks:
+                        sink.deliver(events)
+                except Exception as exc:
+                    logger.warning("Outbox delivery of %s events failed: %s", len(batch), exc)
+                    for item in batch:
+                        item.attempts += 1
+                        item.last_error = str(exc)[:500]
+                        item.next_attempt_at = now + self.retry_delay(item.attempts)
+                    if len(batch) == 1 and head.attempts >= self.max_attempts:
+                        head.failed_at = now
+                        logger.error(
+                            "Outbox event %s failed %s times and was set aside: %s",
+                            head.id, head.attempts, head.last_error,
+                        )
+                    db.commit()
+                    return 0
+
+                delivered_at = datetime.now(timezone.utc)
+                for item in batch:
+                    item.attempts += 1
+                    item.delivered_at = delivered_at
+                    item.last_error = None
+                    item.next_attempt_at = None
+                db.commit()
+                return len(batch)
+            finally:
+                db.close()
+
+    def relay_pending(self) -> int:
+        """ارسال همه رویدادهای در انتظار تا خالی شدن صف، اولین خطا یا رسیدن به backoff."""
+        delivered = 0
+        while True:
+            count = self.relay_once()
+            delivered += count
+            if count == 0:
+                return delivered
+
+    # ---------------- چرخه عمر ----------------
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.to_thread(self.relay_pending)
+            await outbox_notifier.wait(self.poll_interval)
+
+    async def start(self) -> None:
+        """شروع task پس‌زمینه (فراخوانی در startup)؛ بدون sink کاری انجام نمی‌شود."""
+        if self.is_running or not self.sinks:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Outbox relay started: sinks=%s", ", ".join(sink.name for sink in self.sinks))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def build_outbox_sinks() -> List:
+    """sinkهای تنظیم‌شده با OUTBOX_FILE_PATH و OUTBOX_WEBHOOK_URL."""
+    sinks = []
+    if settings.outbox_file_path:
+        sinks.append(FileOutboxSink(settings.outbox_file_path))
+    if settings.outbox_webhook_url:
+        sinks.append(WebhookOutboxSink(settings.outbox_webhook_url, timeout=settings.outbox_webhook_timeout_seconds))
+    return sinks
+
+
+outbox_relay = OutboxRelay(
+    build_outbox_sinks(),
+    batch_size=settings.outbox_batch_size,
+    poll_interval=settings.outbox_poll_interval_seconds,
+    max_attempts=settings.outbox_max_attempts,
+    retry_base=settings.outbox_retry_base_seconds,
+    retry_max=settings.outbox_retry_max_seconds,
+)
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import logging
+from threading import Lock
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.models.outbox_event import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+# کلید session.info برای اینکه after_commit بداند رویداد جدیدی در تراکنش بوده است
+_PENDING_KEY = "outbox_pending"
+
+
+class OutboxEventType:
+    """انواع رویدادهای outbox."""
+    USER_REGISTERED = "user.registered"
+    PROFILE_UPDATED = "student_profile.updated"
+
+
+class OutboxNotifier:
+    """
+    بیدار کردن منتظرها (long-poll و relay) بعد از commit رویداد جدید.
+
+    notify از هر threadی قابل فراخوانی است؛ هر منتظر در حلقه رویداد خودش بیدار می‌شود.
+    """
+
+    def __init__(self):
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+        self._lock = Lock()
+
+    def notify(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # حلقه رویداد منتظر بسته شده است
+                with self._lock:
+                    self._waiters.discard((loop, waiter))
+
+    async def wait(self, timeout: float) -> bool:
+        """انتظار تا رویداد جدید یا پایان timeout؛ در صورت بیدار شدن True برمی‌گرداند."""
+        entry = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(entry)
+        try:
+            await asyncio.wait_for(entry[1].wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            with self._lock:
+                self._waiters.discard(entry)
+
+
+outbox_notifier = OutboxNotifier()
+
+
+@event.listens_for(Session, "after_commit")
+def _notify_after_commit(session):
+    if session.info.pop(_PENDING_KEY, False):
+        outbox_notifier.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def add_outbox_event(
+        db: Session,
+        event_type: str,
+        aggregate: str,
+        aggregate_id: int,
+        payload: Dict,
+) -> OutboxEvent:
+    """
+    افزودن رویداد به تراکنش جاری (بدون commit).
+
+    فراخواننده باید همان commitی را انجام دهد که تغییر اصلی را ذخیره می‌کند.
+    """
+    outbox_event = OutboxEvent(
+        event_type=event_type,
+        aggregate=aggregate,
+        aggregate_id=aggregate_id,
+        payload=json.dumps(payload, ensure_ascii=False, default=str),
+    )
+    db.add(outbox_event)
+    db.info[_PENDING_KEY] = True
+    return outbox_event
+
+
+def get_failed_outbox_events(db: Session, limit: int = 100) -> List[OutboxEvent]:
+    """رویدادهایی که relay پس از آخرین تلاش ناموفق کنار گذاشته است (جدیدترین اول)."""
+    return (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.failed_at.isnot(None))
+        .order_by(OutboxEvent.failed_at.desc(), OutboxEvent.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def get_outbox_events(db: Session, after_id: int = 0, limit: int = 100) -> List[OutboxEvent]:
+    """رویدادهای ثبت‌شده بعد از after_id به ترتیب id."""
+    return (
+        db.query(OutboxEvent)
+        .filter(OutboxEvent.id > after_id)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .all()
+    )
+
+
+async def poll_outbox_events(
+        db: Session,
+        after_id: int = 0,
+        limit: int = 100,
+        timeout: float = 25.0,
+) -> Dict:
+    """
+    long-poll: اگر رویدادی بعد از after_id نباشد تا commit رویداد جدید یا پایان
+    timeout منتظر می‌ماند.
+
+    Returns:
+        {"events": [...], "next_after": int}
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max(0.0, timeout)
+
+    while True:
+        # بیدار شدن قبل از خواندن ثبت می‌شود تا commitی بین خواندن و انتظار از دست نرود
+        wakeup = asyncio.ensure_future(outbox_notifier.wait(max(0.0, deadline - loop.time())))
+        await asyncio.sleep(0)
+        events = await asyncio.to_thread(get_outbox_events, db, after_id, limit)
+        remaining = deadline - loop.time()
+        if events or remaining <= 0:
+            wakeup.cancel()
+            break
+        if not await wakeup:
+            events = await asyncio.to_thread(get_outbox_events, db, after_id, limit)
+            break
+
+    return {
+        "events": [item.to_dict() for item in events],
+        "next_after": events[-1].id if events else after_id,
+    }
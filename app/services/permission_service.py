@@ -0,0 +1,190 @@
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.confing import settings
+from app.core.database import SessionLocal
+from app.models.permission import Permission, role_permissions
+from app.models.role import Role
+from app.models.user import User
+from app.services.audit_service import AuditAction, create_audit_log
+
+# بیت هر دسترسی پیش‌فرض برابر جایگاه آن در این فهرست است
+DEFAULT_PERMISSIONS = ("create", "read", "update", "delete", "manage_users")
+# دسترسی مسیرهای مدیریتی (get_current_admin)؛ همیشه باید حداقل یک کاربر فعال آن را داشته باشد
+ADMIN_PERMISSION = "manage_users"
+DEFAULT_ROLE_PERMISSIONS = {
+    "admin": ("create", "read", "update", "delete", "manage_users"),
+    "moderator": ("create", "read", "update"),
+    "user": ("read",),
+}
+
+# یک snapshot برای هر دیتابیس (کلید: bind)؛ پس از هر تغییر دسترسی‌ها باطل می‌شود.
+# TTL فقط برای همگام شدن پردازه‌های دیگری است که تغییر را خودشان انجام نداده‌اند.
+permission_cache = TTLCache(settings.permission_cache_ttl_seconds)
+
+
+class PermissionSnapshot(NamedTuple):
+    """ماسک بیتی هر دسترسی و bitset هر نقش."""
+    masks: Dict[str, int]
+    role_bits: Dict[int, int]
+
+    def allows(self, role_id: Optional[int], permission: str) -> bool:
+        mask = self.masks.get(permission)
+        return mask is not None and self.role_bits.get(role_id, 0) & mask == mask
+
+
+def load_permission_snapshot(db: Session) -> PermissionSnapshot:
+    """
+    خواندن همه دسترسی‌ها و bitset نقش‌ها با دو کوئری.
+
+    تا وقتی جدول permissions خالی است (دیتابیس seed نشده)، نگاشت پیش‌فرض بر
+    اساس نام نقش استفاده می‌شود تا رفتار قبلی حفظ شود.
+    """
+    masks = {name: 1 << bit for name, bit in db.query(Permission.name, Permission.bit)}
+    role_bits: Dict[int, int] = defaultdict(int)
+
+    if masks:
+        rows = db.query(role_permissions.c.role_id, Permission.bit).join(
+            Permission, Permission.id == role_permissions.c.permission_id,
+        )
+        for role_id, bit in rows:
+            role_bits[role_id] |= 1 << bit
+    else:
+        masks = {name: 1 << bit for bit, name in enumerate(DEFAULT_PERMISSIONS)}
+        for role_id, role_name in db.query(Role.id, Role.name):
+            for name in DEFAULT_ROLE_PERMISSIONS.get(role_name, ()):
+                role_bits[role_id] |= masks[name]
+
+    return PermissionSnapshot(masks, dict(role_bits))
+
+
+def get_permission_snapshot(db: Optional[Session] = None) -> PermissionSnapshot:
+    """snapshot دسترسی‌ها از cache؛ فقط در اولین فراخوانی یا پس از ابطال به دیتابیس می‌رود."""
+    if db is None:
+        with SessionLocal() as session:
+            return get_permission_snapshot(session)
+    return permission_cache.get_or_load(db.get_bind(), lambda: load_permission_snapshot(db))
+
+
+def role_has_permission(db: Optional[Session], role_id: Optional[int], permission: str) -> bool:
+    """بررسی یک بیت در bitset نقش (با cache گرم، بدون کوئری)."""
+    return get_permission_snapshot(db).allows(role_id, permission)
+
+
+def invalidate_permission_cache() -> None:
+    permission_cache.invalidate()
+
+
+def ensure_permissions_initialized(db: Session) -> None:
+    """
+    ایجاد دسترسی‌های پیش‌فرض و، در اولین اجرا، اعطای نگاشت پیش‌فرض به نقش‌ها.
+
+    در اجراهای بعدی فقط دسترسی‌های جاافتاده اضافه می‌شوند و اعطاهای موجود
+    (که ممکن است ادمین تغییر داده باشد) دست نمی‌خورند.
+    """
+    bits = dict(db.query(Permission.name, Permission.bit).all())
+    first_run = not bits
+    next_bit = max(bits.values(), default=-1) + 1
+    for name in DEFAULT_PERMISSIONS:
+        if name not in bits:
+            db.add(Permission(name=name, bit=next_bit))
+            next_bit += 1
+    db.flush()
+
+    if first_run:
+        permissions = {permission.name: permission for permission in db.query(Permission)}
+        for role in db.query(Role).filter(Role.name.in_(DEFAULT_ROLE_PERMISSIONS)):
+            role.permissions = [permissions[name] for name in DEFAULT_ROLE_PERMISSIONS[role.name]]
+
+    db.commit()
+    invalidate_permission_cache()
+
+
+def _get_role_and_permission(db: Session, role_id: int, permission_name: str):
+    role = db.query(Role).filter(Role.id == role_id).first()
+    if not role:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="نقش یافت نشد")
+    permission = db.query(Permission).filter(Permission.name == permission_name).first()
+    if not permission:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="دسترسی یافت نشد")
+    return role, permission
+
+
+def get_role_permissions(db: Session, role_id: int) -> List[str]:
+    """نام دسترسی‌های یک نقش بر اساس snapshot."""
+    snapshot = get_permission_snapshot(db)
+    return sorted(name for name in snapshot.masks if snapshot.allows(role_id, name))
+
+
+def grant_permission(
+        db: Session,
+        role_id: int,
+        permission_name: str,
+        request: Request | None = None,
+        actor: User | None = None,
+) -> List[str]:
+    role, permission = _get_role_and_permission(db, role_id, permission_name)
+    if permission not in role.permissions:
+        role.permissions.append(permission)
+        db.commit()
+        invalidate_permission_cache()
+        create_audit_log(
+            db,
+            AuditAction.ADMIN_PERMISSION_GRANT,
+            request=request,
+            user=actor,
+            entity="role",
+            entity_id=role.id,
+            description=f"اعطای دسترسی {permission.name} به نقش {role.name}",
+        )
+    return get_role_permissions(db, role_id)
+
+
+def _has_other_active_holder(db: Session, role: Role, permission: Permission) -> bool:
+    """آیا کاربر فعالی با نقشی غیر از role این دسترسی را دارد؟"""
+    holder = (
+        db.query(User.id)
+        .join(role_permissions, role_permissions.c.role_id == User.role_id)
+        .filter(
+            role_permissions.c.permission_id == permission.id,
+            role_permissions.c.role_id != role.id,
+            User.is_active.is_(True),
+        )
+        .first()
+    )
+    return holder is not None
+
+
+def revoke_permission(
+        db: Session,
+        role_id: int,
+        permission_name: str,
+        request: Request | None = None,
+        actor: User | None = None,
+) -> List[str]:
+    role, permission = _get_role_and_permission(db, role_id, permission_name)
+    if permission in role.permissions:
+        # بدون این بررسی همه ادمین‌ها (و مسیر اعطای دوباره دسترسی) قفل می‌شوند؛
+        # نقشی که دسترسی را دارد ولی کاربر فعالی ندارد کافی نیست
+        if permission.name == ADMIN_PERMISSION and not _has_other_active_holder(db, role, permission):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="این دسترسی را نمی‌توان از آخرین نقش دارای کاربر فعال با این دسترسی گرفت",
+            )
+        role.permissions.remove(permission)
+        db.commit()
+        invalidate_permission_cache()
+        create_audit_log(
+            db,
+            AuditAction.ADMIN_PERMISSION_REVOKE,
+            request=request,
+            user=actor,
+            entity="role",
+            entity_id=role.id,
+            description=f"گرفتن دسترسی {permission.name} از نقش {role.name}",
+        )
+    return get_role_permissions(db, role_id)
@@ -1,9 +1,21 @@
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import Float, Integer, or_, text
 from sqlalchemy.orm import Session
-from fastapi import HTTPException
+from fastapi import HTTPException, Request, status
 
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.query_utils import build_search_match, prefix_filter, search_page_window, to_naive_utc
+from app.core.validators import normalize_digits, normalize_persian_text
+from app.models.role import Role
 from app.models.student_profile import StudentProfile
+from app.models.student_search import STUDENT_SEARCH_TABLE
 from app.models.user import User
 from app.schemas.student import StudentProfileOut, StudentProfileUpdate
+from app.services.audit_service import AuditAction, create_audit_log
+from app.services.export_service import parse_fields
+from app.services.outbox_service import OutboxEventType, add_outbox_event
 
 
 def get_my_profile(db: Session, current_user: User) -> StudentProfileOut:
@@ -25,7 +37,8 @@ def get_my_profile(db: Session, current_user: User) -> StudentProfileOut:
 def update_my_profile(
     db: Session,
     current_user: User,
-    data: StudentProfileUpdate
+    data: StudentProfileUpdate,
+    request: Request | None = None,
 ) -> StudentProfileOut:
     """
     بروزرسانی پروفایل دانشجویی کاربر جاری.
@@ -39,10 +52,183 @@ def update_my_profile(
     if not profile:
         raise HTTPException(status_code=404, detail="پروفایل یافت نشد")
 
-    for field, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(profile, field, value)
 
+    add_outbox_event(
+        db,
+        OutboxEventType.PROFILE_UPDATED,
+        aggregate="student_profile",
+        aggregate_id=profile.id,
+        payload={"profile_id": profile.id, "user_id": profile.user_id, "changes": changes, "by": "student"},
+    )
     db.commit()
     db.refresh(profile)
 
+    create_audit_log(
+        db,
+        AuditAction.UPDATE_PROFILE,
+        request=request,
+        user=current_user,
+        entity="student_profile",
+        entity_id=profile.id,
+        description="فیلدهای تغییر یافته: " + ", ".join(changes),
+    )
+
     return StudentProfileOut.from_orm(profile)
+
+
+# فیلدهای خروجی فهرست دانشجویان: نام فیلد -> (عنوان CSV/Excel، ستون)
+STUDENT_EXPORT_FIELDS = {
+    "id": ("ID", StudentProfile.id),
+    "user_id": ("User ID", StudentProfile.user_id),
+    "student_number": ("Student Number", StudentProfile.student_number),
+    "first_name": ("First Name", StudentProfile.first_name),
+    "last_name": ("Last Name", StudentProfile.last_name),
+    "national_code": ("National Code", StudentProfile.national_code),
+    "phone_number": ("Phone Number", StudentProfile.phone_number),
+    "gender": ("Gender", StudentProfile.gender),
+    "address": ("Address", StudentProfile.address),
+    "has_authenticated": ("Authenticated", StudentProfile.has_authenticated),
+    "is_active": ("Active", User.is_active),
+    "role": ("Role", Role.name),
+    "created_at": ("Created At", StudentProfile.created_at),
+    "updated_at": ("Updated At", StudentProfile.updated_at),
+}
+
+
+def parse_student_export_fields(columns: Optional[str]) -> Tuple[str, ...]:
+    """تبدیل پارامتر columns به لیست فیلدهای خروجی دانشجویان."""
+    return parse_fields(columns, STUDENT_EXPORT_FIELDS)
+
+
+def student_export_header(fields: Tuple[str, ...]) -> Tuple[str, ...]:
+    """عنوان ستون‌های CSV/Excel برای فیلدهای انتخاب‌شده."""
+    return tuple(STUDENT_EXPORT_FIELDS[field][0] for field in fields)
+
+
+def iter_student_export_rows(
+        db: Session,
+        fields: Optional[Tuple[str, ...]] = None,
+        gender: Optional[str] = None,
+        has_authenticated: Optional[bool] = None,
+        student_number_prefix: Optional[str] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+) -> Iterator[Tuple]:
+    """
+    ردیف‌های خروجی پروفایل‌ها (همراه با اطلاعات کاربر و نقش) به ترتیب شناسه.
+
+    هر دسته با keyset (id > آخرین شناسه) و projection فقط همان ستون‌ها خوانده
+    می‌شود؛ مصرف حافظه به اندازه یک دسته است نه کل فهرست.
+    """
+    fields = tuple(fields or STUDENT_EXPORT_FIELDS)
+    columns = [STUDENT_EXPORT_FIELDS[field][1] for field in fields]
+
+    query = (
+        db.query(*columns, StudentProfile.id.label("sort_id"))
+        .select_from(StudentProfile)
+        .join(User, User.id == StudentProfile.user_id)
+        .outerjoin(Role, Role.id == User.role_id)
+    )
+    if gender:
+        query = query.filter(StudentProfile.gender == gender)
+    if has_authenticated is not None:
+        query = query.filter(StudentProfile.has_authenticated.is_(has_authenticated))
+    if student_number_prefix:
+        query = query.filter(prefix_filter(StudentProfile.student_number, student_number_prefix))
+    # زمان‌ها به UTC بدون tzinfo ذخیره می‌شوند؛ بازه با tzinfo ابتدا تبدیل می‌شود
+    created_from, created_to = to_naive_utc(created_from), to_naive_utc(created_to)
+    if created_from:
+        query = query.filter(StudentProfile.created_at >= created_from)
+    if created_to:
+        query = query.filter(StudentProfile.created_at <= created_to)
+
+    last_id = 0
+    while True:
+        batch = (
+            query.filter(StudentProfile.id > last_id)
+            .order_by(StudentProfile.id)
+            .limit(batch_size)
+            .all()
+        )
+        for row in batch:
+            yield tuple(row[:-1])
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1][-1]
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor صفحه‌بندی نامعتبر است")
+
+
+def search_students(db: Session, q: str, limit: int = 20, cursor: Optional[str] = None) -> Dict:
+    """
+    جستجوی دانشجویان با نام یا شناسه‌های عددی.
+
+    - ورودی تماماً عددی (با ارقام فارسی/انگلیسی): جستجوی پیشوندی روی شماره دانشجویی،
+      کد ملی و شماره تلفن با ایندکس‌های همین ستون‌ها، به ترتیب id
+    - در غیر این صورت: جستجوی FTS5 روی نام نرمال‌شده (همه کلمات، کلمه آخر پیشوندی)
+      با رتبه‌بندی bm25
+
+    Returns:
+        {"students": List[StudentProfile], "limit": int, "has_more": bool, "next_cursor": Optional[str]}
+    """
+    digits = normalize_digits(q) or ""
+    if digits.isdigit():
+        query = db.query(StudentProfile).filter(or_(
+            prefix_filter(StudentProfile.student_number, digits),
+            prefix_filter(StudentProfile.national_code, digits),
+            prefix_filter(StudentProfile.phone_number, digits),
+        ))
+        if cursor:
+            tag, cursor_id = decode_cursor(cursor, size=2)
+            if tag != "id":
+                raise _invalid_cursor()
+            query = query.filter(StudentProfile.id > cursor_id)
+        rows = [(profile, None) for profile in query.order_by(StudentProfile.id).limit(limit + 1).all()]
+    else:
+        match = build_search_match(normalize_persian_text(q))
+        if match is None:
+            return {"students": [], "limit": limit, "has_more": False, "next_cursor": None}
+
+        matches = (
+            text(
+                f"SELECT rowid AS id, bm25({STUDENT_SEARCH_TABLE}) AS score "
+                f"FROM {STUDENT_SEARCH_TABLE} WHERE {STUDENT_SEARCH_TABLE} MATCH :match"
+            )
+            .bindparams(match=match)
+            .columns(id=Integer, score=Float)
+            .subquery("matches")
+        )
+        query = db.query(StudentProfile, matches.c.score).join(matches, matches.c.id == StudentProfile.id)
+        cursor_offset = None
+        if cursor:
+            tag, cursor_offset = decode_cursor(cursor, size=2)
+            if tag != "fts" or not isinstance(cursor_offset, int) or cursor_offset < 0:
+                raise _invalid_cursor()
+        # صفحه‌بندی بر اساس جایگاه در رتبه‌بندی؛ امتیاز bm25 بین درخواست‌ها ثابت نیست
+        offset, window = search_page_window(cursor_offset, limit)
+        # امتیاز bm25 منفی است؛ مرتب‌سازی صعودی یعنی مرتبط‌ترین اول
+        rows = query.order_by(matches.c.score, StudentProfile.id).offset(offset).limit(window).all() if window else []
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last_profile, last_score = rows[-1]
+        if last_score is None:
+            next_cursor = encode_cursor("id", last_profile.id)
+        else:
+            next_cursor = encode_cursor("fts", offset + limit)
+
+    return {
+        "students": [profile for profile, _ in rows],
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
@@ -1,9 +1,19 @@
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
+import json
+from typing import Dict, Optional
 
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, contains_eager
+from fastapi import HTTPException, Request, status
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.core.query_utils import prefix_filter
+from app.models.role import Role
 from app.models.student_profile import StudentProfile
 from app.models.user import User
 from app.schemas.student import StudentProfileUpdate, AdminStudentUpdate
+from app.schemas.user import BulkUserSelection
+from app.services.audit_service import AuditAction, create_audit_log
+from app.services.outbox_service import OutboxEventType, add_outbox_event
 
 
 def _check_uniqueness(
@@ -82,6 +92,100 @@ def get_all_students(db: Session):
     return db.query(StudentProfile).all()
 
 
+# زمان‌ها با دو قالب ذخیره می‌شوند: server_default بدون کسر ثانیه و مقادیر پایتونی با میکروثانیه؛
+# مقایسه رشته‌ای آن‌ها در cursor غلط است، پس روی قالب یکسان strftime مرتب و مقایسه می‌شود
+# (ایندکس عبارتی ix_users_created_at_sort همین عبارت را پوشش می‌دهد).
+USER_CREATED_AT_SORT_FORMAT = "%Y-%m-%d %H:%M:%f"
+
+# کلید مرتب‌سازی فهرست کاربران -> عبارت SQL
+USER_SORT_KEYS = {
+    "created_at": func.strftime(USER_CREATED_AT_SORT_FORMAT, User.created_at),
+    "student_number": User.student_number,
+    "last_name": func.coalesce(StudentProfile.last_name, ""),
+}
+
+
+def get_users_page(
+        db: Session,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "created_at",
+        order: str = "desc",
+        role: Optional[str] = None,
+        gender: Optional[str] = None,
+        is_active: Optional[bool] = None,
+        has_authenticated: Optional[bool] = None,
+) -> Dict:
+    """
+    یک صفحه از فهرست کاربران (همراه با پروفایل و نقش) با صفحه‌بندی keyset.
+
+    ترتیب بر اساس (کلید مرتب‌سازی، id) است و cursor مقدار همین دو را برای آخرین
+    ردیف نگه می‌دارد؛ هزینه هر صفحه مستقل از عمق آن است.
+
+    Returns:
+        {"users": List[User], "limit": int, "has_more": bool, "next_cursor": Optional[str]}
+    """
+    if sort not in USER_SORT_KEYS or order not in ("asc", "desc"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="مرتب‌سازی نامعتبر است")
+    sort_column = USER_SORT_KEYS[sort]
+    descending = order == "desc"
+
+    query = (
+        db.query(User)
+        .outerjoin(StudentProfile, StudentProfile.user_id == User.id)
+        .outerjoin(Role, Role.id == User.role_id)
+        .options(contains_eager(User.profile), contains_eager(User.role))
+        .add_columns(sort_column)
+    )
+    if role:
+        query = query.filter(Role.name == role)
+    if gender:
+        query = query.filter(StudentProfile.gender == gender)
+    if is_active is not None:
+        query = query.filter(User.is_active.is_(is_active))
+    if has_authenticated is not None:
+        query = query.filter(StudentProfile.has_authenticated.is_(has_authenticated))
+
+    if cursor:
+        cursor_sort, cursor_order, cursor_value, cursor_id = decode_cursor(cursor, size=4)
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="cursor صفحه‌بندی نامعتبر است")
+        if descending:
+            query = query.filter(or_(
+                sort_column < cursor_value,
+                and_(sort_column == cursor_value, User.id < cursor_id),
+            ))
+        else:
+            query = query.filter(or_(
+                sort_column > cursor_value,
+                and_(sort_column == cursor_value, User.id > cursor_id),
+            ))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), User.id.desc())
+    else:
+        query = query.order_by(sort_column.asc(), User.id.asc())
+
+    # یک ردیف اضافه برای تشخیص وجود صفحه بعد
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    users = [user for user, _ in rows]
+
+    next_cursor = None
+    if has_more and rows:
+        # مقدار cursor همان مقدار نرمال‌شده‌ای است که دیتابیس با آن مرتب کرده
+        last, last_sort_value = rows[-1]
+        next_cursor = encode_cursor(sort, order, last_sort_value, last.id)
+
+    return {
+        "users": users,
+        "limit": limit,
+        "has_more": has_more,
+        "next_cursor": next_cursor,
+    }
+
+
 def get_student_by_id(db: Session, student_id: int) -> StudentProfile:
     """
     دریافت پروفایل یک دانشجو با شناسه یکتا.
@@ -100,6 +204,8 @@ def admin_update_student(
     db: Session,
     student_id: int,
     data: AdminStudentUpdate,
+    request: Request | None = None,
+    actor: User | None = None,
 ) -> StudentProfile:
     """
     به‌روزرسانی پروفایل دانشجویی توسط ادمین.
@@ -115,12 +221,146 @@ def admin_update_student(
     )
 
     # به‌روزرسانی اطلاعات پروفایل توسط ادمین
-    for field, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    for field, value in changes.items():
         setattr(profile, field, value)
 
+    add_outbox_event(
+        db,
+        OutboxEventType.PROFILE_UPDATED,
+        aggregate="student_profile",
+        aggregate_id=profile.id,
+        payload={"profile_id": profile.id, "user_id": profile.user_id, "changes": changes, "by": "admin"},
+    )
     db.commit()
     db.refresh(profile)
+
+    create_audit_log(
+        db,
+        AuditAction.ADMIN_UPDATE,
+        request=request,
+        user=actor,
+        entity="student_profile",
+        entity_id=profile.id,
+        description=(
+            f"ویرایش پروفایل {profile.student_number} توسط ادمین؛ فیلدها: " + ", ".join(changes)
+        ),
+    )
     return profile
 
 
+# ---------------- عملیات گروهی ADMIN ----------------
+
+def _bulk_selection_clause(selection: BulkUserSelection):
+    """شرط WHERE کاربران انتخاب‌شده (فهرست id یا فیلتر) بدون بارگذاری ردیف‌ها."""
+    if selection.ids is not None:
+        return User.id.in_(selection.ids)
+
+    selection_filter = selection.filter
+    conditions = []
+    if selection_filter.role:
+        conditions.append(User.role_id.in_(select(Role.id).where(Role.name == selection_filter.role)))
+    if selection_filter.is_active is not None:
+        conditions.append(User.is_active.is_(selection_filter.is_active))
+    if selection_filter.student_number_prefix:
+        conditions.append(prefix_filter(User.student_number, selection_filter.student_number_prefix))
+
+    profile_conditions = []
+    if selection_filter.gender:
+        profile_conditions.append(StudentProfile.gender == selection_filter.gender)
+    if selection_filter.has_authenticated is not None:
+        profile_conditions.append(StudentProfile.has_authenticated.is_(selection_filter.has_authenticated))
+    if selection_filter.entry_year is not None:
+        profile_conditions.append(StudentProfile.entry_year == selection_filter.entry_year)
+    if selection_filter.faculty_code:
+        profile_conditions.append(StudentProfile.faculty_code == selection_filter.faculty_code)
+    if profile_conditions:
+        conditions.append(User.id.in_(select(StudentProfile.user_id).where(*profile_conditions)))
+    return and_(*conditions)
+
+
+def _describe_selection(selection: BulkUserSelection) -> str:
+    if selection.ids is not None:
+        return f"{len(selection.ids)} شناسه"
+    return json.dumps(selection.filter.dict(exclude_none=True), ensure_ascii=False)
+
+
+def _bulk_update(
+        db: Session,
+        query,
+        values: Dict,
+        operation: str,
+        selection: BulkUserSelection,
+        request: Request | None,
+        actor: User | None,
+) -> Dict:
+    """
+    اجرای یک UPDATE مجموعه‌ای در یک تراکنش و ثبت یک لاگ خلاصه (نه یک لاگ برای هر ردیف).
+
+    triggerهای شمارنده، دنباله تغییرات و ایندکس جستجو روی همین دستور اجرا می‌شوند.
+    """
+    try:
+        updated = query.update(values, synchronize_session=False)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    create_audit_log(
+        db,
+        AuditAction.ADMIN_BULK_UPDATE,
+        request=request,
+        user=actor,
+        entity=query.column_descriptions[0]["entity"].__tablename__,
+        description=f"{operation}: {updated} ردیف؛ انتخاب: {_describe_selection(selection)}",
+    )
+    return {"operation": operation, "updated": updated}
+
+
+def bulk_set_users_active(
+        db: Session,
+        selection: BulkUserSelection,
+        is_active: bool,
+        request: Request | None = None,
+        actor: User | None = None,
+) -> Dict:
+    """فعال/غیرفعال کردن گروهی کاربران؛ ادمین انجام‌دهنده هیچ‌وقت خودش را غیرفعال نمی‌کند."""
+    query = db.query(User).filter(_bulk_selection_clause(selection), User.is_active.isnot(is_active))
+    if actor is not None and not is_active:
+        query = query.filter(User.id != actor.id)
+    operation = "activate" if is_active else "deactivate"
+    return _bulk_update(db, query, {User.is_active: is_active}, operation, selection, request, actor)
+
 
+def bulk_change_role(
+        db: Session,
+        selection: BulkUserSelection,
+        role_name: str,
+        request: Request | None = None,
+        actor: User | None = None,
+) -> Dict:
+    """تغییر گروهی نقش کاربران (به جز خود ادمین انجام‌دهنده)."""
+    role = db.query(Role).filter(Role.name == role_name).first()
+    if not role:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"نقش '{role_name}' وجود ندارد")
+
+    query = db.query(User).filter(_bulk_selection_clause(selection), User.role_id != role.id)
+    if actor is not None:
+        query = query.filter(User.id != actor.id)
+    return _bulk_update(db, query, {User.role_id: role.id}, f"role={role.name}", selection, request, actor)
+
+
+def bulk_reset_authentication(
+        db: Session,
+        selection: BulkUserSelection,
+        request: Request | None = None,
+        actor: User | None = None,
+) -> Dict:
+    """بازنشانی گروهی has_authenticated پروفایل کاربران انتخاب‌شده."""
+    query = db.query(StudentProfile).filter(
+        StudentProfile.user_id.in_(select(User.id).where(_bulk_selection_clause(selection))),
+        StudentProfile.has_authenticated.is_(True),
+    )
+    return _bulk_update(
+        db, query, {StudentProfile.has_authenticated: False}, "reset_authentication", selection, request, actor,
+    )
@@ -0,0 +1,29 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def _query_budget(db, budget):
+    """شمارش دستورات SQL اجراشده روی engine و خطا در صورت عبور از بودجه."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) <= budget, (
+        f"{len(statements)} queries executed (budget {budget}):\n" + "\n".join(statements)
+    )
+
+
+@pytest.fixture
+def query_budget():
+    """بودجه کوئری: with query_budget(db, 3): ..."""
+    return _query_budget
@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers import admin_api
+from app.services.admin_auth_service import create_admin_token
+from app.services.user_service import get_users_page
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+LAST_NAMES = ["کریمی", "احمدی", "رضایی", "احمدی", "بهرامی"]
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_users(db):
+    user_role, admin_role = Role(name="user"), Role(name="admin")
+    db.add_all([user_role, admin_role])
+    db.flush()
+    created_at = datetime(2024, 1, 1)
+    for index, last_name in enumerate(LAST_NAMES):
+        user = User(
+            student_number=f"4010{index}",
+            hashed_password="x",
+            role_id=user_role.id,
+            is_active=index != 2,
+            # دو کاربر با زمان ثبت یکسان برای بررسی شکستن تساوی با id
+            created_at=created_at + timedelta(days=min(index, 3)),
+        )
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name=last_name,
+            national_code=f"{index:010d}",
+            student_number=f"4010{index}",
+            phone_number=f"0912{index:07d}",
+            gender="sister" if index % 2 else "brother",
+            has_authenticated=index < 2,
+        )
+        db.add(user)
+    db.add(User(student_number="admin", hashed_password="x", role_id=admin_role.id, created_at=created_at))
+    db.commit()
+
+
+def collect(db, **params):
+    ids, cursor = [], None
+    while True:
+        page = get_users_page(db, limit=2, cursor=cursor, **params)
+        ids += [user.id for user in page["users"]]
+        cursor = page["next_cursor"]
+        if not page["has_more"]:
+            return ids
+
+
+def test_keyset_pages_follow_each_sort_order():
+    db = make_db_session()
+    seed_users(db)
+
+    assert collect(db) == [5, 4, 3, 2, 6, 1]
+    assert collect(db, sort="created_at", order="asc") == [1, 6, 2, 3, 4, 5]
+    assert collect(db, sort="student_number", order="asc") == [1, 2, 3, 4, 5, 6]
+    assert collect(db, sort="last_name", order="asc") == [6, 2, 4, 5, 3, 1]
+
+
+def test_keyset_pages_over_server_default_timestamps():
+    db = make_db_session()
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    # created_at با server_default (بدون کسر ثانیه) و در نتیجه همه با زمان یکسان
+    db.add_all([User(student_number=f"4020{index}", hashed_password="x", role_id=role.id) for index in range(5)])
+    db.commit()
+    db.add(User(student_number="40300", hashed_password="x", role_id=role.id, created_at=datetime(2000, 1, 1)))
+    db.commit()
+
+    assert collect(db) == [5, 4, 3, 2, 1, 6]
+    assert collect(db, sort="created_at", order="asc") == [6, 1, 2, 3, 4, 5]
+
+
+def test_filters_and_invalid_cursor():
+    db = make_db_session()
+    seed_users(db)
+
+    assert collect(db, role="admin") == [6]
+    assert collect(db, gender="sister", order="asc") == [2, 4]
+    assert collect(db, is_active=False) == [3]
+    assert collect(db, has_authenticated=True, role="user") == [2, 1]
+
+    cursor = get_users_page(db, limit=1)["next_cursor"]
+    with pytest.raises(HTTPException) as exc:
+        get_users_page(db, limit=1, cursor=cursor, sort="student_number")
+    assert exc.value.status_code == 400
+
+
+def test_users_endpoint_serializes_profile_and_role():
+    db = make_db_session()
+    seed_users(db)
+
+    page = admin_api.list_users(
+        db=db, limit=2, cursor=None, sort="created_at", order="desc",
+        role=None, gender=None, is_active=None, has_authenticated=None,
+    )
+
+    assert [item["id"] for item in page["items"]] == [5, 4]
+    assert page["items"][0]["role"]["name"] == "user"
+    assert page["items"][0]["profile"]["last_name"] == "بهرامی"
+    assert page["has_more"] is True and page["next_cursor"]
+
+
+def test_users_endpoint_requires_admin_cookie():
+    with pytest.raises(HTTPException) as exc:
+        admin_api.require_admin_session(SimpleNamespace(cookies={}))
+    assert exc.value.status_code == 401
+
+    admin_api.require_admin_session(SimpleNamespace(cookies={"admin_access_token": create_admin_token()}))
@@ -0,0 +1,155 @@
+import gzip
+import os
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_archive import AuditArchive, AuditArchiveCount
+from app.models.audit_log import AuditLog
+from app.models.user import User
+from app.services import audit_archive_service
+from app.services.audit_archive_service import archive_audit_logs, count_archived_logs
+from app.services.audit_service import get_audit_logs, get_simple_audit_stats, iter_audit_logs
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_logs(db):
+    """دو لاگ در هر روز از ژانویه تا مارس ۲۰۲۴."""
+    user = User(student_number="123456789", hashed_password="x")
+    db.add(user)
+    db.flush()
+    day = datetime(2024, 1, 1, 8, 0, 0)
+    while day < datetime(2024, 4, 1):
+        db.add(AuditLog(action="LOGIN", user_id=user.id, created_at=day))
+        db.add(AuditLog(action="REGISTER", created_at=day + timedelta(hours=1)))
+        day += timedelta(days=1)
+    db.commit()
+    return user
+
+
+def keys(logs):
+    return [(log.created_at, log.id) for log in logs]
+
+
+def test_whole_months_move_to_compressed_archives(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    expected = keys(db.query(AuditLog).order_by(AuditLog.created_at.desc(), AuditLog.id.desc()))
+
+    archives = archive_audit_logs(db, before=datetime(2024, 3, 15), archive_dir=str(tmp_path))
+
+    assert [archive.period for archive in archives] == ["2024-01", "2024-02"]
+    assert [archive.row_count for archive in archives] == [62, 58]
+    assert db.query(AuditLog).filter(AuditLog.created_at < datetime(2024, 3, 1)).count() == 0
+    assert db.query(AuditLog).count() == 62
+    for archive in archives:
+        with gzip.open(archive.path, "rt", encoding="utf-8") as handle:
+            assert sum(1 for _ in handle) == archive.row_count
+
+    stats = get_simple_audit_stats(db)
+    assert stats["total_logs"] == 62
+    assert stats["archived_logs"] == 120
+
+    # پیمایش و صفحه‌بندی بدون تغییر ادامه دارد
+    assert keys(iter_audit_logs(db, batch_size=25)) == expected
+
+    seen = []
+    cursor = None
+    while True:
+        page = get_audit_logs(db, limit=40, cursor=cursor)
+        seen.extend(page["logs"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert keys(seen) == expected
+
+
+def test_archived_logs_respect_filters_and_total(tmp_path):
+    db = make_db_session()
+    user = seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 3, 1), archive_dir=str(tmp_path))
+
+    page = get_audit_logs(
+        db,
+        limit=100,
+        action="LOGIN",
+        date_from=datetime(2024, 2, 10),
+        date_to=datetime(2024, 3, 5),
+    )
+    assert page["total"] == 24
+    assert len(page["logs"]) == 24
+    assert all(log.action == "LOGIN" for log in page["logs"])
+    assert page["logs"][-1].created_at == datetime(2024, 2, 10, 8, 0, 0)
+
+    # کاربر لاگ‌های آرشیوی برای نمایش بارگذاری می‌شود
+    archived = [log for log in page["logs"] if log.created_at < datetime(2024, 3, 1)]
+    assert archived and all(log.user.id == user.id for log in archived)
+
+
+def test_timezone_aware_filters_match_naive_utc(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 3, 1), archive_dir=str(tmp_path))
+    tehran = timezone(timedelta(hours=3, minutes=30))
+
+    page = get_audit_logs(
+        db,
+        limit=100,
+        action="LOGIN",
+        date_from=datetime(2024, 2, 10, 3, 30, tzinfo=tehran),
+        date_to=datetime(2024, 3, 5, tzinfo=timezone.utc),
+    )
+    assert page["total"] == 24
+    assert page["logs"][-1].created_at == datetime(2024, 2, 10, 8, 0, 0)
+    assert count_archived_logs(db, date_from=datetime(2024, 2, 1, tzinfo=timezone.utc)) == 58
+    assert len(list(iter_audit_logs(db, date_to=datetime(2024, 1, 1, 9, tzinfo=timezone.utc)))) == 2
+
+
+def test_archive_counts_avoid_opening_files(tmp_path, monkeypatch):
+    db = make_db_session()
+    user = seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 3, 1), archive_dir=str(tmp_path))
+    opened = []
+    read_archive = audit_archive_service._read_archive
+    monkeypatch.setattr(audit_archive_service, "_read_archive", lambda path: opened.append(path) or read_archive(path))
+
+    assert count_archived_logs(db, action="LOGIN") == 60
+    assert count_archived_logs(db, user_id=user.id, date_from=datetime(2024, 1, 1)) == 60
+    assert count_archived_logs(db, action="REGISTER", date_to=datetime(2024, 3, 1)) == 60
+    assert opened == []
+
+    # فقط فایل ماهی که بازه از وسط آن می‌گذرد باز می‌شود
+    assert count_archived_logs(db, action="LOGIN", date_from=datetime(2024, 2, 10)) == 20
+    assert [os.path.basename(path) for path in opened] == ["audit-2024-02-001.ndjson.gz"]
+
+    # آرشیوهای قدیمی بدون شمارش همچنان با خواندن فایل شمرده می‌شوند
+    db.query(AuditArchiveCount).delete()
+    db.commit()
+    assert count_archived_logs(db, action="LOGIN") == 60
+
+
+def test_rearchiving_a_month_appends_a_new_part(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 2, 1), archive_dir=str(tmp_path))
+
+    db.add(AuditLog(action="LATE", created_at=datetime(2024, 1, 20)))
+    db.commit()
+    archives = archive_audit_logs(db, before=datetime(2024, 2, 1), archive_dir=str(tmp_path))
+
+    assert [(archive.period, archive.row_count) for archive in archives] == [("2024-01", 1)]
+    assert db.query(AuditArchive).count() == 2
+    assert sorted(os.listdir(tmp_path)) == ["audit-2024-01-001.ndjson.gz", "audit-2024-01-002.ndjson.gz"]
+    assert [log.action for log in iter_audit_logs(db, action="LATE")] == ["LATE"]
@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.schemas.auth import RegisterRequest
+from app.schemas.student import AdminStudentUpdate, StudentProfileUpdate
+from app.services import audit_service, student_service, user_service
+from app.services.audit_service import AuditAction, create_audit_log
+from app.services.audit_sink import AuditSink
+from app.services.auth_service import authenticate_user, register_user
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def make_request(ip: str = "10.0.0.5"):
+    return SimpleNamespace(client=SimpleNamespace(host=ip), headers={})
+
+
+def register(db, request=None):
+    payload = RegisterRequest(
+        first_name="علی",
+        last_name="رضایی",
+        student_number="123456789",
+        national_code="0123456789",
+        phone_number="09123456789",
+        gender="brother",
+        address="تهران",
+    )
+    return register_user(db, payload, request=request)
+
+
+def actions(db):
+    return [log.action for log in db.query(AuditLog).order_by(AuditLog.id)]
+
+
+def test_registration_and_logins_are_audited():
+    db = make_db_session()
+
+    user = register(db, request=make_request())
+    assert authenticate_user(db, "0123456789", "123456789") is not None
+    assert authenticate_user(db, "0123456789", "999999999") is None
+
+    assert actions(db) == [AuditAction.REGISTER, AuditAction.LOGIN, AuditAction.LOGIN_FAILED]
+    register_log = db.query(AuditLog).filter(AuditLog.action == AuditAction.REGISTER).one()
+    assert register_log.user_id == user.id
+    assert register_log.ip_address == "10.0.0.5"
+    assert "0123456789" in register_log.description
+
+
+def test_profile_edits_and_admin_updates_are_audited():
+    db = make_db_session()
+    user = register(db)
+
+    student_service.update_my_profile(db, user, StudentProfileUpdate(address="قم"))
+    user_service.admin_update_student(
+        db,
+        user.profile.id,
+        AdminStudentUpdate(
+            first_name="علی",
+            last_name="محمدی",
+            national_code="0123456789",
+            student_number="123456789",
+            phone_number="09123456789",
+            gender="brother",
+        ),
+    )
+
+    assert actions(db)[-2:] == [AuditAction.UPDATE_PROFILE, AuditAction.ADMIN_UPDATE]
+    admin_log = db.query(AuditLog).filter(AuditLog.action == AuditAction.ADMIN_UPDATE).one()
+    assert admin_log.entity == "student_profile"
+    assert admin_log.entity_id == user.profile.id
+
+
+def test_sampled_event_types_are_thinned(monkeypatch):
+    db = make_db_session()
+    monkeypatch.setitem(audit_service.AUDIT_SAMPLE_RATES, AuditAction.LOGIN, 0.0)
+
+    assert create_audit_log(db, AuditAction.LOGIN) is False
+    assert create_audit_log(db, AuditAction.LOGIN_FAILED) is True
+    assert actions(db) == [AuditAction.LOGIN_FAILED]
+
+
+def test_events_go_to_running_sink_without_touching_the_session(monkeypatch):
+    sink = AuditSink(session_factory=make_db_session)
+    monkeypatch.setattr(audit_service, "audit_sink", sink)
+    monkeypatch.setattr(AuditSink, "is_running", property(lambda self: True))
+    db = make_db_session()
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    for _ in range(1000):
+        create_audit_log(db, AuditAction.LOGIN, request=make_request())
+
+    assert sink.stats()["enqueued"] == 1000
+    assert statements == []
+    assert not db.new and not db.dirty
+    assert db.query(AuditLog).count() == 0
+
+
+def test_events_without_session_are_queued_while_sink_runs(monkeypatch):
+    sink = AuditSink(session_factory=make_db_session)
+    monkeypatch.setattr(audit_service, "audit_sink", sink)
+    monkeypatch.setattr(AuditSink, "is_running", property(lambda self: True))
+
+    assert create_audit_log(None, AuditAction.ADMIN_LOGOUT, request=make_request()) is True
+    assert sink.stats()["queue_depth"] == 1
+
+
+def test_events_without_session_are_written_when_sink_is_stopped(monkeypatch):
+    db = make_db_session()
+    sink = AuditSink(session_factory=make_db_session)
+    monkeypatch.setattr(audit_service, "audit_sink", sink)
+    monkeypatch.setattr(audit_service, "SessionLocal", sessionmaker(bind=db.get_bind()))
+
+    assert create_audit_log(None, AuditAction.ADMIN_LOGIN_FAILED, request=make_request()) is True
+    assert sink.stats()["queue_depth"] == 0
+    assert actions(db) == [AuditAction.ADMIN_LOGIN_FAILED]
@@ -0,0 +1,222 @@
+import asyncio
+import csv
+import gzip
+import io
+import itertools
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.routers import admin_audit
+from app.services.audit_archive_service import archive_audit_logs
+from app.services.audit_service import (
+    AUDIT_EXPORT_HEADER,
+    iter_audit_log_rows,
+    iter_audit_logs,
+    parse_export_fields,
+)
+from app.services.export_service import accepts_gzip, gzip_chunks, iter_csv_chunks, iter_ndjson_chunks, write_xlsx
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    # StaticPool: StreamingResponse ردیف‌ها را در threadpool می‌خواند
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_logs(db, count=30):
+    base = datetime(2024, 1, 20, 12, 0, 0)
+    for index in range(count):
+        db.add(AuditLog(
+            action="LOGIN" if index % 2 else "REGISTER",
+            user_id=index % 3 or None,
+            description=f"رویداد {index}",
+            created_at=base + timedelta(days=index // 3),
+        ))
+    db.commit()
+
+
+def read_body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def make_request(accept_encoding=None):
+    return SimpleNamespace(headers={"accept-encoding": accept_encoding} if accept_encoding else {})
+
+
+FILTERS = dict(user_id=None, action=None, date_from=None, date_to=None, q=None)
+
+
+def test_csv_chunks_are_produced_incrementally():
+    rows = ((index, "x") for index in itertools.count())
+
+    first_chunk = next(iter_csv_chunks(("n", "value"), rows, rows_per_chunk=10))
+
+    assert first_chunk.decode("utf-8").splitlines() == ["n,value"] + [f"{n},x" for n in range(10)]
+
+
+def test_gzip_chunks_round_trip():
+    chunks = [f"line {index}\n".encode("utf-8") for index in range(1000)]
+
+    compressed = b"".join(gzip_chunks(chunks))
+
+    assert gzip.decompress(compressed) == b"".join(chunks)
+
+
+def test_export_rows_are_projected_tuples_in_page_order(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 2, 1), archive_dir=str(tmp_path))
+    expected = [(log.id, log.created_at) for log in iter_audit_logs(db)]
+
+    rows = list(iter_audit_log_rows(db, batch_size=4))
+
+    assert all(type(row) is tuple and len(row) == len(AUDIT_EXPORT_HEADER) for row in rows)
+    assert [(row[0], row[-1]) for row in rows] == expected
+    assert len(rows) == 30
+
+    filtered = list(iter_audit_log_rows(db, action="LOGIN", user_id=1))
+    assert filtered and all(row[1] == 1 and row[2] == "LOGIN" for row in filtered)
+
+
+def test_csv_endpoint_streams_plain_and_gzip(monkeypatch):
+    db = make_db_session()
+    seed_logs(db, count=5)
+    monkeypatch.setattr(admin_audit, "ensure_admin_interface_auth", lambda request: None)
+
+    plain = admin_audit.export_audit_logs_csv(make_request(), db=db, filters=FILTERS, columns=None, compress=False)
+    lines = list(csv.reader(io.StringIO(read_body(plain).decode("utf-8"))))
+    assert plain.media_type == "text/csv"
+    assert lines[0] == list(AUDIT_EXPORT_HEADER)
+    assert len(lines) == 6
+
+    packed = admin_audit.export_audit_logs_csv(make_request(), db=db, filters=FILTERS, columns=None, compress=True)
+    assert packed.headers["content-disposition"].endswith("audit_logs.csv.gz")
+    assert gzip.decompress(read_body(packed)).decode("utf-8").splitlines()[1:] == [
+        ",".join(line) for line in lines[1:]
+    ]
+
+
+def test_xlsx_rows_are_split_across_sheets(tmp_path):
+    from openpyxl import load_workbook
+
+    path = str(tmp_path / "rows.xlsx")
+    rows = ((index, datetime(2024, 1, 1, 12, 0, index)) for index in range(7))
+
+    written = write_xlsx(path, ("n", "at"), rows, sheet_title="Audit Logs", max_rows_per_sheet=3)
+
+    workbook = load_workbook(path, read_only=True)
+    assert written == 7
+    assert workbook.sheetnames == ["Audit Logs", "Audit Logs (2)", "Audit Logs (3)"]
+    sheets = [list(sheet.values) for sheet in workbook.worksheets]
+    assert [len(values) for values in sheets] == [4, 4, 2]
+    assert all(values[0] == ("n", "at") for values in sheets)
+    assert sheets[2][1] == (6, "2024-01-01 12:00:06")
+
+
+def test_excel_endpoint_serves_temp_file_and_removes_it(monkeypatch):
+    from openpyxl import load_workbook
+
+    db = make_db_session()
+    seed_logs(db, count=5)
+    monkeypatch.setattr(admin_audit, "ensure_admin_interface_auth", lambda request: None)
+
+    response = admin_audit.export_audit_logs_excel(
+        None, db=db, filters={**FILTERS, "action": "LOGIN"}, columns=None,
+    )
+
+    assert response.headers["content-disposition"].endswith('filename="audit_logs.xlsx"')
+    rows = list(load_workbook(response.path, read_only=True).active.values)
+    assert rows[0] == AUDIT_EXPORT_HEADER
+    assert len(rows) == 3
+
+    asyncio.run(response.background())
+    assert not os.path.exists(response.path)
+
+
+def test_parse_export_fields():
+    assert parse_export_fields(None) == parse_export_fields("") == (
+        "id", "user_id", "action", "entity", "entity_id", "description", "ip_address", "created_at",
+    )
+    assert parse_export_fields(" action, id ,action") == ("action", "id")
+    with pytest.raises(HTTPException) as exc:
+        parse_export_fields("id,password")
+    assert exc.value.status_code == 400
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, *;q=0.5")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip(None)
+
+
+def test_export_rows_project_only_requested_columns(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    archive_audit_logs(db, before=datetime(2024, 1, 25), archive_dir=str(tmp_path))
+    expected = [(log.action, log.id) for log in iter_audit_logs(db)]
+
+    rows = list(iter_audit_log_rows(db, fields=("action", "id"), batch_size=4))
+
+    assert rows == expected
+
+
+def test_ndjson_chunks_serialize_one_object_per_line():
+    rows = [(1, "LOGIN", datetime(2024, 1, 1, 8, 30)), (2, "رویداد", None)]
+
+    body = b"".join(iter_ndjson_chunks(("id", "action", "created_at"), rows, rows_per_chunk=1))
+
+    assert [json.loads(line) for line in body.decode("utf-8").splitlines()] == [
+        {"id": 1, "action": "LOGIN", "created_at": "2024-01-01T08:30:00"},
+        {"id": 2, "action": "رویداد", "created_at": None},
+    ]
+
+
+def test_ndjson_endpoint_honours_columns_and_accept_encoding(monkeypatch):
+    db = make_db_session()
+    seed_logs(db, count=4)
+    monkeypatch.setattr(admin_audit, "ensure_admin_interface_auth", lambda request: None)
+
+    plain = admin_audit.export_audit_logs_ndjson(make_request(), db=db, filters=FILTERS, columns="id,action")
+    records = [json.loads(line) for line in read_body(plain).decode("utf-8").splitlines()]
+    assert plain.media_type == "application/x-ndjson"
+    assert "content-encoding" not in plain.headers
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert len(records) == 4 and all(set(record) == {"id", "action"} for record in records)
+
+    encoded = admin_audit.export_audit_logs_ndjson(
+        make_request("gzip, br"), db=db, filters=FILTERS, columns="id,action",
+    )
+    assert encoded.headers["content-encoding"] == "gzip"
+    assert encoded.headers["content-disposition"].endswith("audit_logs.ndjson")
+    assert [json.loads(line) for line in gzip.decompress(read_body(encoded)).splitlines()] == records
+
+    packed = admin_audit.export_audit_logs_ndjson_gz(make_request(), db=db, filters=FILTERS, columns=None)
+    assert packed.media_type == "application/gzip"
+    assert "content-encoding" not in packed.headers
+    assert len(gzip.decompress(read_body(packed)).splitlines()) == 4
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import AUDIT_LOG_INDEXES, Base, ensure_audit_logs_schema
+from app.models.audit_log import AuditLog
+from app.services.audit_service import build_audit_logs_query
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def explain(db, query) -> str:
+    compiled = query.statement.compile(dialect=db.bind.dialect)
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_unfiltered_listing_walks_created_at_index_without_sorting():
+    db = make_db_session()
+
+    plan = explain(db, build_audit_logs_query(db).limit(50))
+
+    assert "ix_audit_logs_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_action_filter_uses_action_created_at_index():
+    db = make_db_session()
+    now = datetime.now(timezone.utc)
+
+    plan = explain(db, build_audit_logs_query(db, action="LOGIN", date_from=now - timedelta(days=7)).limit(50))
+
+    assert "ix_audit_logs_action_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_user_filter_uses_user_id_created_at_index():
+    db = make_db_session()
+
+    plan = explain(db, build_audit_logs_query(db, user_id=7).limit(50))
+
+    assert "ix_audit_logs_user_id_created_at" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def test_date_range_filter_searches_created_at_index():
+    db = make_db_session()
+    now = datetime.now(timezone.utc)
+
+    plan = explain(db, build_audit_logs_query(db, date_from=now - timedelta(days=1), date_to=now))
+
+    assert "SEARCH" in plan
+    assert "ix_audit_logs_created_at" in plan
+
+
+def test_created_at_default_is_evaluated_per_row():
+    db = make_db_session()
+
+    first = AuditLog(action="LOGIN")
+    db.add(first)
+    db.commit()
+    second = AuditLog(action="LOGIN")
+    db.add(second)
+    db.commit()
+
+    assert AuditLog.__table__.c.created_at.default.is_callable
+    assert first.created_at is not None
+    assert second.created_at >= first.created_at
+    assert abs(datetime.now(timezone.utc).replace(tzinfo=None) - second.created_at) < timedelta(minutes=1)
+
+
+def test_ensure_audit_logs_schema_adds_missing_indexes_to_legacy_table():
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE audit_logs (id INTEGER PRIMARY KEY, user_id INTEGER, action VARCHAR(50) NOT NULL, "
+            "entity VARCHAR(50), entity_id INTEGER, description VARCHAR(255), ip_address VARCHAR(45), "
+            "created_at DATETIME)"
+        ))
+
+    ensure_audit_logs_schema(bind=engine)
+
+    index_names = {index["name"] for index in inspect(engine).get_indexes("audit_logs")}
+    assert set(AUDIT_LOG_INDEXES) <= index_names
@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.services.audit_service import get_audit_logs, iter_audit_logs
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_logs(db, count: int = 9):
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for index in range(count):
+        # هر سه لاگ زمان یکسان دارند تا شکستن تساوی با id بررسی شود
+        db.add(AuditLog(
+            action="LOGIN" if index % 2 else "REGISTER",
+            user_id=index % 3 or None,
+            created_at=base + timedelta(minutes=index // 3),
+        ))
+    db.commit()
+
+
+def test_cursor_pages_cover_all_rows_in_order_without_duplicates():
+    db = make_db_session()
+    seed_logs(db)
+
+    seen = []
+    cursor = None
+    while True:
+        page = get_audit_logs(db, limit=2, cursor=cursor)
+        seen.extend(page["logs"])
+        cursor = page["next_cursor"]
+        assert page["has_more"] is (cursor is not None)
+        if not cursor:
+            break
+
+    keys = [(log.created_at, log.id) for log in seen]
+    assert len(keys) == 9
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == 9
+
+
+def test_total_can_be_skipped():
+    db = make_db_session()
+    seed_logs(db)
+
+    assert get_audit_logs(db, limit=3)["total"] == 9
+    assert get_audit_logs(db, limit=3, include_total=False)["total"] is None
+
+
+def test_cursor_respects_filters():
+    db = make_db_session()
+    seed_logs(db)
+
+    first_page = get_audit_logs(db, limit=2, action="LOGIN")
+    second_page = get_audit_logs(db, limit=2, action="LOGIN", cursor=first_page["next_cursor"])
+
+    actions = {log.action for log in first_page["logs"] + second_page["logs"]}
+    assert actions == {"LOGIN"}
+    assert first_page["total"] == 4
+    assert not second_page["has_more"]
+
+
+def test_invalid_cursor_is_rejected_with_400():
+    db = make_db_session()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_audit_logs(db, cursor="not-a-cursor")
+
+    assert exc_info.value.status_code == 400
+
+
+def test_iter_audit_logs_walks_every_batch():
+    db = make_db_session()
+    seed_logs(db)
+
+    ids = [log.id for log in iter_audit_logs(db, batch_size=4, user_id=1)]
+
+    assert len(ids) == 3
+    assert len(set(ids)) == 3
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.models.audit_rollup import AuditRollup
+from app.routers.admin_dashboard import audit_logs_stats
+from app.services.admin_auth_service import create_admin_token
+from app.services.audit_archive_service import archive_audit_logs
+from app.services.audit_rollup_service import get_audit_timeseries, rebuild_audit_rollups
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_logs(db):
+    db.add_all([
+        AuditLog(action="LOGIN", user_id=1, created_at=datetime(2024, 1, 1, 8, 15)),
+        AuditLog(action="LOGIN", user_id=2, created_at=datetime(2024, 1, 1, 8, 45)),
+        AuditLog(action="REGISTER", entity="user", user_id=2, created_at=datetime(2024, 1, 1, 9, 5)),
+    ])
+    db.commit()
+    # درج دسته‌ای (مثل audit sink) هم باید rollup را به‌روز کند
+    db.execute(insert(AuditLog), [
+        {"action": "LOGIN", "user_id": 1, "created_at": datetime(2024, 1, 3, 23, 59)},
+        {"action": "ADMIN_LOGIN", "entity": "admin", "created_at": datetime(2024, 1, 3, 0, 0)},
+    ])
+    db.commit()
+
+
+def rollup_rows(db):
+    return sorted(
+        (row.granularity, row.dimension, row.bucket, row.key, row.count)
+        for row in db.query(AuditRollup)
+    )
+
+
+def test_daily_series_is_zero_filled_from_rollups():
+    db = make_db_session()
+    seed_logs(db)
+
+    result = get_audit_timeseries(db, datetime(2024, 1, 1), datetime(2024, 1, 4))
+
+    assert result["buckets"] == ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"]
+    assert result["series"] == {"total": [3, 0, 2, 0]}
+
+
+def test_hourly_series_grouped_by_user_and_action():
+    db = make_db_session()
+    seed_logs(db)
+
+    by_user = get_audit_timeseries(
+        db, datetime(2024, 1, 1, 8), datetime(2024, 1, 1, 10), granularity="hour", group_by="user",
+    )
+    assert by_user["buckets"] == ["2024-01-01 08:00", "2024-01-01 09:00", "2024-01-01 10:00"]
+    assert by_user["series"] == {"1": [1, 0, 0], "2": [1, 1, 0]}
+
+    by_action = get_audit_timeseries(
+        db, datetime(2024, 1, 1), datetime(2024, 1, 3, 23), group_by="action", top=1,
+    )
+    assert by_action["totals"] == {"LOGIN": 3, "REGISTER": 1, "ADMIN_LOGIN": 1}
+    assert list(by_action["series"]) == ["LOGIN"]
+
+
+def test_rebuild_matches_triggers_and_keeps_archived_history(tmp_path):
+    db = make_db_session()
+    seed_logs(db)
+    db.add(AuditLog(action="LOGIN", created_at=datetime(2024, 2, 1, 12)))
+    db.commit()
+    maintained = rollup_rows(db)
+
+    archive_audit_logs(db, before=datetime(2024, 2, 1), archive_dir=str(tmp_path))
+    assert db.query(AuditLog).count() == 1
+    assert rollup_rows(db) == maintained
+
+    rebuild_audit_rollups(db)
+    assert rollup_rows(db) == maintained
+
+
+def test_timezone_aware_bounds_are_converted_to_utc():
+    db = make_db_session()
+    seed_logs(db)
+    tehran = timezone(timedelta(hours=3, minutes=30))
+
+    result = get_audit_timeseries(db, datetime(2024, 1, 1, 3, 30, tzinfo=tehran), datetime(2024, 1, 4))
+    assert result["buckets"][0] == "2024-01-01"
+    assert result["series"] == {"total": [3, 0, 2, 0]}
+
+    request = SimpleNamespace(cookies={"admin_access_token": create_admin_token()})
+    stats = audit_logs_stats(
+        request, db=db, date_from=datetime(2024, 1, 1, tzinfo=timezone.utc), date_to=None,
+        granularity="day", group_by=None, top=10,
+    )
+    assert stats["buckets"][0] == "2024-01-01"
+
+
+def test_invalid_ranges_are_rejected():
+    db = make_db_session()
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_audit_timeseries(db, datetime(2024, 1, 1), datetime(2024, 6, 1), granularity="hour")
+    assert exc_info.value.status_code == 400
+
+    with pytest.raises(HTTPException):
+        get_audit_timeseries(db, datetime(2024, 1, 1), datetime(2024, 1, 2), group_by="ip_address")
+
+
+def test_stats_endpoint_requires_admin_cookie():
+    db = make_db_session()
+    seed_logs(db)
+    request = SimpleNamespace(cookies={})
+
+    with pytest.raises(HTTPException) as exc_info:
+        audit_logs_stats(request, db=db, date_from=None, date_to=None, granularity="day", group_by=None, top=10)
+    assert exc_info.value.status_code == 401
+
+    request.cookies["admin_access_token"] = create_admin_token()
+    result = audit_logs_stats(
+        request,
+        db=db,
+        date_from=datetime(2024, 1, 1) - timedelta(days=1),
+        date_to=datetime(2024, 1, 1),
+        granularity="day",
+        group_by=None,
+        top=10,
+    )
+    assert result["series"]["total"] == [0, 3]
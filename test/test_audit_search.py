@@ -0,0 +1,132 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core import query_utils
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.models.audit_search import install_audit_search
+from app.services.audit_service import build_search_match, get_audit_logs, iter_audit_logs
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_logs(db):
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    descriptions = [
+        "ثبت‌نام علی رضایی با کد ملی 0123456789",
+        "ورود علی رضایی",
+        "ویرایش پروفایل مریم احمدی",
+        "ورود ناموفق کد ملی 0123456789",
+        "ثبت‌نام مریم احمدی با کد ملی 0987654321",
+    ]
+    for index, description in enumerate(descriptions):
+        db.add(AuditLog(
+            action="REGISTER" if description.startswith("ثبت") else "LOGIN",
+            entity="user",
+            description=description,
+            created_at=base + timedelta(minutes=index),
+        ))
+    db.commit()
+
+
+def descriptions(logs):
+    return [log.description for log in logs]
+
+
+def test_search_match_quotes_user_input():
+    assert build_search_match("  ") is None
+    assert build_search_match('علی "OR رضا') == '"علی" """OR" "رضا"*'
+
+
+def test_search_finds_names_and_national_code_prefixes():
+    db = make_db_session()
+    seed_logs(db)
+
+    result = get_audit_logs(db, q="علی رضایی")
+    assert result["total"] == 2
+    assert set(descriptions(result["logs"])) == {
+        "ثبت‌نام علی رضایی با کد ملی 0123456789",
+        "ورود علی رضایی",
+    }
+
+    by_code = get_audit_logs(db, q="01234", action="LOGIN")
+    assert descriptions(by_code["logs"]) == ["ورود ناموفق کد ملی 0123456789"]
+
+
+def test_search_pages_cover_ranked_results_once():
+    db = make_db_session()
+    seed_logs(db)
+    expected = get_audit_logs(db, q="کد", limit=10)["logs"]
+
+    seen = []
+    cursor = None
+    while True:
+        page = get_audit_logs(db, q="کد", limit=1, cursor=cursor, include_total=False)
+        seen.extend(page["logs"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert [log.id for log in seen] == [log.id for log in expected]
+    assert len(seen) == 3
+    assert [log.id for log in iter_audit_logs(db, q="کد", batch_size=2)] == [log.id for log in expected]
+
+
+def test_ranked_pages_stop_at_result_bound(monkeypatch):
+    db = make_db_session()
+    seed_logs(db)
+    monkeypatch.setattr(query_utils, "SEARCH_MAX_RESULTS", 2)
+
+    first = get_audit_logs(db, q="کد", limit=1, include_total=False)
+    second = get_audit_logs(db, q="کد", limit=1, cursor=first["next_cursor"], include_total=False)
+
+    assert len(first["logs"]) == len(second["logs"]) == 1
+    assert first["logs"][0].id != second["logs"][0].id
+    assert second["has_more"] is False
+    assert second["next_cursor"] is None
+
+
+def test_index_follows_updates_deletes_and_rebuilds():
+    db = make_db_session()
+    seed_logs(db)
+
+    log = db.query(AuditLog).filter(AuditLog.description == "ورود علی رضایی").one()
+    log.description = "ورود حسین کریمی"
+    db.commit()
+    assert get_audit_logs(db, q="حسین")["total"] == 1
+    assert get_audit_logs(db, q="علی")["total"] == 1
+
+    db.delete(log)
+    db.commit()
+    assert get_audit_logs(db, q="حسین")["total"] == 0
+
+    # دیتابیس قدیمی بدون ایندکس: ساخت دوباره از روی لاگ‌های موجود
+    connection = db.connection()
+    connection.execute(text("DROP TABLE audit_logs_fts"))
+    install_audit_search(connection)
+    db.commit()
+    assert get_audit_logs(db, q="مریم")["total"] == 2
+
+
+def test_time_cursor_is_rejected_for_search():
+    db = make_db_session()
+    seed_logs(db)
+    time_cursor = get_audit_logs(db, limit=1)["next_cursor"]
+
+    with pytest.raises(HTTPException) as exc_info:
+        get_audit_logs(db, q="کد", cursor=time_cursor)
+    assert exc_info.value.status_code == 400
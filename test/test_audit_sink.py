@@ -0,0 +1,112 @@
+import asyncio
+import random
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.services.audit_sink import AuditSink
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def make_event(action: str = "LOGIN") -> dict:
+    return {
+        "user_id": None,
+        "action": action,
+        "entity": None,
+        "entity_id": None,
+        "description": None,
+        "ip_address": "127.0.0.1",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def test_flush_writes_queued_events_in_batches():
+    session_factory = make_session_factory()
+    sink = AuditSink(session_factory=session_factory, batch_size=2)
+
+    for _ in range(5):
+        assert sink.submit(make_event())
+
+    assert sink.stats()["queue_depth"] == 5
+    assert sink.flush() == 5
+
+    db = session_factory()
+    assert db.query(AuditLog).count() == 5
+    stats = sink.stats()
+    assert stats["written"] == 5
+    assert stats["queue_depth"] == 0
+
+
+def test_drop_policy_counts_rejected_events():
+    sink = AuditSink(session_factory=make_session_factory(), queue_size=2, policy="drop")
+
+    results = [sink.submit(make_event()) for _ in range(4)]
+
+    assert results == [True, True, False, False]
+    assert sink.stats()["dropped"] == 2
+
+
+def test_block_policy_gives_up_after_timeout():
+    sink = AuditSink(session_factory=make_session_factory(), queue_size=1, policy="block", block_timeout=0.01)
+
+    assert sink.submit(make_event())
+    assert not sink.submit(make_event())
+    assert sink.stats()["dropped"] == 1
+
+
+def test_block_policy_never_waits_on_the_event_loop():
+    # اگر روی حلقه منتظر می‌ماند، این تست block_timeout ثانیه طول می‌کشید
+    sink = AuditSink(session_factory=make_session_factory(), queue_size=1, policy="block", block_timeout=30)
+
+    async def handler():
+        return [sink.submit(make_event()), sink.submit(make_event())]
+
+    assert asyncio.run(handler()) == [True, False]
+    assert sink.stats()["dropped"] == 1
+
+
+def test_sample_policy_thins_events_when_queue_fills():
+    random.seed(1)
+    sink = AuditSink(session_factory=make_session_factory(), queue_size=100, policy="sample")
+
+    for _ in range(300):
+        sink.submit(make_event())
+
+    stats = sink.stats()
+    assert stats["sampled_out"] > 0
+    assert stats["enqueued"] + stats["sampled_out"] + stats["dropped"] == 300
+    assert stats["enqueued"] <= 100
+
+
+def test_stop_flushes_pending_events_on_shutdown():
+    session_factory = make_session_factory()
+    sink = AuditSink(session_factory=session_factory, flush_interval=60)
+
+    async def scenario():
+        await sink.start()
+        assert sink.is_running
+        sink.submit(make_event("REGISTER"))
+        await sink.stop()
+
+    asyncio.run(scenario())
+
+    assert not sink.is_running
+    assert session_factory().query(AuditLog).filter(AuditLog.action == "REGISTER").count() == 1
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.routers import admin_dashboard
+from app.services import audit_service
+from app.services.admin_auth_service import create_admin_token
+from app.services.audit_broadcast import AuditBroadcaster
+from app.services.audit_sink import AuditSink
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def make_event(action="LOGIN", user_id=1):
+    return {
+        "user_id": user_id,
+        "action": action,
+        "entity": None,
+        "entity_id": None,
+        "description": None,
+        "ip_address": "127.0.0.1",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+class StreamRequest:
+    def __init__(self, cookies):
+        self.cookies = cookies
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def test_subscribers_receive_matching_events_published_from_other_threads():
+    broadcaster = AuditBroadcaster()
+
+    async def scenario():
+        logins = broadcaster.subscribe(actions=["LOGIN"])
+        user_two = broadcaster.subscribe(user_id=2)
+
+        publisher = threading.Thread(
+            target=broadcaster.publish,
+            args=([make_event("LOGIN", 1), make_event("REGISTER", 2)],),
+        )
+        publisher.start()
+        publisher.join()
+
+        first = await asyncio.wait_for(logins.get(), timeout=1)
+        second = await asyncio.wait_for(user_two.get(), timeout=1)
+        return first, second, logins._queue.qsize(), user_two._queue.qsize()
+
+    first, second, logins_left, user_two_left = asyncio.run(scenario())
+    assert (first["action"], second["action"]) == ("LOGIN", "REGISTER")
+    assert logins_left == user_two_left == 0
+
+
+def test_slow_subscriber_buffer_is_bounded():
+    broadcaster = AuditBroadcaster(max_subscribers=1)
+
+    async def scenario():
+        subscription = broadcaster.subscribe(buffer_size=2)
+        assert broadcaster.subscribe() is None
+
+        broadcaster.publish([make_event(user_id=index) for index in range(5)])
+        await asyncio.sleep(0)
+        received = [await subscription.get(), await subscription.get()]
+        return subscription, received
+
+    subscription, received = asyncio.run(scenario())
+    assert [event["user_id"] for event in received] == [3, 4]
+    assert subscription.missed == 3
+
+
+def test_sink_publishes_only_written_batches():
+    published = []
+    sink = AuditSink(session_factory=make_session_factory(), on_write=published.extend)
+    sink.submit(make_event())
+    sink.flush()
+    assert len(published) == 1
+
+    broken = AuditSink(session_factory=make_session_factory(), on_write=published.extend)
+    broken.submit({"action": None})
+    broken.flush()
+    assert len(published) == 1
+
+
+def test_synchronous_audit_writes_are_published(monkeypatch):
+    published = []
+    monkeypatch.setattr(audit_service.audit_broadcaster, "publish", published.extend)
+    db = make_session_factory()()
+
+    audit_service.create_audit_log(db, "LOGIN")
+    assert [event["action"] for event in published] == ["LOGIN"]
+
+
+def test_stream_endpoint_sends_filtered_events(monkeypatch):
+    broadcaster = AuditBroadcaster()
+    monkeypatch.setattr(admin_dashboard, "audit_broadcaster", broadcaster)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(admin_dashboard.audit_logs_stream(StreamRequest({}), action=None, user_id=None, entity=None))
+    assert exc_info.value.status_code == 401
+
+    async def scenario():
+        request = StreamRequest({"admin_access_token": create_admin_token()})
+        response = await admin_dashboard.audit_logs_stream(request, action="LOGIN,REGISTER", user_id=None, entity=None)
+        stream = response.body_iterator
+
+        chunks = [await stream.__anext__()]
+        broadcaster.publish([make_event("LOGOUT"), make_event("REGISTER")])
+        chunks.append(await asyncio.wait_for(stream.__anext__(), timeout=1))
+
+        request.disconnected = True
+        await stream.aclose()
+        return response, chunks
+
+    response, chunks = asyncio.run(scenario())
+    assert response.media_type == "text/event-stream"
+    assert chunks[0].startswith("retry:")
+    assert chunks[1].startswith("event: audit\n")
+    payload = json.loads(chunks[1].split("data: ", 1)[1])
+    assert payload["action"] == "REGISTER"
+    assert broadcaster.subscriber_count == 0
@@ -0,0 +1,161 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.models.change_log import ChangeLog
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.schemas.user import BulkRoleUpdate, BulkUserSelection
+from app.services.counter_service import get_counter
+from app.services.user_service import bulk_change_role, bulk_reset_authentication, bulk_set_users_active
+
+STUDENTS = [
+    # (شماره دانشجویی، جنسیت، احراز هویت)
+    ("401120001", "brother", True),
+    ("401120002", "sister", True),
+    ("401150001", "sister", False),
+    ("402120001", "brother", True),
+]
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_users(db):
+    user_role, admin_role = Role(name="user"), Role(name="admin")
+    db.add_all([user_role, admin_role])
+    db.flush()
+    admin = User(student_number="admin0001", hashed_password="x", role_id=admin_role.id)
+    db.add(admin)
+    for index, (student_number, gender, authenticated) in enumerate(STUDENTS):
+        user = User(
+            student_number=student_number,
+            hashed_password="x",
+            role_id=user_role.id,
+            updated_at=datetime(2024, 1, 1),
+        )
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name="خانوادگی",
+            student_number=student_number,
+            national_code=f"00000000{index:02d}",
+            phone_number=f"0912000000{index}",
+            gender=gender,
+            has_authenticated=authenticated,
+        )
+        db.add(user)
+    db.commit()
+    return admin
+
+
+def count_updates(db):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE"):
+            statements.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", record)
+    return statements
+
+
+def active_flags(db):
+    return dict(db.query(User.student_number, User.is_active).order_by(User.id).all())
+
+
+def test_selection_requires_ids_or_non_empty_filter():
+    with pytest.raises(ValidationError):
+        BulkUserSelection()
+    with pytest.raises(ValidationError):
+        BulkUserSelection(ids=[1], filter={"gender": "brother"})
+    with pytest.raises(ValidationError):
+        BulkUserSelection(filter={})
+    with pytest.raises(ValidationError):
+        BulkUserSelection(filter={"gender": "other"})
+
+
+def test_deactivate_by_filter_is_one_update_with_one_summary_log():
+    db = make_db_session()
+    admin = seed_users(db)
+    updates = count_updates(db)
+
+    result = bulk_set_users_active(
+        db, BulkUserSelection(filter={"entry_year": 1401, "faculty_code": "12"}), False, actor=admin,
+    )
+
+    assert result == {"operation": "deactivate", "updated": 2}
+    assert len(updates) == 1
+    assert active_flags(db) == {
+        "admin0001": True, "401120001": False, "401120002": False, "401150001": True, "402120001": True,
+    }
+    assert db.query(User).filter(User.student_number == "401120001").one().updated_at > datetime(2024, 1, 1)
+
+    logs = db.query(AuditLog).all()
+    assert len(logs) == 1
+    assert logs[0].action == "ADMIN_BULK_UPDATE"
+    assert logs[0].entity == "users"
+    assert logs[0].user_id == admin.id
+    assert "deactivate: 2" in logs[0].description
+
+    # تغییرات ردیف‌ها توسط trigger در دنباله تغییرات ثبت شده‌اند
+    changed = {row.entity_id for row in db.query(ChangeLog).filter(ChangeLog.operation == "update")}
+    assert changed == {2, 3}
+
+
+def test_deactivate_never_touches_acting_admin_and_skips_unchanged_rows():
+    db = make_db_session()
+    admin = seed_users(db)
+
+    first = bulk_set_users_active(db, BulkUserSelection(ids=[1, 2, 3]), False, actor=admin)
+    second = bulk_set_users_active(db, BulkUserSelection(ids=[1, 2, 3]), False, actor=admin)
+    reactivated = bulk_set_users_active(db, BulkUserSelection(filter={"is_active": False}), True, actor=admin)
+
+    assert first["updated"] == 2
+    assert second["updated"] == 0
+    assert reactivated["updated"] == 2
+    assert all(active_flags(db).values())
+
+
+def test_change_role_updates_counters_and_rejects_unknown_role():
+    db = make_db_session()
+    admin = seed_users(db)
+
+    data = BulkRoleUpdate(filter={"gender": "sister"}, role="admin")
+    result = bulk_change_role(db, data, data.role, actor=admin)
+
+    assert result == {"operation": "role=admin", "updated": 2}
+    roles = dict(db.query(User.student_number, Role.name).join(Role, Role.id == User.role_id).all())
+    assert roles["401120002"] == roles["401150001"] == "admin"
+    assert roles["401120001"] == "user"
+    assert get_counter(db, "users.role:2") == 3
+
+    with pytest.raises(HTTPException) as exc_info:
+        bulk_change_role(db, BulkUserSelection(ids=[2]), "missing", actor=admin)
+    assert exc_info.value.status_code == 400
+
+
+def test_reset_authentication_by_ids_and_prefix():
+    db = make_db_session()
+    admin = seed_users(db)
+    updates = count_updates(db)
+
+    result = bulk_reset_authentication(db, BulkUserSelection(filter={"student_number_prefix": "4011"}), actor=admin)
+
+    assert result == {"operation": "reset_authentication", "updated": 2}
+    assert len(updates) == 1
+    flags = dict(db.query(StudentProfile.student_number, StudentProfile.has_authenticated).all())
+    assert flags == {"401120001": False, "401120002": False, "401150001": False, "402120001": True}
+    assert db.query(AuditLog).one().entity == "student_profiles"
+
+    assert bulk_reset_authentication(db, BulkUserSelection(ids=[5]), actor=admin)["updated"] == 1
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.change_log import ChangeLog, install_change_log_triggers
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers import admin
+from app.services.change_feed_service import compact_change_log, get_student_changes
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def add_student(db, index, role):
+    user = User(student_number=f"4010{index:04d}", hashed_password="x", role_id=role.id)
+    user.profile = StudentProfile(
+        first_name="نام",
+        last_name="خانوادگی",
+        national_code=f"{index:010d}",
+        student_number=f"4010{index:04d}",
+        phone_number=f"0912{index:07d}",
+        gender="sister",
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_changes_are_collapsed_and_include_deletes():
+    db = make_db_session()
+    role = Role(name="user")
+    db.add(role)
+    db.commit()
+    first = add_student(db, 1, role)
+    second = add_student(db, 2, role)
+
+    initial = get_student_changes(db)
+    assert {(change["entity"], change["id"]) for change in initial["changes"]} == {
+        ("user", first.id), ("student_profile", first.profile.id),
+        ("user", second.id), ("student_profile", second.profile.id),
+    }
+    assert initial["changes"][0]["data"]["role"]["name"] == "user"
+
+    first.profile.address = "تهران"
+    db.commit()
+    first.profile.address = "قم"
+    db.commit()
+    second_profile_id = second.profile.id
+    db.delete(second)
+    db.commit()
+
+    delta = get_student_changes(db, since=initial["next_cursor"])
+    by_key = {(change["entity"], change["id"]): change for change in delta["changes"]}
+    assert set(by_key) == {("student_profile", first.profile.id), ("user", second.id), ("student_profile", second_profile_id)}
+    assert by_key[("student_profile", first.profile.id)]["data"]["address"] == "قم"
+    assert by_key[("user", second.id)]["operation"] == "delete"
+    assert by_key[("user", second.id)]["data"] is None
+
+    idle = get_student_changes(db, since=delta["next_cursor"])
+    assert idle == {"changes": [], "next_cursor": delta["next_cursor"], "has_more": False}
+
+
+def test_changes_are_paged_by_sequence():
+    db = make_db_session()
+    role = Role(name="user")
+    db.add(role)
+    db.commit()
+    for index in range(3):
+        add_student(db, index, role)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page = admin.list_student_changes(since=cursor, limit=4, db=db)
+        seen += [change["seq"] for change in page["changes"]]
+        cursor, pages = page["next_cursor"], pages + 1
+        if not page["has_more"]:
+            break
+
+    assert pages == 2
+    assert seen == sorted(seen) and len(seen) == 6
+
+
+def test_triggers_backfill_existing_rows_once():
+    db = make_db_session()
+    role = Role(name="user")
+    db.add(role)
+    db.commit()
+    add_student(db, 1, role)
+    connection = db.connection()
+    for name in ("insert", "update", "delete"):
+        connection.exec_driver_sql(f"DROP TRIGGER trg_change_log_users_{name}")
+    db.query(ChangeLog).delete()
+    db.commit()
+
+    install_change_log_triggers(db.connection())
+    install_change_log_triggers(db.connection())
+    db.commit()
+
+    assert [(entry.entity, entry.operation) for entry in db.query(ChangeLog)] == [("user", "insert")]
+    assert "ix_student_profiles_updated_at" in {
+        index["name"] for index in inspect(db.get_bind()).get_indexes("student_profiles")
+    }
+
+
+def test_compaction_keeps_latest_entry_per_row():
+    db = make_db_session()
+    role = Role(name="user")
+    db.add(role)
+    db.commit()
+    first = add_student(db, 1, role)
+    second = add_student(db, 2, role)
+    for address in ("تهران", "قم", "مشهد"):
+        first.profile.address = address
+        db.commit()
+    db.delete(second)
+    db.commit()
+    before = get_student_changes(db)
+    total = db.query(ChangeLog).count()
+
+    # ردیف‌های جدیدتر از cutoff دست نمی‌خورند
+    assert compact_change_log(db, before=datetime(2000, 1, 1)) == 0
+    assert compact_change_log(db, before=datetime.now() + timedelta(days=2)) == total - 4
+
+    keys = [(entry.entity, entry.entity_id) for entry in db.query(ChangeLog)]
+    assert len(keys) == len(set(keys)) == 4
+    after = get_student_changes(db)
+    assert [(change["seq"], change["data"]) for change in after["changes"]] == [
+        (change["seq"], change["data"]) for change in before["changes"]
+    ]
+    assert after["next_cursor"] == before["next_cursor"]
@@ -0,0 +1,136 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, backfill_student_cohorts
+from app.models.role import Role
+from app.models.student_profile import StudentProfile, parse_student_number_cohort
+from app.models.user import User
+from app.routers import admin_api
+from app.services import analytics_service
+from app.services.analytics_service import get_cohort_breakdown
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+STUDENTS = [
+    # (شماره دانشجویی، جنسیت، احراز هویت)
+    ("401120001", "brother", True),
+    ("401120002", "sister", False),
+    ("401150001", "sister", True),
+    ("402120001", "brother", False),
+    ("402120002", "brother", True),
+]
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_profiles(db):
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    for index, (student_number, gender, authenticated) in enumerate(STUDENTS):
+        user = User(student_number=student_number, hashed_password="x", role_id=role.id)
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name="خانوادگی",
+            student_number=student_number,
+            national_code=f"00000000{index:02d}",
+            phone_number=f"0912000000{index}",
+            gender=gender,
+            has_authenticated=authenticated,
+        )
+        db.add(user)
+    db.commit()
+
+
+def test_parse_student_number_cohort():
+    assert parse_student_number_cohort("401120001") == (1401, "12")
+    assert parse_student_number_cohort("۳۹۹۰۵۱۲۳۴") == (1399, "05")
+    assert parse_student_number_cohort("40") == (None, None)
+    assert parse_student_number_cohort(None) == (None, None)
+
+
+def test_cohort_columns_follow_student_number():
+    db = make_db_session()
+    seed_profiles(db)
+
+    profile = db.query(StudentProfile).filter(StudentProfile.student_number == "401150001").one()
+    assert (profile.entry_year, profile.faculty_code) == (1401, "15")
+
+    profile.student_number = "403200001"
+    db.commit()
+    assert db.execute(text(
+        "SELECT entry_year, faculty_code FROM student_profiles WHERE id = :id"
+    ), {"id": profile.id}).one() == (1403, "20")
+
+
+def test_backfill_fills_existing_rows_in_batches():
+    db = make_db_session()
+    seed_profiles(db)
+    db.execute(text("UPDATE student_profiles SET entry_year = NULL, faculty_code = NULL"))
+    db.execute(text("UPDATE student_profiles SET student_number = 'x' WHERE id = 2"))
+    db.commit()
+
+    updated = backfill_student_cohorts(bind=db.get_bind(), batch_size=2)
+
+    assert updated == 4
+    rows = db.execute(text("SELECT id, entry_year, faculty_code FROM student_profiles ORDER BY id")).fetchall()
+    assert rows == [(1, 1401, "12"), (2, None, None), (3, 1401, "15"), (4, 1402, "12"), (5, 1402, "12")]
+    assert backfill_student_cohorts(bind=db.get_bind(), batch_size=2) == 0
+
+
+def test_cohort_breakdown_by_entry_year_and_faculty():
+    db = make_db_session()
+    seed_profiles(db)
+
+    by_year = get_cohort_breakdown(db)
+    assert by_year["group_by"] == "entry_year"
+    assert by_year["cohorts"] == [
+        {
+            "entry_year": 1401,
+            "registered": 3,
+            "authenticated": 2,
+            "by_gender": {"brother": 1, "sister": 2},
+            "authenticated_ratio": 0.6667,
+        },
+        {
+            "entry_year": 1402,
+            "registered": 2,
+            "authenticated": 1,
+            "by_gender": {"brother": 2},
+            "authenticated_ratio": 0.5,
+        },
+    ]
+
+    by_faculty = get_cohort_breakdown(db, entry_year=1401)
+    assert by_faculty["group_by"] == "faculty_code"
+    assert [(item["faculty_code"], item["registered"]) for item in by_faculty["cohorts"]] == [("12", 2), ("15", 1)]
+
+
+def test_cohort_query_is_an_index_scan():
+    db = make_db_session()
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT entry_year, faculty_code, gender, has_authenticated, count(*) "
+        "FROM student_profiles GROUP BY entry_year, faculty_code, gender, has_authenticated"
+    )).fetchall()
+
+    details = " ".join(row[-1] for row in plan)
+    assert "COVERING INDEX ix_student_profiles_cohort" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_cohort_endpoints_are_cached():
+    db = make_db_session()
+    seed_profiles(db)
+    analytics_service.analytics_cache.invalidate()
+
+    first = admin_api.cohort_analytics(db=db)
+    assert admin_api.cohort_analytics(db=db) is first
+    assert admin_api.cohort_faculty_analytics(1402, db=db)["cohorts"][0]["faculty_code"] == "12"
+    analytics_service.analytics_cache.invalidate()
@@ -0,0 +1,87 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.audit_log import AuditLog
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.audit_service import get_simple_audit_stats
+from app.services.counter_service import get_counter, get_user_totals, reconcile_counters
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False})
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def add_student(db, role, index: int, gender: str):
+    user = User(student_number=f"40000000{index}", hashed_password="x", role_id=role.id)
+    db.add(user)
+    db.flush()
+    db.add(StudentProfile(
+        user_id=user.id,
+        first_name="نام",
+        last_name="خانوادگی",
+        national_code=f"000000000{index}",
+        student_number=f"40000000{index}",
+        phone_number=f"0912000000{index}",
+        gender=gender,
+    ))
+    db.commit()
+    return user
+
+
+def test_audit_log_counters_follow_inserts_updates_and_deletes():
+    db = make_db_session()
+    db.add_all([AuditLog(action="LOGIN"), AuditLog(action="LOGIN"), AuditLog(action="REGISTER")])
+    db.commit()
+
+    assert get_simple_audit_stats(db) == {"total_logs": 3, "archived_logs": 0, "actions": {"LOGIN": 2, "REGISTER": 1}}
+
+    log = db.query(AuditLog).filter(AuditLog.action == "REGISTER").first()
+    log.action = "LOGIN"
+    db.commit()
+    db.delete(db.query(AuditLog).first())
+    db.commit()
+
+    assert get_simple_audit_stats(db) == {"total_logs": 2, "archived_logs": 0, "actions": {"LOGIN": 2}}
+
+
+def test_user_counters_track_roles_and_genders():
+    db = make_db_session()
+    user_role = Role(name="user")
+    admin_role = Role(name="admin")
+    db.add_all([user_role, admin_role])
+    db.commit()
+
+    first = add_student(db, user_role, 1, "brother")
+    add_student(db, user_role, 2, "sister")
+    add_student(db, user_role, 3, "sister")
+
+    first.role_id = admin_role.id
+    first.profile.gender = "sister"
+    db.commit()
+
+    totals = get_user_totals(db)
+    assert totals["users"] == 3
+    assert totals["roles"] == 2
+    assert totals["student_profiles"] == 3
+    assert totals["users_by_role"] == {"user": 2, "admin": 1}
+    assert totals["profiles_by_gender"] == {"sister": 3}
+
+
+def test_reconcile_rebuilds_drifted_counters():
+    db = make_db_session()
+    db.add_all([AuditLog(action="LOGIN") for _ in range(4)])
+    db.commit()
+    db.execute(text("UPDATE counters SET value = 99"))
+    db.commit()
+
+    reconcile_counters(db)
+
+    assert get_counter(db, "audit_logs.total") == 4
+    assert get_counter(db, "audit_logs.action:LOGIN") == 4
+    assert get_counter(db, "users.total") == 0
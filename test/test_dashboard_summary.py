@@ -0,0 +1,159 @@
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.cache import TTLCache
+from app.core.database import Base
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.services.dashboard_service import get_dashboard_summary
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_users(db):
+    user_role, admin_role = Role(name="user"), Role(name="admin")
+    db.add_all([user_role, admin_role])
+    db.flush()
+    for index, (gender, authenticated, active) in enumerate([
+        ("brother", True, True),
+        ("sister", False, True),
+        ("sister", True, False),
+    ]):
+        user = User(student_number=f"40100{index}", hashed_password="x", role_id=user_role.id, is_active=active)
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name="خانوادگی",
+            national_code=f"{index:010d}",
+            student_number=f"40100{index}",
+            phone_number=f"0912{index:07d}",
+            gender=gender,
+            has_authenticated=authenticated,
+        )
+        db.add(user)
+    db.add(User(student_number="admin", hashed_password="x", role_id=admin_role.id))
+    db.commit()
+
+
+def test_summary_is_one_aggregate_query():
+    db = make_db_session()
+    seed_users(db)
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    summary = get_dashboard_summary(db)
+
+    assert len(statements) == 1
+    assert summary == {
+        "total_users": 4,
+        "active_users": 3,
+        "inactive_users": 1,
+        "profiles": 3,
+        "authenticated_profiles": 2,
+        "by_role": {"user": 3, "admin": 1},
+        "by_gender": {"brother": 1, "sister": 2},
+    }
+
+
+def test_ttl_cache_expires_and_invalidates():
+    now = [100.0]
+    cache = TTLCache(ttl_seconds=30, clock=lambda: now[0])
+    calls = []
+
+    def loader():
+        calls.append(now[0])
+        return len(calls)
+
+    assert cache.get_or_load("summary", loader) == 1
+    now[0] += 29
+    assert cache.get_or_load("summary", loader) == 1
+    now[0] += 2
+    assert cache.get_or_load("summary", loader) == 2
+    cache.invalidate("summary")
+    assert cache.get_or_load("summary", loader) == 3
+    assert cache.get_or_load("other", loader, ttl_seconds=0) == 4
+    assert cache.get_or_load("other", loader, ttl_seconds=0) == 5
+
+
+def test_ttl_cache_purges_expired_entries_and_caps_size():
+    now = [100.0]
+    cache = TTLCache(ttl_seconds=30, clock=lambda: now[0], max_entries=3)
+
+    for day in range(5):
+        cache.get_or_load(("range", day), lambda: day)
+    assert len(cache) == 3
+    # قدیمی‌ترین کلیدها کنار گذاشته شده‌اند
+    assert cache.get_or_load(("range", 0), lambda: "reloaded") == "reloaded"
+    assert cache.get_or_load(("range", 4), lambda: "reloaded") == 4
+
+    now[0] += 31
+    cache.get_or_load("fresh", lambda: "value")
+    assert len(cache) == 1
+    # قفل کلیدها فقط تا پایان درخواست‌های همان کلید نگه داشته می‌شوند
+    assert cache._key_locks == {}
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(ttl_seconds=30)
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("summary", slow_loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_key_lock_is_kept_while_requests_wait_on_it():
+    cache = TTLCache(ttl_seconds=0)
+    calls = []
+    loading = threading.Event()
+    release = threading.Event()
+
+    def blocking_loader():
+        calls.append(1)
+        loading.set()
+        release.wait(2)
+        return "value"
+
+    first = threading.Thread(target=cache.get_or_load, args=("summary", blocking_loader))
+    first.start()
+    loading.wait(2)
+    waiter = threading.Thread(target=cache.get_or_load, args=("summary", lambda: calls.append(2)))
+    waiter.start()
+    while cache._key_locks["summary"][1] < 2:
+        time.sleep(0.001)
+
+    # درج کلید دیگر قفل کلیدی را که درخواست منتظرش است حذف نمی‌کند
+    cache.get_or_load("other", lambda: "x", ttl_seconds=30)
+    assert cache._key_locks["summary"][1] == 2
+    release.set()
+    first.join()
+    waiter.join()
+
+    # ttl صفر: درخواست دوم بعد از اولی و با همان قفل بارگذاری می‌کند
+    assert calls == [1, 2]
+    assert cache._key_locks == {}
@@ -0,0 +1,163 @@
+import random
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.deps import get_db
+from app.models.duplicate_candidate import DuplicateCandidate
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers import admin_dashboard
+from app.services.admin_auth_service import create_admin_token
+from app.services.duplicate_service import (
+    DuplicateScanJob,
+    find_duplicate_pairs,
+    normalize_person_name,
+    review_duplicate_candidate,
+    scan_duplicates,
+)
+
+PROFILES = [
+    # (نام، نام خانوادگی، کد ملی، تلفن)
+    ("علی", "رضایی", "0012345678", "09120000001"),
+    ("علي", "رضايي", "0012345679", "09350000002"),   # همان فرد با ی عربی و یک رقم اشتباه در کد ملی
+    ("مریم", "احمدی", "0099999999", "09121111111"),
+    ("مريم", "احمدی", "0055555555", "09121111112"),  # نام یکسان و یک رقم اختلاف در تلفن
+    ("زهرا", "کریمی", "0077777777", "09123333333"),
+    ("زهرا", "کریمی", "0066666666", "09124444444"),   # فقط نام یکسان؛ کافی نیست
+]
+
+
+def make_db_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local
+
+
+def seed_profiles(db):
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    for index, (first_name, last_name, national_code, phone_number) in enumerate(PROFILES):
+        user = User(student_number=f"40112000{index}", hashed_password="x", role_id=role.id)
+        user.profile = StudentProfile(
+            first_name=first_name,
+            last_name=last_name,
+            student_number=user.student_number,
+            national_code=national_code,
+            phone_number=phone_number,
+            gender="brother",
+        )
+        db.add(user)
+    db.commit()
+
+
+def test_normalize_person_name_ignores_arabic_letters_and_spaces():
+    assert normalize_person_name("علي رضا", "كريمی") == normalize_person_name("علیرضا", "کریمی")
+
+
+def test_find_duplicate_pairs_scores_signals():
+    profiles = [
+        (index + 1, normalize_person_name(first, last), national_code, phone)
+        for index, (first, last, national_code, phone) in enumerate(PROFILES)
+    ]
+
+    pairs, stats = find_duplicate_pairs(profiles)
+
+    assert pairs == {
+        (1, 2): (0.9, ["name", "national_code"]),
+        (3, 4): (0.7, ["name", "phone"]),
+    }
+    assert stats["candidates"] == 2
+
+
+def test_blocking_keeps_comparisons_near_linear():
+    rng = random.Random(7)
+    profiles = [
+        (
+            index,
+            f"name{index}",
+            "".join(rng.choice("0123456789") for _ in range(10)),
+            "09" + "".join(rng.choice("0123456789") for _ in range(9)),
+        )
+        for index in range(1, 3001)
+    ]
+    # یک تکرار واقعی با یک رقم اختلاف در کد ملی
+    original = profiles[100]
+    typo = original[2][:-1] + str((int(original[2][-1]) + 1) % 10)
+    profiles.append((5000, original[1], typo, "09000000000"))
+
+    pairs, stats = find_duplicate_pairs(profiles)
+
+    assert (original[0], 5000) in pairs
+    assert stats["comparisons"] < len(profiles) * 2
+    assert stats["skipped_blocks"] == 0
+
+
+def test_scan_keeps_reviews_and_removes_stale_pending_pairs():
+    db = make_db_session()()
+    seed_profiles(db)
+
+    first = scan_duplicates(db, batch_size=2)
+    assert (first["added"], first["removed"]) == (2, 0)
+    pairs = {(c.profile_id_a, c.profile_id_b): c for c in db.query(DuplicateCandidate)}
+    assert pairs[(1, 2)].reasons == "name,national_code"
+    assert pairs[(1, 2)].status == "pending"
+
+    review_duplicate_candidate(db, pairs[(1, 2)].id, "dismissed")
+    db.query(StudentProfile).filter(StudentProfile.id == 4).update({"phone_number": "09129999999"})
+    db.commit()
+
+    second = scan_duplicates(db)
+    assert (second["added"], second["removed"]) == (0, 1)
+    remaining = db.query(DuplicateCandidate).all()
+    assert [(c.profile_id_a, c.profile_id_b, c.status) for c in remaining] == [(1, 2, "dismissed")]
+
+
+def test_scan_job_and_review_page():
+    session_factory = make_db_session()
+    db = session_factory()
+    seed_profiles(db)
+
+    job = DuplicateScanJob(session_factory=session_factory)
+    assert job.run()["candidates"] == 2
+    assert job.status == "done"
+
+    def override_get_db():
+        yield db
+
+    # فقط همین router؛ TemplateResponse در Starlette 0.19 با middleware برنامه اصلی زیر TestClient سازگار نیست
+    fastapi_app = FastAPI()
+    fastapi_app.include_router(admin_dashboard.router)
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(fastapi_app)
+
+    assert client.get("/admin/duplicates", allow_redirects=False).status_code == 303
+
+    client.cookies.set("admin_access_token", create_admin_token())
+    page = client.get("/admin/duplicates")
+    assert page.status_code == 200
+    assert "name,national_code" in page.text
+    assert "0012345679" in page.text
+
+    candidate = db.query(DuplicateCandidate).order_by(DuplicateCandidate.score.desc()).first()
+    response = client.post(
+        f"/admin/duplicates/{candidate.id}/review", data={"decision": "confirmed"}, allow_redirects=False,
+    )
+    assert response.status_code == 303
+    db.refresh(candidate)
+    assert candidate.status == "confirmed"
+    assert candidate.reviewed_at is not None
+
+    invalid = client.post(f"/admin/duplicates/{candidate.id}/review", data={"decision": "maybe"})
+    assert invalid.status_code == 400
@@ -0,0 +1,132 @@
+import asyncio
+import csv
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.file_response import parse_range, ranged_file_response
+from app.models.audit_log import AuditLog
+from app.services.audit_service import iter_audit_log_rows
+from app.services.export_jobs import ExportJobManager
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+FILTERS = {"user_id": None, "action": None, "date_from": None, "date_to": None, "q": None}
+
+
+def make_session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def add_logs(db, count, start=0):
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    for index in range(start, start + count):
+        db.add(AuditLog(action="LOGIN", description=f"رویداد {index}", created_at=base + timedelta(minutes=index)))
+    db.commit()
+
+
+def read_body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_parse_range():
+    assert parse_range("bytes=0-9", 100) == (0, 9)
+    assert parse_range("bytes=90-", 100) == (90, 99)
+    assert parse_range("bytes=-10", 100) == (90, 99)
+    assert parse_range("bytes=50-500", 100) == (50, 99)
+    assert parse_range("bytes=100-", 100) is None
+    assert parse_range("bytes=5-1", 100) is None
+    assert parse_range("items=0-1", 100) is None
+
+
+def test_jobs_reuse_artifacts_until_new_rows_arrive(tmp_path):
+    session_factory = make_session_factory()
+    db = session_factory()
+    add_logs(db, 5)
+    manager = ExportJobManager(session_factory=session_factory, export_dir=str(tmp_path))
+
+    first = manager.submit(db, "csv", FILTERS)
+    manager.shutdown()
+    assert first.to_dict()["status"] == "done"
+    assert first.rows_written == 5
+    with open(first.path, encoding="utf-8") as handle:
+        assert len(list(csv.reader(handle))) == 6
+
+    again = manager.submit(db, "csv", FILTERS)
+    assert again.cached is True
+    assert again.path == first.path
+    assert manager.submit(db, "xlsx", FILTERS).path != first.path
+
+    add_logs(db, 2, start=5)
+    fresh = manager.submit(db, "csv", FILTERS)
+    manager.shutdown()
+    assert fresh.cached is False
+    assert fresh.rows_written == 7
+    assert not os.path.exists(first.path)
+    assert manager.get(fresh.id) is fresh
+
+
+def test_ndjson_job_writes_only_requested_columns(tmp_path):
+    session_factory = make_session_factory()
+    db = session_factory()
+    add_logs(db, 3)
+    manager = ExportJobManager(session_factory=session_factory, export_dir=str(tmp_path))
+
+    job = manager.submit(db, "ndjson.gz", FILTERS, ("id", "description"))
+    manager.shutdown()
+
+    assert job.to_dict()["columns"] == ["id", "description"]
+    assert job.filename == "audit_logs.ndjson.gz"
+    with gzip.open(job.path, "rt", encoding="utf-8") as handle:
+        records = [json.loads(line) for line in handle]
+    assert records == [{"id": index + 1, "description": f"رویداد {index}"} for index in reversed(range(3))]
+    assert manager.submit(db, "ndjson.gz", FILTERS).path != job.path
+
+
+def test_artifact_is_a_snapshot_at_its_high_water_mark():
+    db = make_session_factory()()
+    add_logs(db, 5)
+    until_id = db.query(AuditLog.id).order_by(AuditLog.id.desc()).first()[0]
+    add_logs(db, 3, start=5)
+
+    assert len(list(iter_audit_log_rows(db, until_id=until_id))) == 5
+
+
+def test_download_supports_range_requests(tmp_path):
+    path = tmp_path / "artifact.csv"
+    path.write_bytes(b"0123456789")
+
+    def request(headers):
+        return SimpleNamespace(headers=headers)
+
+    full = ranged_file_response(request({}), str(path), "text/csv", "audit_logs.csv")
+    assert full.status_code == 200
+    assert full.headers["accept-ranges"] == "bytes"
+
+    partial = ranged_file_response(request({"range": "bytes=4-"}), str(path), "text/csv", "audit_logs.csv")
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == "bytes 4-9/10"
+    assert read_body(partial) == b"456789"
+
+    invalid = ranged_file_response(request({"range": "bytes=20-"}), str(path), "text/csv", "audit_logs.csv")
+    assert invalid.status_code == 416
+    assert invalid.headers["content-range"] == "bytes */10"
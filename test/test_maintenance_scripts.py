@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_script(tmp_path, *args):
+    # پردازه جدا: اسکریپت‌ها باید بدون import قبلی مدل‌ها (مثل اجرای واقعی) کار کنند
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{tmp_path / 'scripts.db'}",
+        AUDIT_ARCHIVE_DIR=str(tmp_path / "archive"),
+    )
+    return subprocess.run(
+        [sys.executable, *args], cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+
+
+@pytest.mark.parametrize("args", [
+    ("app/scripts/reconcile_counters.py",),
+    ("app/scripts/archive_audit_logs.py", "2024-01-01"),
+    ("app/scripts/compact_change_log.py",),
+])
+def test_maintenance_script_runs_on_fresh_database(tmp_path, args):
+    first = run_script(tmp_path, *args)
+    assert first.returncode == 0, first.stderr
+    assert "عملیات کامل شد" in first.stdout
+
+    # اجرای دوباره روی همان دیتابیس هم باید بدون خطا باشد
+    second = run_script(tmp_path, *args)
+    assert second.returncode == 0, second.stderr
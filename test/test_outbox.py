@@ -0,0 +1,243 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base, ensure_outbox_events_schema
+from app.core.deps import get_db
+from app.core.security import create_access_token
+from app.models.outbox_event import OutboxEvent
+from app.schemas.auth import RegisterRequest
+from app.routers import ui_dashboard
+from app.schemas.student import AdminStudentUpdate, StudentProfileUpdate
+from app.services import student_service, user_service
+from app.services.auth_service import register_user
+from app.services.outbox_relay import FileOutboxSink, OutboxRelay, WebhookOutboxSink
+from app.services.outbox_service import OutboxEventType, get_failed_outbox_events, poll_outbox_events
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.role  # noqa: F401
+import app.models.student_profile  # noqa: F401
+import app.models.user  # noqa: F401
+
+
+def make_session_factory():
+    # StaticPool: long-poll و relay از threadهای دیگر به همان دیتابیس وصل می‌شوند
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def register(db, national_code="0123456789", student_number="123456789", phone_number="09123456789"):
+    payload = RegisterRequest(
+        first_name="علی",
+        last_name="رضایی",
+        student_number=student_number,
+        national_code=national_code,
+        phone_number=phone_number,
+        gender="brother",
+        address="تهران",
+    )
+    return register_user(db, payload)
+
+
+class RecordingSink:
+    name = "recording"
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.batches = []
+
+    def deliver(self, events):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("unavailable")
+        self.batches.append([item["id"] for item in events])
+
+
+def test_events_are_written_with_the_business_transaction():
+    db = make_session_factory()()
+    user = register(db)
+    student_service.update_my_profile(db, user, StudentProfileUpdate(address="قم"))
+    user_service.admin_update_student(
+        db,
+        user.profile.id,
+        AdminStudentUpdate(
+            first_name="علی",
+            last_name="محمدی",
+            national_code="0123456789",
+            student_number="123456789",
+            phone_number="09123456789",
+            gender="brother",
+        ),
+    )
+
+    with pytest.raises(HTTPException):
+        register(db, national_code="0123456789", student_number="987654321", phone_number="09120000000")
+
+    events = [item.to_dict() for item in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+    assert [item["type"] for item in events] == [
+        OutboxEventType.USER_REGISTERED,
+        OutboxEventType.PROFILE_UPDATED,
+        OutboxEventType.PROFILE_UPDATED,
+    ]
+    assert events[0]["payload"]["user_id"] == user.id
+    assert events[1]["payload"]["changes"] == {"address": "قم"}
+    assert events[2]["payload"]["by"] == "admin"
+
+
+def test_ui_profile_edit_writes_an_event():
+    db = make_session_factory()()
+    user = register(db)
+
+    def override_get_db():
+        yield db
+
+    fastapi_app = FastAPI()
+    fastapi_app.include_router(ui_dashboard.router)
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(fastapi_app)
+    client.cookies.set("access_token", create_access_token({"sub": user.student_number}))
+
+    def submit(address):
+        return client.post(
+            "/ui/dashboard/profile/edit",
+            data={"phone_number": "09123456789", "address": address},
+            allow_redirects=False,
+        )
+
+    assert submit("قم").status_code == 303
+    # ارسال دوباره بدون تغییر رویدادی نمی‌سازد
+    assert submit("قم").status_code == 303
+
+    events = [item.to_dict() for item in db.query(OutboxEvent).order_by(OutboxEvent.id)]
+    assert [item["type"] for item in events] == [OutboxEventType.USER_REGISTERED, OutboxEventType.PROFILE_UPDATED]
+    assert events[1]["payload"]["changes"] == {"address": "قم"}
+    assert events[1]["payload"]["by"] == "student"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = datetime(2024, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += timedelta(seconds=seconds)
+
+
+def test_relay_retries_failed_batches_in_order():
+    session_factory = make_session_factory()
+    db = session_factory()
+    register(db)
+    register(db, national_code="1111111111", student_number="222222222", phone_number="09121111111")
+    sink = RecordingSink(failures=2)
+    clock = FakeClock()
+    relay = OutboxRelay([sink], session_factory=session_factory, batch_size=10, retry_base=1, clock=clock)
+
+    assert relay.relay_pending() == 0
+    failed = db.query(OutboxEvent).order_by(OutboxEvent.id).first()
+    db.refresh(failed)
+    assert failed.attempts == 1 and failed.last_error == "unavailable"
+    assert failed.next_attempt_at == clock.now + timedelta(seconds=1)
+
+    # تا پایان backoff به sink درخواستی نمی‌رود
+    assert relay.relay_pending() == 0
+    assert sink.failures == 1
+
+    clock.advance(1)
+    assert relay.relay_pending() == 0
+    db.refresh(failed)
+    assert failed.attempts == 2 and failed.next_attempt_at == clock.now + timedelta(seconds=2)
+
+    clock.advance(2)
+    assert relay.relay_pending() == 2
+    # رویداد ناموفق قبلی به تنهایی ارسال می‌شود
+    assert sink.batches == [[1], [2]]
+    assert relay.relay_pending() == 0
+    assert db.query(OutboxEvent).filter(OutboxEvent.delivered_at.is_(None)).count() == 0
+
+
+def test_relay_sets_aside_events_that_keep_failing():
+    session_factory = make_session_factory()
+    db = session_factory()
+    register(db)
+    register(db, national_code="1111111111", student_number="222222222", phone_number="09121111111")
+
+    class RejectingSink(RecordingSink):
+        def deliver(self, events):
+            if events[0]["id"] == 1:
+                raise RuntimeError("HTTP 400")
+            super().deliver(events)
+
+    sink = RejectingSink()
+    clock = FakeClock()
+    relay = OutboxRelay([sink], session_factory=session_factory, max_attempts=3, retry_base=1, clock=clock)
+
+    for _ in range(3):
+        assert relay.relay_pending() == 0
+        clock.advance(60)
+    assert relay.relay_pending() == 1
+    assert sink.batches == [[2]]
+
+    failed = get_failed_outbox_events(db)
+    assert [(item.id, item.attempts, item.last_error) for item in failed] == [(1, 3, "HTTP 400")]
+    assert failed[0].failed_at is not None
+
+
+def test_schema_upgrade_adds_retry_columns():
+    engine = create_engine("sqlite://")
+    with engine.begin() as connection:
+        connection.exec_driver_sql("CREATE TABLE outbox_events (id INTEGER PRIMARY KEY, attempts INTEGER)")
+
+    ensure_outbox_events_schema(engine)
+    ensure_outbox_events_schema(engine)
+
+    columns = {column["name"] for column in inspect(engine).get_columns("outbox_events")}
+    assert {"next_attempt_at", "failed_at"} <= columns
+
+
+def test_file_and_webhook_sinks(tmp_path):
+    events = [{"id": 1, "type": "user.registered", "payload": {"user_id": 1}}]
+    path = tmp_path / "outbox" / "events.ndjson"
+
+    FileOutboxSink(str(path)).deliver(events)
+    FileOutboxSink(str(path)).deliver(events)
+    assert [json.loads(line)["id"] for line in path.read_text(encoding="utf-8").splitlines()] == [1, 1]
+
+    sent = []
+    WebhookOutboxSink("http://hooks.local/outbox", sender=lambda url, body, timeout: sent.append(body) or 204).deliver(events)
+    assert json.loads(sent[0]) == {"events": events}
+    with pytest.raises(RuntimeError):
+        WebhookOutboxSink("http://hooks.local/outbox", sender=lambda url, body, timeout: 500).deliver(events)
+
+
+def test_long_poll_wakes_up_on_commit():
+    session_factory = make_session_factory()
+    db = session_factory()
+
+    async def scenario():
+        poll = asyncio.ensure_future(poll_outbox_events(db, after_id=0, timeout=5))
+        await asyncio.sleep(0.05)
+        assert not poll.done()
+        await asyncio.to_thread(register, session_factory())
+        return await asyncio.wait_for(poll, 2)
+
+    result = asyncio.run(scenario())
+
+    assert [item["type"] for item in result["events"]] == [OutboxEventType.USER_REGISTERED]
+    assert result["next_after"] == result["events"][0]["id"]
+
+    empty = asyncio.run(poll_outbox_events(db, after_id=result["next_after"], timeout=0.05))
+    assert empty == {"events": [], "next_after": result["next_after"]}
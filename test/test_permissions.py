@@ -0,0 +1,208 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.deps import get_db
+from app.core.security import create_access_token, require_permission
+from app.models.audit_log import AuditLog
+from app.models.permission import Permission
+from app.models.role import Role
+from app.models.user import User
+from app.routers import admin
+from app.services.permission_service import (
+    ensure_permissions_initialized,
+    get_role_permissions,
+    grant_permission,
+    revoke_permission,
+    role_has_permission,
+)
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.student_profile  # noqa: F401
+
+
+def make_db_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_roles(db):
+    roles = {name: Role(name=name) for name in ("user", "admin", "moderator")}
+    db.add_all(roles.values())
+    db.flush()
+    users = {
+        name: User(student_number=f"40000000{index}", hashed_password="x", role_id=role.id)
+        for index, (name, role) in enumerate(roles.items())
+    }
+    db.add_all(users.values())
+    db.commit()
+    return roles, users
+
+
+def count_queries(db):
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_unseeded_database_falls_back_to_default_role_map():
+    db = make_db_session()
+    _, users = seed_roles(db)
+
+    assert users["admin"].can("manage_users")
+    assert users["moderator"].can("update")
+    assert not users["moderator"].can("delete")
+    assert users["user"].can("read")
+    assert not users["user"].can("create")
+    assert not users["admin"].can("missing")
+
+
+def test_seeding_creates_distinct_bits_and_is_idempotent():
+    db = make_db_session()
+    roles, _ = seed_roles(db)
+
+    ensure_permissions_initialized(db)
+    revoke_permission(db, roles["moderator"].id, "update")
+    ensure_permissions_initialized(db)
+
+    bits = [bit for (bit,) in db.query(Permission.bit)]
+    assert sorted(bits) == [0, 1, 2, 3, 4]
+    assert get_role_permissions(db, roles["admin"].id) == ["create", "delete", "manage_users", "read", "update"]
+    # اجرای دوباره اعطاهای تغییرداده‌شده را برنمی‌گرداند
+    assert get_role_permissions(db, roles["moderator"].id) == ["create", "read"]
+
+
+def test_checks_are_served_from_cache_until_permissions_change():
+    db = make_db_session()
+    roles, users = seed_roles(db)
+    ensure_permissions_initialized(db)
+    assert not role_has_permission(db, roles["user"].id, "delete")
+    db.refresh(users["admin"])
+
+    statements = count_queries(db)
+    for _ in range(100):
+        assert users["admin"].can("manage_users")
+        assert not role_has_permission(db, roles["user"].id, "delete")
+    assert statements == []
+
+    assert grant_permission(db, roles["user"].id, "delete") == ["delete", "read"]
+    assert role_has_permission(db, roles["user"].id, "delete")
+
+    with pytest.raises(HTTPException) as exc_info:
+        grant_permission(db, roles["user"].id, "missing")
+    assert exc_info.value.status_code == 404
+
+
+def test_last_role_with_admin_permission_keeps_it():
+    db = make_db_session()
+    roles, users = seed_roles(db)
+    ensure_permissions_initialized(db)
+
+    with pytest.raises(HTTPException) as exc_info:
+        revoke_permission(db, roles["admin"].id, "manage_users")
+    assert exc_info.value.status_code == 400
+    assert users["admin"].can("manage_users")
+
+    # نقشی بدون کاربر فعال جای ادمین‌ها را نمی‌گیرد
+    empty_role = Role(name="auditor")
+    db.add(empty_role)
+    db.commit()
+    grant_permission(db, empty_role.id, "manage_users")
+    users["moderator"].is_active = False
+    db.commit()
+    grant_permission(db, roles["moderator"].id, "manage_users")
+    with pytest.raises(HTTPException):
+        revoke_permission(db, roles["admin"].id, "manage_users")
+
+    # وقتی کاربر فعال دیگری این دسترسی را دارد، گرفتن آن مجاز است
+    users["moderator"].is_active = True
+    db.commit()
+    assert "manage_users" not in revoke_permission(db, roles["admin"].id, "manage_users")
+    with pytest.raises(HTTPException):
+        revoke_permission(db, roles["moderator"].id, "manage_users")
+
+
+def test_permission_changes_are_audited():
+    db = make_db_session()
+    roles, users = seed_roles(db)
+    ensure_permissions_initialized(db)
+
+    grant_permission(db, roles["user"].id, "delete", actor=users["admin"])
+    grant_permission(db, roles["user"].id, "delete", actor=users["admin"])
+    revoke_permission(db, roles["user"].id, "delete", actor=users["admin"])
+
+    logs = db.query(AuditLog).order_by(AuditLog.id).all()
+    # اعطای تکراری تغییری نمی‌دهد و لاگ نمی‌شود
+    assert [log.action for log in logs] == ["ADMIN_PERMISSION_GRANT", "ADMIN_PERMISSION_REVOKE"]
+    assert {(log.user_id, log.entity, log.entity_id) for log in logs} == {
+        (users["admin"].id, "role", roles["user"].id),
+    }
+    assert "delete" in logs[0].description
+
+
+def test_permission_endpoints_record_the_acting_admin():
+    db = make_db_session()
+    roles, users = seed_roles(db)
+    ensure_permissions_initialized(db)
+
+    def override_get_db():
+        yield db
+
+    fastapi_app = FastAPI()
+    fastapi_app.include_router(admin.router)
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(fastapi_app)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': users['admin'].student_number})}"}
+
+    url = f"/admin/roles/{roles['user'].id}/permissions/delete"
+    assert client.put(url, headers=headers).json()["permissions"] == ["delete", "read"]
+    assert client.delete(url, headers=headers).json()["permissions"] == ["read"]
+
+    logs = db.query(AuditLog).order_by(AuditLog.id).all()
+    assert [(log.action, log.user_id) for log in logs] == [
+        ("ADMIN_PERMISSION_GRANT", users["admin"].id),
+        ("ADMIN_PERMISSION_REVOKE", users["admin"].id),
+    ]
+
+
+def test_require_permission_dependency():
+    db = make_db_session()
+    roles, users = seed_roles(db)
+    ensure_permissions_initialized(db)
+
+    def override_get_db():
+        yield db
+
+    fastapi_app = FastAPI()
+
+    @fastapi_app.get("/protected")
+    def protected(current_user: User = Depends(require_permission("manage_users"))):
+        return {"id": current_user.id}
+
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(fastapi_app)
+
+    def get(user):
+        token = create_access_token({"sub": user.student_number})
+        return client.get("/protected", headers={"Authorization": f"Bearer {token}"})
+
+    assert get(users["admin"]).json() == {"id": users["admin"].id}
+    assert get(users["moderator"]).status_code == 403
+
+    # پس از گرم شدن cache فقط کوئری خواندن کاربر اجرا می‌شود
+    statements = count_queries(db)
+    assert get(users["admin"]).status_code == 200
+    assert len(statements) == 1
+
+    grant_permission(db, roles["moderator"].id, "manage_users")
+    assert get(users["moderator"]).status_code == 200
@@ -0,0 +1,156 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.deps import get_db
+from app.core.security import create_access_token
+from app.main import app as fastapi_app
+from app.models.audit_log import AuditLog
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers.admin_ui import audit_logs_page
+
+
+def make_db_session():
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed(db, students=6):
+    user_role, admin_role, guest_role = Role(name="user"), Role(name="admin"), Role(name="guest")
+    db.add_all([user_role, admin_role, guest_role])
+    db.flush()
+
+    admin = User(student_number="admin0001", hashed_password="x", role_id=admin_role.id)
+    db.add(admin)
+    created_at = datetime(2024, 1, 1)
+    for index in range(students):
+        user = User(student_number=f"40100{index}", hashed_password="x", role_id=user_role.id)
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name="خانوادگی",
+            student_number=user.student_number,
+            national_code=f"00000000{index:02d}",
+            phone_number=f"0912000000{index}",
+            gender="brother",
+        )
+        db.add(user)
+        db.flush()
+        db.add(AuditLog(action="LOGIN", user_id=user.id, created_at=created_at + timedelta(minutes=index)))
+    db.add(AuditLog(action="SYSTEM", created_at=created_at - timedelta(minutes=1)))
+    db.commit()
+    db.expunge_all()
+    return admin
+
+
+def make_client(db):
+    def override_get_db():
+        yield db
+
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    return TestClient(fastapi_app)
+
+
+def auth_headers(student_number):
+    return {"Authorization": f"Bearer {create_access_token({'sub': student_number})}"}
+
+
+def test_list_users_query_budget_does_not_depend_on_page_size(query_budget):
+    db = make_db_session()
+    seed(db)
+    client = make_client(db)
+    try:
+        for limit in (2, 7):
+            db.expunge_all()
+            with query_budget(db, 3):
+                response = client.get(f"/test/users?limit={limit}", headers=auth_headers("admin0001"))
+            assert response.status_code == 200
+            body = response.json()
+            assert len(body["users"]) == limit
+            assert body["total"] == 7
+    finally:
+        fastapi_app.dependency_overrides.clear()
+
+    users = body["users"]
+    assert users[0]["role"] == "admin" and "profile" not in users[0]
+    assert users[1]["role"] == "user"
+    assert users[1]["profile"]["national_code"] == "0000000000"
+
+
+def test_list_roles_query_budget_does_not_depend_on_role_count(query_budget):
+    db = make_db_session()
+    seed(db)
+    client = make_client(db)
+    try:
+        with query_budget(db, 3):
+            response = client.get("/test/roles")
+    finally:
+        fastapi_app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    roles = {role["name"]: role for role in response.json()["roles"]}
+    assert roles["user"]["user_count"] == 6
+    assert roles["user"]["users_sample"] == ["401000", "401001", "401002"]
+    assert roles["admin"]["user_count"] == 1
+    assert roles["admin"]["users_sample"] == ["admin0001"]
+    assert roles["guest"] == {
+        "id": roles["guest"]["id"],
+        "name": "guest",
+        "description": None,
+        "user_count": 0,
+        "users_sample": [],
+    }
+
+
+def test_read_user_by_id_loads_role_and_profile_with_current_user(query_budget):
+    db = make_db_session()
+    seed(db)
+    client = make_client(db)
+    try:
+        # کاربر جاری (با نقش) و کاربر خواسته‌شده (با پروفایل)، هر کدام یک کوئری
+        with query_budget(db, 2):
+            response = client.get("/users/2", headers=auth_headers("admin0001"))
+        assert client.get("/users/1", headers=auth_headers("admin0001")).json()["profile"] is None
+    finally:
+        fastapi_app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["student_number"] == "401000"
+    assert body["profile"]["national_code"] == "0000000000"
+    assert body["profile"]["gender"] == "brother"
+
+
+def test_audit_logs_page_loads_users_and_profiles_in_one_query(query_budget):
+    db = make_db_session()
+    admin = seed(db)
+    templates = SimpleNamespace(TemplateResponse=lambda name, context: context)
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(templates=templates)),
+        url=SimpleNamespace(include_query_params=lambda **kw: "", remove_query_params=lambda *a: ""),
+    )
+
+    with query_budget(db, 4):
+        context = audit_logs_page(
+            request, db=db, _=admin, user_id=None, action=None, date_from=None,
+            date_to=None, q=None, cursor=None, limit=500, with_total=False,
+        )
+        logs = context["logs"]
+        rendered = [(log.user.student_number if log.user else None) for log in logs]
+
+    assert len(logs) == 7
+    assert rendered[0] == "401005"
+    assert logs[0].national_code == "0000000005"
+    assert rendered[-1] is None
@@ -0,0 +1,140 @@
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers import admin_api
+from app.services import analytics_service
+from app.services.analytics_service import get_registration_analytics
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+REGISTRATIONS = [
+    # (زمان ثبت‌نام، احراز هویت)
+    (datetime(2024, 3, 4, 9, 0), True),    # دوشنبه
+    (datetime(2024, 3, 4, 23, 59), False),
+    (datetime(2024, 3, 6, 12, 0), True),
+    (datetime(2024, 3, 11, 8, 0), False),  # دوشنبه هفته بعد
+    (datetime(2024, 3, 20, 8, 0), True),   # خارج از بازه
+]
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_profiles(db):
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    for index, (created_at, authenticated) in enumerate(REGISTRATIONS):
+        user = User(student_number=f"4010{index}", hashed_password="x", role_id=role.id)
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name="خانوادگی",
+            student_number=user.student_number,
+            national_code=f"00000000{index:02d}",
+            phone_number=f"0912000000{index}",
+            gender="brother",
+            has_authenticated=authenticated,
+            created_at=created_at,
+        )
+        db.add(user)
+    db.commit()
+
+
+def test_daily_series_is_zero_filled_with_funnel_for_range():
+    db = make_db_session()
+    seed_profiles(db)
+
+    result = get_registration_analytics(db, date(2024, 3, 3), date(2024, 3, 12))
+
+    series = {item["period"]: item for item in result["series"]}
+    assert len(series) == 10
+    assert series["2024-03-03"] == {"period": "2024-03-03", "registered": 0, "authenticated": 0}
+    assert series["2024-03-04"] == {"period": "2024-03-04", "registered": 2, "authenticated": 1}
+    assert series["2024-03-06"]["authenticated"] == 1
+    assert series["2024-03-11"]["registered"] == 1
+    assert result["funnel"] == {
+        "registered": 4,
+        "authenticated": 2,
+        "not_authenticated": 2,
+        "conversion_rate": 50.0,
+    }
+
+
+def test_weekly_series_groups_days_by_monday():
+    db = make_db_session()
+    seed_profiles(db)
+
+    result = get_registration_analytics(db, date(2024, 3, 3), date(2024, 3, 12), interval="week")
+
+    assert result["series"] == [
+        {"period": "2024-02-26", "registered": 0, "authenticated": 0},
+        {"period": "2024-03-04", "registered": 3, "authenticated": 2},
+        {"period": "2024-03-11", "registered": 1, "authenticated": 0},
+    ]
+
+
+def test_range_bounds_match_server_default_timestamps():
+    db = make_db_session()
+    seed_profiles(db)
+    # ردیف‌های نوشته‌شده با server_default بدون بخش کسری ذخیره می‌شوند
+    db.execute(text("UPDATE student_profiles SET created_at = '2024-03-13 00:00:00' WHERE id = 4"))
+    db.execute(text("UPDATE student_profiles SET created_at = '2024-03-03 00:00:00' WHERE id = 5"))
+    db.commit()
+
+    result = get_registration_analytics(db, date(2024, 3, 3), date(2024, 3, 12))
+
+    series = {item["period"]: item["registered"] for item in result["series"]}
+    assert series["2024-03-03"] == 1
+    assert "2024-03-13" not in series
+    assert result["funnel"]["registered"] == sum(series.values()) == 4
+
+
+def test_daily_counts_use_created_at_index():
+    db = make_db_session()
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT date(created_at), count(*), sum(has_authenticated) "
+        "FROM student_profiles WHERE created_at >= '2024-02-29' AND created_at < '2024-04-02' "
+        "AND date(created_at) BETWEEN '2024-03-01' AND '2024-03-31' "
+        "GROUP BY date(created_at)"
+    )).fetchall()
+
+    assert any("ix_student_profiles_created_at_authenticated" in row[-1] for row in plan)
+
+
+def test_endpoint_caches_per_range_and_rejects_invalid_ranges():
+    db = make_db_session()
+    seed_profiles(db)
+    analytics_service.analytics_cache.invalidate()
+
+    first = admin_api.registration_analytics(date(2024, 3, 1), date(2024, 3, 31), "day", db=db)
+    db.query(StudentProfile).update({"has_authenticated": True})
+    db.commit()
+    cached = admin_api.registration_analytics(date(2024, 3, 1), date(2024, 3, 31), "day", db=db)
+    other_range = admin_api.registration_analytics(date(2024, 3, 1), date(2024, 3, 30), "day", db=db)
+
+    assert cached is first
+    assert first["funnel"]["authenticated"] == 3
+    assert other_range["funnel"]["authenticated"] == 5
+
+    with pytest.raises(HTTPException) as reversed_range:
+        admin_api.registration_analytics(date(2024, 3, 31), date(2024, 3, 1), "day", db=db)
+    assert reversed_range.value.status_code == 400
+
+    with pytest.raises(HTTPException) as long_range:
+        admin_api.registration_analytics(date(2023, 1, 1), date(2024, 3, 1), "day", db=db)
+    assert long_range.value.status_code == 400
+    analytics_service.analytics_cache.invalidate()
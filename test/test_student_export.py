@@ -0,0 +1,143 @@
+import asyncio
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.core.query_utils import prefix_filter, prefix_upper_bound
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.user import User
+from app.routers import admin
+from app.services.student_service import STUDENT_EXPORT_FIELDS, iter_student_export_rows
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+
+def make_db_session():
+    # StaticPool: StreamingResponse ردیف‌ها را در threadpool می‌خواند
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_students(db, count=6):
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    for index in range(count):
+        student_number = f"{401 if index < 4 else 402}{index:05d}"
+        user = User(student_number=student_number, hashed_password="x", role_id=role.id)
+        user.profile = StudentProfile(
+            first_name="نام",
+            last_name=f"خانوادگی {index}",
+            national_code=f"{index:010d}",
+            student_number=student_number,
+            phone_number=f"0912{index:07d}",
+            gender="brother" if index % 2 else "sister",
+            has_authenticated=index % 3 == 0,
+            created_at=datetime(2024, 1, index + 1),
+        )
+        db.add(user)
+    db.commit()
+
+
+def read_body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+
+    return asyncio.run(collect())
+
+
+def test_prefix_range_helpers():
+    db = make_db_session()
+    seed_students(db)
+
+    assert prefix_upper_bound("4011") == "4012"
+    assert prefix_upper_bound("") is None
+    matched = db.query(StudentProfile.student_number).filter(
+        prefix_filter(StudentProfile.student_number, "401")
+    ).all()
+    assert len(matched) == 4
+
+
+def test_export_rows_join_user_and_role_in_batches():
+    db = make_db_session()
+    seed_students(db)
+
+    rows = list(iter_student_export_rows(db, batch_size=2))
+
+    assert [row[0] for row in rows] == list(range(1, 7))
+    assert all(len(row) == len(STUDENT_EXPORT_FIELDS) for row in rows)
+    assert {row[list(STUDENT_EXPORT_FIELDS).index("role")] for row in rows} == {"user"}
+
+    filtered = list(iter_student_export_rows(
+        db,
+        fields=("student_number", "gender"),
+        gender="sister",
+        student_number_prefix="401",
+        created_from=datetime(2024, 1, 2),
+        batch_size=1,
+    ))
+    assert filtered == [("40100002", "sister")]
+    assert [row[0] for row in iter_student_export_rows(db, fields=("id",), has_authenticated=True)] == [1, 4]
+
+
+def test_export_created_filters_accept_aware_datetimes():
+    db = make_db_session()
+    seed_students(db)
+    tehran = timezone(timedelta(hours=3, minutes=30))
+
+    # 2024-01-02 03:30+03:30 همان 2024-01-02 00:00 به وقت UTC است
+    aware = list(iter_student_export_rows(
+        db,
+        fields=("id",),
+        created_from=datetime(2024, 1, 2, 3, 30, tzinfo=tehran),
+        created_to=datetime(2024, 1, 4, 3, 30, tzinfo=tehran),
+    ))
+    naive = list(iter_student_export_rows(
+        db, fields=("id",), created_from=datetime(2024, 1, 2), created_to=datetime(2024, 1, 4),
+    ))
+    assert aware == naive
+    assert [row[0] for row in aware] == [2, 3, 4]
+
+
+def test_export_route_is_not_shadowed_by_student_id():
+    paths = [route.path for route in admin.router.routes]
+
+    assert paths.index("/admin/students/export") < paths.index("/admin/students/{student_id}")
+
+
+def test_export_endpoint_streams_csv_and_ndjson():
+    db = make_db_session()
+    seed_students(db, count=3)
+    request = SimpleNamespace(headers={})
+    params = dict(
+        gender=None, has_authenticated=None, student_number_prefix=None,
+        created_from=None, created_to=None, compress=False,
+    )
+
+    response = admin.export_students(request, db=db, format="csv", columns="student_number,role", **params)
+    lines = list(csv.reader(io.StringIO(read_body(response).decode("utf-8"))))
+    assert response.headers["content-disposition"].endswith("students.csv")
+    assert lines == [["Student Number", "Role"], ["40100000", "user"], ["40100001", "user"], ["40100002", "user"]]
+
+    response = admin.export_students(request, db=db, format="ndjson", columns="id,has_authenticated", **params)
+    records = [json.loads(line) for line in read_body(response).decode("utf-8").splitlines()]
+    assert records == [
+        {"id": 1, "has_authenticated": True},
+        {"id": 2, "has_authenticated": False},
+        {"id": 3, "has_authenticated": False},
+    ]
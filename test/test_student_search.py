@@ -0,0 +1,192 @@
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, backfill_student_search_names
+from app.core.validators import normalize_persian_text
+from app.models.role import Role
+from app.models.student_profile import StudentProfile
+from app.models.student_search import install_student_search
+from app.models.user import User
+from app.routers import admin_api
+from app.services.student_service import search_students
+
+# Ensure SQLAlchemy relationships are fully registered for tests
+import app.models.audit_log  # noqa: F401
+
+STUDENTS = [
+    ("علی", "کریمی", "40110001", "0011111111", "09121110001"),
+    ("علیرضا", "نیک‌نام", "40110002", "0022222222", "09121110002"),
+    ("زهرا", "علوی", "40220003", "0033333333", "09351110003"),
+    ("محمد", "كريمي", "40220004", "0044444444", "09121110004"),
+]
+
+
+def make_db_session():
+    engine = create_engine("sqlite:///:memory:")
+    testing_session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    Base.metadata.create_all(bind=engine)
+    return testing_session_local()
+
+
+def seed_students(db):
+    role = Role(name="user")
+    db.add(role)
+    db.flush()
+    for first_name, last_name, student_number, national_code, phone_number in STUDENTS:
+        user = User(student_number=student_number, hashed_password="x", role_id=role.id)
+        user.profile = StudentProfile(
+            first_name=first_name,
+            last_name=last_name,
+            national_code=national_code,
+            student_number=student_number,
+            phone_number=phone_number,
+            gender="brother",
+        )
+        db.add(user)
+    db.commit()
+
+
+def names(page):
+    return [f"{profile.first_name} {profile.last_name}" for profile in page["students"]]
+
+
+def test_normalize_persian_text():
+    assert normalize_persian_text("  علي   كريمي ") == "علی کریمی"
+    assert normalize_persian_text("نیک‌نام") == "نیکنام"
+    assert normalize_persian_text("مُحَمَّد ۱۲۳") == "محمد 123"
+    assert normalize_persian_text(None) is None
+
+
+def test_name_search_normalizes_letters_and_prefixes():
+    db = make_db_session()
+    seed_students(db)
+
+    # «كريمي» با حروف عربی ذخیره شده و با حروف فارسی پیدا می‌شود
+    assert sorted(names(search_students(db, "کریمی"))) == ["علی کریمی", "محمد كريمي"]
+    assert names(search_students(db, "علي كريمي")) == ["علی کریمی"]
+    assert sorted(names(search_students(db, "علی"))) == ["علی کریمی", "علیرضا نیک‌نام"]
+    assert names(search_students(db, "نیکنام")) == ["علیرضا نیک‌نام"]
+    assert search_students(db, '"')["students"] == []
+
+
+def test_numeric_search_uses_identifier_prefixes():
+    db = make_db_session()
+    seed_students(db)
+
+    assert names(search_students(db, "۴۰۱۱")) == ["علی کریمی", "علیرضا نیک‌نام"]
+    assert names(search_students(db, "0033")) == ["زهرا علوی"]
+    assert names(search_students(db, "0935 111")) == ["زهرا علوی"]
+
+
+def test_index_follows_updates_and_deletes():
+    db = make_db_session()
+    seed_students(db)
+
+    profile = db.query(StudentProfile).filter(StudentProfile.last_name == "علوی").one()
+    profile.last_name = "حسینی"
+    db.commit()
+    assert names(search_students(db, "علوی")) == []
+    assert names(search_students(db, "حسینی")) == ["زهرا حسینی"]
+
+    db.delete(profile.user)
+    db.commit()
+    assert names(search_students(db, "زهرا")) == []
+
+
+def test_search_pages_with_cursor():
+    db = make_db_session()
+    seed_students(db)
+
+    for q in ("کریمی", "0912"):
+        first = search_students(db, q, limit=1)
+        second = search_students(db, q, limit=1, cursor=first["next_cursor"])
+        assert first["has_more"] is True
+        assert {p.id for p in first["students"]}.isdisjoint(p.id for p in second["students"])
+
+    numeric_cursor = search_students(db, "0912", limit=1)["next_cursor"]
+    with pytest.raises(HTTPException):
+        search_students(db, "کریمی", cursor=numeric_cursor)
+
+
+def test_search_endpoint_serializes_profiles():
+    db = make_db_session()
+    seed_students(db)
+
+    page = admin_api.search_students_endpoint(q="زهرا", limit=20, cursor=None, db=db)
+
+    assert [item["student_number"] for item in page["items"]] == ["40220003"]
+    assert page["next_cursor"] is None
+
+
+def test_create_all_does_not_depend_on_model_import_order():
+    # پردازه جدا تا ترتیب import ماژول‌ها (ابتدا ایندکس جستجوی لاگ‌ها) واقعاً کنترل شود
+    script = (
+        "import app.models.audit_log, app.models.audit_search\n"
+        "import app.models.role, app.models.user, app.models.student_profile, app.models.student_search\n"
+        "from sqlalchemy import create_engine\n"
+        "from app.core.database import Base\n"
+        "Base.metadata.create_all(create_engine('sqlite://'))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+
+
+def test_plain_sqlite_connections_can_write_profiles(tmp_path):
+    path = tmp_path / "students.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed_students(db)
+    db.close()
+    engine.dispose()
+
+    # مثل sqlite3 CLI یا اسکریپت پشتیبان‌گیری: بدون تابع‌های ثبت‌شده توسط برنامه
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE student_profiles SET last_name = 'رضایی' WHERE student_number = '40220003'")
+        connection.execute(
+            "INSERT INTO student_profiles (user_id, first_name, last_name, national_code, student_number, "
+            "phone_number, gender, has_authenticated) "
+            "VALUES (99, 'مریم', 'احمدی', '0055555555', '40330005', '09121110005', 'sister', 0)"
+        )
+    assert {row[0] for row in sqlite3.connect(path).execute("SELECT name FROM student_profiles_fts")} >= {
+        "زهرا رضایی", "مریم احمدی",
+    }
+
+    db = sessionmaker(bind=create_engine(f"sqlite:///{path}"))()
+    assert names(search_students(db, "احمدی")) == ["مریم احمدی"]
+    profile = db.query(StudentProfile).filter(StudentProfile.student_number == "40220003").one()
+    profile.first_name = "فاطمه"
+    db.commit()
+    assert profile.search_name == "فاطمه رضایی"
+    assert names(search_students(db, "فاطمه")) == ["فاطمه رضایی"]
+
+
+def test_legacy_search_index_is_upgraded():
+    db = make_db_session()
+    seed_students(db)
+    connection = db.connection()
+    connection.exec_driver_sql("DROP TRIGGER trg_student_profiles_fts_update")
+    connection.exec_driver_sql(
+        "CREATE TRIGGER trg_student_profiles_fts_update AFTER UPDATE OF first_name, last_name "
+        "ON student_profiles BEGIN SELECT normalize_fa(NEW.first_name); END"
+    )
+    connection.exec_driver_sql("UPDATE student_profiles SET search_name = NULL")
+    db.commit()
+
+    install_student_search(db.connection())
+    db.commit()
+    assert backfill_student_search_names(db.get_bind(), batch_size=3) == len(STUDENTS)
+
+    legacy = db.execute(text("SELECT count(*) FROM sqlite_master WHERE sql LIKE '%normalize_fa(%'")).scalar()
+    assert legacy == 0
+    profile = db.query(StudentProfile).filter(StudentProfile.last_name == "علوی").one()
+    profile.last_name = "حسینی"
+    db.commit()
+    assert names(search_students(db, "حسینی")) == ["زهرا حسینی"]
+    assert sorted(names(search_students(db, "کریمی"))) == ["علی کریمی", "محمد كريمي"]